@@ -0,0 +1,366 @@
+'''
+Benchmarks of the API hot paths
+
+    python -m benchmarks.bench_api [--repeat N] [--transport client,wsgi]
+                                   [--records-per-zone 100,1000,10000] [--groups-per-user 1,10,50]
+                                   [--grants-per-record 1,4] [--scenario NAME ...]
+                                   [--json FILE] [--compare OLD.json [--threshold 1.25]]
+    python -m benchmarks.bench_api --micro [--names 1000,100000] [--repeat N] [--json FILE]
+
+A benchmark point is a dataset generated by core.gendata for one value
+of a scaling axis, the other axes keeping their baseline value:
+
+    records_per_zone    records of each zone (BASELINE: 1000)
+    groups_per_user     groups of the benchmark user (2)
+    grants_per_record   groups with PermRr on each record (1)
+
+On each point, every scenario runs a number of times and its latency
+(min, median, p95, mean) and SQL queries are recorded:
+  * HTTP scenarios (HTTP_SCENARIOS: list, detail, create and bulk
+    endpoints), through a transport:
+      client  the django test client, in process (session login)
+      wsgi    a real WSGI server (wsgiref) in a thread, requests over
+              TCP (HTTP basic authentication)
+    queries are only counted with the client transport
+  * permission helpers called directly (HELPER_SCENARIOS)
+
+--micro only runs the benchmarks without database (MICRO_SCENARIOS, for
+now the validation of the names of N generated records, one by one and
+with validate_many).
+
+Results are reported and compared (on median_ms) by benchmarks.common.
+'''
+import base64
+import http.client
+import json
+import logging
+import random
+import sys
+import threading
+from dataclasses import dataclass
+from types import SimpleNamespace
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+from benchmarks.common import setup_django, test_database, measure, summary, parser, parse_args, report
+
+# the scenarios refer to models and helpers of core
+setup_django()
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.test import Client
+from django.test.utils import override_settings
+from core.gendata import generate, zone_records
+from core.models import Zone, Rr, PermRr, PermZone, User
+from core.permissions import PermCheck, RrPermCheck, get_allowed_rrs, with_perms
+from core.validators import ValidateRrName, validate_many
+from core import resolver, prefs
+
+BASELINE = {"records_per_zone": 1000, "groups_per_user": 2, "grants_per_record": 1}
+ZONES = 4
+PASSWORD = "bench"
+# fields identifying a result, to compare runs
+KEY = ("axis", "value", "transport", "scenario")
+
+
+@dataclass
+class Point():
+    '''
+    Objects of a generated dataset used by the scenarios
+    '''
+    user: User
+    admin: User
+    zone: Zone
+    rr: Rr
+    group: Group
+    zonefile: str
+
+
+def setup_point(records_per_zone, groups_per_user, grants_per_record, seed=0):
+    '''
+    Generate the dataset of a point; the benchmark user is in the groups
+    of zone0 (PermZone and PermRr) and in other groups up to
+    groups_per_user
+    '''
+    groups = max(2 * groups_per_user, 2 + grants_per_record, 4)
+    generate(prefix="bench", zones=ZONES, records=records_per_zone * ZONES, groups=groups,
+             users=2, groups_per_zone=2, grants_per_record=grants_per_record, seed=seed)
+    zone = Zone.objects.get(name="zone0.example.test", namespace__name="bench0")
+    zone_groups = set(PermZone.objects.filter(obj=zone).values_list('group_id', flat=True))
+    zone_groups.update(PermRr.objects.filter(obj__zone=zone).values_list('group_id', flat=True).distinct())
+    others = (Group.objects.filter(name__startswith="bench-group").exclude(id__in=zone_groups)
+              .order_by('id').values_list('id', flat=True))
+    member_of = sorted(zone_groups) + list(others[:max(groups_per_user - len(zone_groups), 0)])
+
+    user = User.objects.create(username="bench", default_pref=Group.objects.create(name="bench"))
+    user.set_password(PASSWORD)
+    user.save()
+    user.groups.set([user.default_pref_id, *member_of])
+    admin = User.objects.create(username="bench-admin", is_superuser=True,
+                                default_pref=Group.objects.create(name="bench-admin"))
+    admin.set_password(PASSWORD)
+    admin.save()
+
+    rrs = zone.rr_set.order_by('id')
+    # synchronization of the zone with itself: SRV (names with underscore
+    # labels) are left out, they would be refused
+    zonefile = "\n".join(f"{rr.name} {rr.ttl} IN {rr.type} {rr.rdata}"
+                         for rr in rrs.exclude(type="SRV").only('name', 'ttl', 'type', 'rdata'))
+    return Point(user=user, admin=admin, zone=zone, rr=rrs.filter(type="A").first(),
+                 group=Group.objects.get(id=member_of[0]), zonefile=zonefile)
+
+
+def reset_caches(cache):
+    '''
+    After the database was flushed: ids are reused, cached data must go
+    '''
+    cache.clear()
+    resolver.invalidate()
+    prefs.invalidate()
+
+
+#
+# Transports
+#
+
+class ClientTransport():
+    name = "client"
+    counts_queries = True
+
+    def __init__(self):
+        self.clients = {}
+
+    def reset(self):
+        # sessions are gone after a flush
+        self.clients = {}
+
+    def request(self, user, method, path, data=None):
+        client = self.clients.get(user.id)
+        if client is None:
+            client = self.clients[user.id] = Client()
+            client.force_login(user)
+        body = json.dumps(data) if data is not None else ""
+        return client.generic(method, path, body, content_type="application/json").status_code
+
+    def close(self):
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WsgiTransport():
+    '''
+    Requests to a WSGI server running in a thread of this process
+    '''
+    name = "wsgi"
+    counts_queries = False
+
+    def __init__(self):
+        self.server = make_server("127.0.0.1", 0, WSGIHandler(), handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def reset(self):
+        pass
+
+    def request(self, user, method, path, data=None):
+        credentials = base64.b64encode(f"{user.username}:{PASSWORD}".encode()).decode()
+        headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+        try:
+            conn.request(method, path, json.dumps(data) if data is not None else None, headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+TRANSPORTS = {"client": ClientTransport, "wsgi": WsgiTransport}
+
+
+#
+# Scenarios: function(point, i) -> (user, method, path, data) for HTTP,
+# function(point, i) -> result for helpers (i: iteration number)
+#
+
+HTTP_SCENARIOS = {
+    "zone_rr_list": lambda p, i: (p.user, "GET", f"/zone/{p.zone.id}/rr/?fields=name,type", None),
+    "rr_list": lambda p, i: (p.user, "GET", "/rr/?fields=id,name", None),
+    "rr_detail": lambda p, i: (p.user, "GET", f"/rr/{p.rr.id}/", None),
+    "rr_create": lambda p, i: (p.user, "POST", "/rr/", {"name": f"bench{i}", "type": "A",
+                                                        "a": f"192.0.2.{i % 250}", "zone": p.zone.id}),
+    "rrset_replace": lambda p, i: (p.user, "PUT", f"/zone/{p.zone.id}/rrset/benchset/A/",
+                                   [{"a": f"198.51.100.{(i + k) % 250}"} for k in range(5)]),
+    "zone_sync_dry_run": lambda p, i: (p.admin, "PUT", f"/zone/{p.zone.id}/records/?dry_run=1",
+                                       {"zonefile": p.zonefile}),
+    "perm_grant": lambda p, i: (p.admin, "POST", "/permrr/grant/",
+                                {"group": p.group.id, "action": "rw" if i % 2 else "r", "zone": p.zone.id}),
+}
+
+HELPER_SCENARIOS = {
+    "check_can_get": lambda p, i: PermCheck.can_get(p.user, p.rr, PermRr),
+    "allowed_rrs_count": lambda p, i: get_allowed_rrs(p.user, "r").filter(zone=p.zone).count(),
+    "can_create_when_name_exist": lambda p, i: RrPermCheck.can_create_when_name_exist(p.user, p.rr.name, p.rr.type),
+    "with_perms_get": lambda p, i: with_perms(Rr.objects.all(), p.user, PermRr, "rw").get(pk=p.rr.pk),
+}
+
+
+def record_names(count, seed=0):
+    '''
+    Names of count generated records and of their targets (CNAME, NS,
+    MX, SRV), as validated when they are created (names of SRV, with
+    underscore labels, are left out)
+    '''
+    names = []
+    for name, type, ttl, rdata in zone_records(SimpleNamespace(name="example.test"), count,
+                                               random.Random(seed)):
+        if type != "SRV":
+            names.append(name)
+        if type in ("CNAME", "NS"):
+            names.append(rdata)
+        elif type in ("MX", "SRV"):
+            names.append(rdata.split()[-1])
+    return names
+
+
+MICRO_SCENARIOS = {
+    "validate_each": lambda names: [ValidateRrName(name) for name in names],
+    "validate_many": lambda names: validate_many(names),
+}
+
+
+def run_point(point, transports, repeat, scenarios=None):
+    '''
+    Run scenarios (names, default: all) on point
+    Returns a list of results (dicts)
+    '''
+    results = []
+    for transport in transports:
+        transport.reset()
+        for name, scenario in HTTP_SCENARIOS.items():
+            if scenarios and name not in scenarios:
+                continue
+
+            def call(i):
+                status = transport.request(*scenario(point, i))
+                return 200 <= status < 300
+
+            timings, queries, errors = measure(call, repeat, transport.counts_queries)
+            results.append({"transport": transport.name, "scenario": name, "n": repeat,
+                            "queries": queries, "errors": errors, **summary(timings)})
+    for name, scenario in HELPER_SCENARIOS.items():
+        if scenarios and name not in scenarios:
+            continue
+        timings, queries, errors = measure(lambda i: scenario(point, i) is not None, repeat)
+        results.append({"transport": "helper", "scenario": name, "n": repeat,
+                        "queries": queries, "errors": errors, **summary(timings)})
+    return results
+
+
+def run_micro(count, repeat, scenarios=None, seed=0):
+    '''
+    Run MICRO_SCENARIOS (names, default: all) on the names of count records
+    Returns a list of results (dicts)
+    '''
+    names = record_names(count, seed)
+    results = []
+    for name, scenario in MICRO_SCENARIOS.items():
+        if scenarios and name not in scenarios:
+            continue
+        timings, _, errors = measure(lambda i: scenario(names) is not None, repeat, count_queries=False)
+        results.append({"transport": "micro", "scenario": name, "n": repeat,
+                        "queries": None, "errors": errors, **summary(timings)})
+    return results
+
+
+def points(axes):
+    '''
+    (axis, value, parameters) of the points for axes (axis -> values):
+    one axis varies, the others keep their baseline value
+    '''
+    for axis, values in axes.items():
+        for value in values:
+            yield axis, value, {**BASELINE, axis: value}
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def run_points(axes, names, args):
+    '''
+    Run the scenarios on the points of axes, in the test database
+    Returns a list of results (dicts)
+    '''
+    transports = [TRANSPORTS[name]() for name in names]
+    results = []
+    try:
+        for axis, value, params in points(axes):
+            call_command('flush', interactive=False, verbosity=0)
+            reset_caches(cache)
+            point = setup_point(seed=args.seed, **params)
+            print(f"{axis}={value}", file=sys.stderr)
+            for result in run_point(point, transports, args.repeat, args.scenario):
+                results.append({"axis": axis, "value": value, **params, **result})
+    finally:
+        for transport in transports:
+            transport.close()
+    return results
+
+
+def main():
+    p = parser(__doc__, repeat=20)
+    p.add_argument("--transport", default="client,wsgi",
+                   help=f"comma separated, among {', '.join(TRANSPORTS)}")
+    p.add_argument("--records-per-zone", type=int_list, default="100,1000,10000")
+    p.add_argument("--groups-per-user", type=int_list, default="1,10,50")
+    p.add_argument("--grants-per-record", type=int_list, default="1,4")
+    p.add_argument("--scenario", action="append",
+                   help="run only this scenario (may be repeated)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--micro", action="store_true",
+                   help="only run the benchmarks without database")
+    p.add_argument("--names", type=int_list, default="1000,100000",
+                   help="records whose names are validated (--micro)")
+    p.add_argument("--verbose", action="store_true",
+                   help="log the requests over their query budget")
+    args = parse_args(p)
+    transports = args.transport.split(",")
+    unknown = set(transports) - set(TRANSPORTS)
+    if unknown:
+        p.error(f"Unknown transport '{','.join(sorted(unknown))}'")
+    unknown = set(args.scenario or []) - (set(HTTP_SCENARIOS) | set(HELPER_SCENARIOS) | set(MICRO_SCENARIOS))
+    if unknown:
+        p.error(f"Unknown scenario '{','.join(sorted(unknown))}'")
+
+    if args.micro:
+        results = [{"axis": "names", "value": count, **result}
+                   for count in args.names
+                   for result in run_micro(count, args.repeat, args.scenario, args.seed)]
+    else:
+        axes = {"records_per_zone": args.records_per_zone,
+                "groups_per_user": args.groups_per_user,
+                "grants_per_record": args.grants_per_record}
+        # over budget warnings of each request, unless verbose
+        if not args.verbose:
+            logging.getLogger('core.querybudget').setLevel(logging.ERROR)
+        # cheap password checks (basic authentication on each request),
+        # no query log or profiler
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                               ALLOWED_HOSTS=['testserver', '127.0.0.1', 'localhost'],
+                               DEBUG=False, DNSAPP_QUERY_LOG=None, DNSAPP_PROFILER=False), test_database():
+            results = run_points(axes, transports, args)
+    report("api", results, args, KEY, "median_ms", meta={"baseline": BASELINE, "zones": ZONES})
+
+
+if __name__ == "__main__":
+    main()
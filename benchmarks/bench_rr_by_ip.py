@@ -0,0 +1,56 @@
+'''
+Lookup of A rr by address and by network: indexed addr key vs. a scan
+of rdata (no index)
+
+Run with --records 5000000 for the reference figures.
+'''
+import ipaddress
+from benchmarks.common import setup_django, test_database, timeit, parser, parse_args, report
+
+BATCH = 10000
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--records", type=int, default=200000)
+    args = parse_args(p)
+    setup_django()
+    from core.models import Namespace, Zone, Rr
+    from core.addresses import addr_key, network_range
+
+    results = []
+    with test_database():
+        namespace = Namespace.objects.create(name='bench')
+        zone = Zone.objects.create(name='bench.example.com', namespace=namespace,
+                                   nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+        base = int(ipaddress.IPv4Address('10.0.0.0'))
+        for first in range(0, args.records, BATCH):
+            last = min(first + BATCH, args.records)
+            Rr.objects.bulk_create([
+                Rr(name=f'host{i}', type='A', a=str(ipaddress.IPv4Address(base + i)), zone=zone)
+                for i in range(first, last)])
+
+        ip = str(ipaddress.IPv4Address(base + args.records // 2))
+        network = ipaddress.ip_network(f'{ip}/16', strict=False)
+        low, high = network_range(str(network))
+        prefix = '.'.join(ip.split('.')[:2]) + '.'
+        queries = (
+            ("addr", "indexed", lambda: list(Rr.objects.filter(addr=addr_key(ip)).values_list('id'))),
+            ("addr", "scan", lambda: list(Rr.objects.filter(type='A', rdata=ip).values_list('id'))),
+            ("cidr/16", "indexed", lambda: list(Rr.objects.filter(addr__gte=low, addr__lte=high).values_list('id'))),
+            ("cidr/16", "scan", lambda: list(Rr.objects.filter(type='A', rdata__startswith=prefix).values_list('id'))),
+        )
+        for query, method, func in queries:
+            t, rows = timeit(func, args.repeat)
+            results.append({
+                "query": query,
+                "method": method,
+                "records": args.records,
+                "matches": len(rows),
+                "time_s": t,
+            })
+    report("rr_by_ip", results, args, ("query", "method"), "time_s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+'''
+Zone rr list with all fields vs. a subset of fields (?fields=...)
+
+The zone holds many large TXT records (DKIM keys, SPF policies) and
+some A records. Measures the database fetch alone, then the full view
+(fetch + serialization + rendering).
+'''
+from benchmarks.common import setup_django, test_database, timeit, parser, parse_args, report
+
+DKIM = "v=DKIM1; k=rsa; p=" + "MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEA" * 50
+SPF = "v=spf1 " + " ".join(f"ip4:192.0.{i}.0/24" for i in range(100)) + " -all"
+
+
+def populate(records):
+    from django.contrib.auth.models import Group
+    from core.models import Namespace, Zone, Rr, User
+    group = Group.objects.create(name='bench')
+    admin = User.objects.create(username='bench', default_pref=group, is_superuser=True)
+    namespace = Namespace.objects.create(name='bench')
+    zone = Zone.objects.create(name='bench.example.com', namespace=namespace,
+                               nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+    rrs = []
+    for i in range(records):
+        if i % 4 == 0:
+            rrs.append(Rr(name=f'host{i}', type='A', a=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}', zone=zone))
+        elif i % 4 == 1:
+            rrs.append(Rr(name=f'sel{i}._domainkey', type='TXT', txt=DKIM, zone=zone))
+        else:
+            rrs.append(Rr(name=f'host{i}', type='TXT', txt=SPF, zone=zone))
+    Rr.objects.bulk_create(rrs, batch_size=5000)
+    return admin, zone
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--records", type=int, default=20000)
+    args = parse_args(p)
+    setup_django()
+    from rest_framework.test import APIClient
+    from core.models import Rr
+
+    results = []
+    with test_database():
+        admin, zone = populate(args.records)
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        for label, fields in (("all", None), ("name,type", ["id", "name", "type"])):
+            qs = Rr.objects.filter(zone=zone)
+            if fields:
+                qs = qs.only(*fields)
+            t_db, rows = timeit(lambda: list(qs.values_list(*(fields or []))), args.repeat)
+            fetched = sum(len(str(v)) for row in rows for v in row)
+            url = f'/zone/{zone.id}/rr/' + (f'?fields={",".join(fields)}' if fields else '')
+            t_view, response = timeit(lambda: client.get(url), args.repeat)
+            results.append({
+                "fields": label,
+                "records": args.records,
+                "db_s": t_db,
+                "db_bytes": fetched,
+                "view_s": t_view,
+                "response_bytes": len(response.content),
+            })
+    report("rr_list_fields", results, args, ("fields",), "view_s")
+
+
+if __name__ == "__main__":
+    main()
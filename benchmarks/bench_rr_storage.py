@@ -0,0 +1,119 @@
+'''
+Storage size and full scan time of rr: packed rdata column (current
+layout) vs. one column per rdata field (layout before migration 0003)
+
+The legacy layout is recreated in a scratch table. Run with
+--records 10000000 for the reference figures (takes a while and needs
+a few GB of disk).
+'''
+import time
+from benchmarks.common import setup_django, test_database, timeit, parser, parse_args, report
+
+BATCH = 10000
+
+
+def legacy_model():
+    '''
+    Rr model with one column per rdata field, as in migration 0001
+    '''
+    from django.db import models
+    attrs = {
+        '__module__': __name__,
+        'name': models.TextField(),
+        'type': models.TextField(),
+        'ttl': models.PositiveIntegerField(default=3600),
+        'zone': models.ForeignKey('core.Zone', on_delete=models.PROTECT, related_name='+'),
+        'a': models.GenericIPAddressField(protocol="IPv4", null=True),
+        'aaaa': models.GenericIPAddressField(protocol="IPv6", null=True),
+        'prio': models.PositiveIntegerField(null=True),
+        'srv_priority': models.PositiveIntegerField(null=True),
+        'srv_weight': models.PositiveIntegerField(null=True),
+        'srv_port': models.PositiveIntegerField(null=True),
+        'caa_flag': models.PositiveIntegerField(null=True),
+        'Meta': type('Meta', (), {'app_label': 'benchmarks', 'db_table': 'bench_legacy_rr'}),
+    }
+    for f in ('cname', 'ns', 'mx', 'ptr', 'txt', 'srv_target', 'caa_tag', 'caa_value', 'dname'):
+        attrs[f] = models.TextField(null=True)
+    return type('LegacyRr', (models.Model,), attrs)
+
+
+def record(i):
+    '''
+    Fields of the i-th generated record (realistic type mix)
+    '''
+    n = i % 20
+    name = f'host{i}'
+    if n < 12:
+        return dict(name=name, type='A', a=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}')
+    if n < 14:
+        return dict(name=name, type='AAAA', aaaa=f'2001:db8::{i & 0xffff:x}:{i >> 16:x}')
+    if n < 16:
+        return dict(name=f'alias{i}', type='CNAME', cname=f'{name}.example.com.')
+    if n < 18:
+        return dict(name=name, type='TXT', txt='v=spf1 include:_spf.example.com -all')
+    if n < 19:
+        return dict(name=name, type='MX', prio=10, mx='mail.example.com.')
+    return dict(name=f'_sip._tcp.{name}', type='SRV', srv_priority=0, srv_weight=5,
+                srv_port=5060, srv_target='sip.example.com.')
+
+
+def table_size(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+def scan(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT * FROM {table}")
+        n = 0
+        while True:
+            rows = cursor.fetchmany(BATCH)
+            if not rows:
+                return n
+            n += len(rows)
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--records", type=int, default=200000)
+    args = parse_args(p)
+    setup_django()
+    from django.db import connection
+    from core.models import Namespace, Zone, Rr
+
+    LegacyRr = legacy_model()
+    results = []
+    with test_database():
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(LegacyRr)
+        namespace = Namespace.objects.create(name='bench')
+        zone = Zone.objects.create(name='bench.example.com', namespace=namespace,
+                                   nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+        for label, model in (("legacy", LegacyRr), ("rdata", Rr)):
+            start = time.perf_counter()
+            for first in range(0, args.records, BATCH):
+                last = min(first + BATCH, args.records)
+                model.objects.bulk_create([model(zone=zone, **record(i)) for i in range(first, last)])
+            t_insert = time.perf_counter() - start
+            table = model._meta.db_table
+            t_scan, n = timeit(lambda: scan(connection, table), args.repeat)
+            size = table_size(connection, table)
+            results.append({
+                "layout": label,
+                "records": n,
+                "insert_s": t_insert,
+                "scan_s": t_scan,
+                "table_bytes": size,
+                "bytes_per_record": round(size / n, 1) if size else None,
+            })
+    report("rr_storage", results, args, ("layout",), "scan_s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+'''
+Helpers shared by benchmarks
+
+Benchmarks are run from the project directory, for example:
+    python -m benchmarks.bench_rr_list_fields --records 50000
+    python -m benchmarks.bench_api --records-per-zone 100,1000 --json api.json
+
+They use a throw-away test database created from the configured settings
+(DJANGO_SETTINGS_MODULE, default dnsapp.settings), like "manage.py test".
+
+Every benchmark writes the same JSON document (--json):
+    {"benchmark": name, "meta": {...}, "results": [{...}, ...]}
+meta describes the run (date, git revision, versions, database, options),
+each result is a flat dict. With --compare OLD.json, the results are
+matched by their key fields with those of a previous run of the same
+benchmark, and the run fails if one of them got slower than --threshold
+times its old value.
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dnsapp.settings")
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    '''
+    Create the test database(s), yield, then destroy them
+    '''
+    from django.test.utils import (setup_test_environment, teardown_test_environment,
+                                   setup_databases, teardown_databases)
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def timeit(func, repeat=5):
+    '''
+    Run func() repeat times, return (best time in seconds, last result)
+    '''
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def measure(call, repeat, count_queries=True):
+    '''
+    Run call(i) repeat times (after one warm-up call), call returns false
+    on error
+    Returns (timings in seconds, queries of the last call or None, errors)
+    '''
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    call(-1)
+    timings = []
+    queries = None
+    errors = 0
+    for i in range(repeat):
+        with CaptureQueriesContext(connection) if count_queries else nullcontext() as captured:
+            start = time.perf_counter()
+            ok = call(i)
+            timings.append(time.perf_counter() - start)
+        if count_queries:
+            queries = len(captured)
+        if not ok:
+            errors += 1
+    return timings, queries, errors
+
+
+def summary(timings):
+    '''
+    Latency of timings (seconds) in milliseconds: min, median, p95, mean
+    '''
+    ordered = sorted(timings)
+    return {"min_ms": ordered[0] * 1000,
+            "median_ms": statistics.median(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            "mean_ms": statistics.fmean(ordered) * 1000}
+
+
+def parser(description, repeat=5):
+    p = argparse.ArgumentParser(description=description,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=repeat,
+                   help="number of runs per measure")
+    p.add_argument("--json", metavar="FILE",
+                   help="write results to FILE as JSON ('-' for stdout)")
+    p.add_argument("--compare", metavar="FILE",
+                   help="results (JSON) of a previous run to compare with")
+    p.add_argument("--threshold", type=float, default=1.25,
+                   help="slowdown ratio reported as a regression")
+    return p
+
+
+def parse_args(p):
+    '''
+    Arguments of parser p; the results of --compare are read at once
+    (in args.old), not after a long run
+    '''
+    args = p.parse_args()
+    args.old = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                args.old = json.load(f)
+            args.old["results"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            p.error(f"Can't read '{args.compare}': {e}")
+    return args
+
+
+def metadata():
+    from django import get_version
+    from django.db import connection
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                  text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {"date": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "revision": revision,
+            "python": platform.python_version(), "django": get_version(),
+            "database": connection.vendor}
+
+
+def compare(old, new, key, metric, threshold=1.25):
+    '''
+    Results of new (list of dicts) whose metric is more than threshold
+    times the one of the result of old with the same key (tuple of fields)
+    Returns a list of (key values, old metric, new metric)
+    '''
+    before = {tuple(r.get(k) for k in key): r[metric] for r in old if r.get(metric) is not None}
+    slower = []
+    for r in new:
+        values = tuple(r.get(k) for k in key)
+        if before.get(values) and r.get(metric) is not None and r[metric] > before[values] * threshold:
+            slower.append((values, before[values], r[metric]))
+    return slower
+
+
+def report(name, results, args, key, metric, meta=None):
+    '''
+    Print results (list of dicts) as a table, dump them to JSON (args.json)
+    with the metadata of the run (and meta), compare them with args.old
+    on metric: exits with an error if some got slower
+    '''
+    if results:
+        keys = list(results[0].keys())
+        print(f"# {name}")
+        print("\t".join(keys))
+        for r in results:
+            print("\t".join(f"{r[k]:.6f}" if isinstance(r[k], float) else str(r[k])
+                            for k in keys))
+    if args.json:
+        options = {k: v for k, v in vars(args).items() if k not in ("json", "compare", "old")}
+        data = {"benchmark": name, "meta": {**metadata(), "options": options, **(meta or {})},
+                "results": results}
+        if args.json == "-":
+            json.dump(data, sys.stdout, indent=1)
+        else:
+            with open(args.json, "w") as f:
+                json.dump(data, f, indent=1)
+    if args.old is not None:
+        if args.old.get("benchmark") != name:
+            sys.exit(f"'{args.compare}' holds results of '{args.old.get('benchmark')}', not '{name}'")
+        slower = compare(args.old["results"], results, key, metric, args.threshold)
+        for values, before, after in slower:
+            print(f"slower: {', '.join(f'{k}={v}' for k, v in zip(key, values))}: "
+                  f"{metric} {before:.6f} -> {after:.6f}", file=sys.stderr)
+        if slower:
+            sys.exit(f"{len(slower)} results slower than {args.threshold}x")
@@ -0,0 +1,76 @@
+'''
+Addresses of A and AAAA rr as sortable keys
+
+An address is stored as 33 hexadecimal digits: its family (0 for IPv4,
+1 for IPv6) then its value on 128 bits. Keys compare like the addresses
+they represent (IPv4 addresses before IPv6 ones), on any database and
+collation, so that a network is a range of keys. An IPv4-mapped IPv6
+address does not get the key of the IPv4 address:
+
+    10.1.2.3         -> 00000000000000000000000000a010203
+    ::ffff:10.1.2.3  -> 100000000000000000000ffff0a010203
+    2001:db8::1      -> 120010db8000000000000000000000001
+'''
+import ipaddress
+
+IPV6_FAMILY = 1 << 128
+
+
+def addr_int(ip):
+    '''
+    Value of ip, with its family
+    '''
+    ip = ipaddress.ip_address(ip)
+    if ip.version == 6:
+        return IPV6_FAMILY | int(ip)
+    return int(ip)
+
+
+def int_key(value):
+    return f"{value:033x}"
+
+
+def addr_key(ip):
+    '''
+    Key of ip
+    '''
+    return int_key(addr_int(ip))
+
+
+def key_addr(key, version):
+    '''
+    Address (string) for a key
+    '''
+    value = int(key, 16)
+    if version == 4:
+        return str(ipaddress.IPv4Address(value & 0xffffffff))
+    return str(ipaddress.IPv6Address(value & (IPV6_FAMILY - 1)))
+
+
+def key_ip(key):
+    '''
+    Address (string) for a key, of the family of the key
+    '''
+    return key_addr(key, 6 if int(key, 16) & IPV6_FAMILY else 4)
+
+
+def network_bounds(cidr):
+    '''
+    (first, last) values (with the family) of addresses in cidr
+    Raises ValueError if cidr is not a valid network
+    '''
+    network = ipaddress.ip_network(cidr, strict=False)
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.version == 6:
+        first |= IPV6_FAMILY
+        last |= IPV6_FAMILY
+    return first, last
+
+
+def network_range(cidr):
+    '''
+    (first, last) keys of addresses in cidr
+    '''
+    first, last = network_bounds(cidr)
+    return int_key(first), int_key(last)
@@ -0,0 +1,90 @@
+'''
+Allocation of the lowest free address of a network
+
+Used addresses are the addr keys of A and AAAA rr in the namespace (see
+core.addresses). Each network has an AddressPool row:
+  * locked (select for update) during an allocation, so concurrent
+    allocators in the same network are serialized
+  * holding a hint: all addresses below it are used, so the search for a
+    free address starts there instead of at the start of the network, and
+    allocation time does not grow as the network fills up.
+The hint is lowered when an address is released (rr deleted or changed).
+'''
+import ipaddress
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from core.models import AddressPool, Rr, rr_bulk_deleted, in_bulk_delete
+from core.addresses import network_bounds, int_key, key_addr
+
+
+class NetworkFull(Exception):
+    pass
+
+
+def allocatable_bounds(cidr):
+    '''
+    (network, first, last) values (see core.addresses) of allocatable addresses
+    Network and broadcast addresses of IPv4 networks are not allocatable
+    '''
+    network = ipaddress.ip_network(cidr, strict=False)
+    first, last = network_bounds(cidr)
+    if network.version == 4 and network.prefixlen < 31:
+        first += 1
+        last -= 1
+    return network, first, last
+
+
+def lowest_free(namespace, start, last):
+    '''
+    Lowest address value in [start, last] not used in namespace, or None
+    The used addresses are read in order from the addr index, up to the
+    first gap
+    '''
+    used = (Rr.objects.filter(zone__namespace=namespace,
+                              addr__gte=int_key(start), addr__lte=int_key(last))
+            .order_by('addr').values_list('addr', flat=True))
+    expected = start
+    for key in used.iterator(chunk_size=256):
+        value = int(key, 16)
+        if value > expected:
+            break
+        expected = max(expected, value + 1)
+    return expected if expected <= last else None
+
+
+def allocate_address(namespace, cidr):
+    '''
+    Reserve the lowest free address of network cidr in namespace
+    Must be called in a transaction, the address must be used (rr saved)
+    before it ends. Raises ValueError for an invalid cidr, NetworkFull if
+    there is no free address.
+    '''
+    network, first, last = allocatable_bounds(cidr)
+    pool, created = AddressPool.objects.get_or_create(
+        namespace=namespace, network=str(network),
+        defaults={'first': int_key(first), 'last': int_key(last), 'hint': int_key(first)})
+    pool = AddressPool.objects.select_for_update().get(pk=pool.pk)
+
+    value = lowest_free(namespace, int(pool.hint, 16), last)
+    if value is None:
+        pool.hint = int_key(last)
+        pool.save(update_fields=['hint'])
+        raise NetworkFull(f"No free address in network '{network}'")
+    pool.hint = int_key(min(value + 1, last))
+    pool.save(update_fields=['hint'])
+    return key_addr(int_key(value), network.version)
+
+
+@receiver(post_delete, sender=Rr, dispatch_uid="core.allocator.release")
+def release_rr_address(sender, instance, **kwargs):
+    ''' Receiver for rr delete
+    '''
+    if instance.addr and not in_bulk_delete():
+        AddressPool.release(instance.addr)
+
+
+@receiver(rr_bulk_deleted, sender=Rr, dispatch_uid="core.allocator.release_bulk")
+def release_bulk_addresses(sender, objs, **kwargs):
+    ''' Receiver for rr bulk delete
+    '''
+    AddressPool.release_many(rr.addr for rr in objs if rr.addr)
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Connect signal receivers
+        import core.resolver
+        import core.allocator
+        import core.ptr
+        import core.signals
+        import core.zonecache
+        import core.prefs
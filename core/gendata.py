@@ -0,0 +1,182 @@
+'''
+Synthetic dataset for scale tests and benchmarks
+
+generate() creates, under a name prefix:
+  * namespaces "<prefix>0", "<prefix>1"...
+  * zones "zone0.example.test", "zone1.example.test"... spread over the
+    namespaces
+  * records spread evenly over the zones, with a type mix close to the
+    one of real zones (see TYPE_MIX): hosts with A and AAAA records,
+    aliases (CNAME), mail (MX), TXT, SRV, and the NS of the apex
+  * shared groups "<prefix>-group<i>" and users "<prefix>-user<i>", each
+    one in a few shared groups and with its own default_pref group; all
+    users have the same password
+  * permissions: each zone is readable by its namespace groups
+    (PermNamespace "r"), "rc" for a few groups (PermZone) and each record
+    "rw" for a few groups (PermRr)
+
+Everything is written with bulk inserts, in one transaction per zone.
+Records are inserted with multi-row INSERT statements built here
+(computed columns filled like Rr.save does), which is several times
+faster than building Rr instances for bulk_create; receivers of rr
+changes (serial, PTR) are not called. PermRr are inserted with a single
+INSERT ... SELECT per zone and group.
+
+The dataset only depends on the parameters and the seed: each zone has
+its own random generator, seeded by the seed and the zone number.
+'''
+import ipaddress
+import random
+import time
+from dataclasses import dataclass
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import transaction, connection
+from core.models import Namespace, Zone, Rr, PermNamespace, PermZone, User
+from core.permissions import grant_rr_perm
+from core.names import make_fqdn, reversed_name
+from core.addresses import addr_key
+
+BATCH_SIZE = 5000
+INSERT_ROWS = 1000
+
+# type -> weight, for records other than the NS of the apex
+TYPE_MIX = {"A": 55, "AAAA": 15, "CNAME": 12, "TXT": 8, "MX": 4, "SRV": 4, "NS": 2}
+
+TTLS = [300, 3600, 3600, 3600, 86400]
+
+
+@dataclass
+class GenStats:
+    namespaces: int = 0
+    zones: int = 0
+    records: int = 0
+    groups: int = 0
+    users: int = 0
+    perms: int = 0
+    elapsed: float = 0.0
+
+
+def zone_records(zone, count, rng):
+    '''
+    count records (name, type, ttl, rdata) for zone
+    '''
+    origin = f"{zone.name}."
+    types = list(TYPE_MIX)
+    weights = list(TYPE_MIX.values())
+    hosts = aliases = services = mx = delegations = v6 = 0
+    records = [("@", "NS", 86400, f"ns{i}.{origin}") for i in range(1, min(count, 2) + 1)]
+    for type in rng.choices(types, weights, k=max(count - 2, 0)):
+        ttl = rng.choice(TTLS)
+        if type == "A":
+            name = f"host{hosts}"
+            rdata = f"10.{hosts >> 16 & 255}.{hosts >> 8 & 255}.{hosts & 255}"
+            hosts += 1
+        elif type == "AAAA":
+            name = f"host{v6}"
+            rdata = str(ipaddress.IPv6Address(0x20010db8 << 96 | v6))
+            v6 += 1
+        elif type == "CNAME":
+            name = f"alias{aliases}"
+            rdata = f"host{rng.randrange(hosts or 1)}.{origin}"
+            aliases += 1
+        elif type == "TXT":
+            name = f"host{rng.randrange(hosts or 1)}" if rng.random() < 0.7 else "@"
+            rdata = f"token={rng.getrandbits(64):016x}"
+        elif type == "MX":
+            name = "@"
+            rdata = f"{10 * (mx + 1)} mx{mx}.{origin}"
+            mx += 1
+        elif type == "SRV":
+            name = f"_svc{services}._tcp"
+            rdata = f"0 5 {rng.choice([443, 5060, 5222, 389])} host{rng.randrange(hosts or 1)}.{origin}"
+            services += 1
+        else:
+            name = f"sub{delegations}"
+            rdata = f"ns1.sub{delegations}.{origin}"
+            delegations += 1
+        records.append((name, type, ttl, rdata))
+    return records
+
+
+def insert_records(zone, records):
+    '''
+    Insert records (name, type, ttl, rdata) into zone, by statements of
+    at most INSERT_ROWS rows (less if the backend limits parameters)
+    '''
+    columns = ["name", "type", "ttl", "zone_id", "fqdn", "rname", "addr", "rdata"]
+    batch_size = max(1, min(connection.ops.bulk_batch_size(columns, records), INSERT_ROWS))
+    row = f"({', '.join(['%s'] * len(columns))})"
+    with connection.cursor() as cursor:
+        for i in range(0, len(records), batch_size):
+            params = []
+            batch = records[i:i + batch_size]
+            for name, type, ttl, rdata in batch:
+                fqdn = make_fqdn(name, zone.name)
+                addr = addr_key(rdata) if type in ("A", "AAAA") else None
+                params += [name, type, ttl, zone.id, fqdn, reversed_name(fqdn), addr, rdata]
+            cursor.execute(f"INSERT INTO {Rr._meta.db_table} ({', '.join(columns)}) "
+                           f"VALUES {', '.join([row] * len(batch))}", params)
+
+
+def generate(prefix="gen", namespaces=1, zones=10, records=1000, groups=10, users=10,
+             groups_per_user=2, groups_per_zone=2, grants_per_record=1, seed=0,
+             password="gendata", batch_size=BATCH_SIZE, progress=None):
+    '''
+    Generate a dataset (see module documentation)
+    progress: optional function called with the stats after each zone
+    Returns a GenStats
+    '''
+    stats = GenStats()
+    start = time.perf_counter()
+    rng = random.Random(seed)
+
+    shared = Group.objects.bulk_create([Group(name=f"{prefix}-group{i}") for i in range(groups)])
+    stats.groups = len(shared)
+
+    own = Group.objects.bulk_create([Group(name=f"{prefix}-user{i}") for i in range(users)])
+    hashed = make_password(password)
+    created = User.objects.bulk_create([User(username=f"{prefix}-user{i}", password=hashed,
+                                             default_pref=own[i]) for i in range(users)])
+    members = []
+    for user, group in zip(created, own):
+        members.append(User.groups.through(user_id=user.id, group_id=group.id))
+        for g in rng.sample(shared, min(groups_per_user, len(shared))):
+            members.append(User.groups.through(user_id=user.id, group_id=g.id))
+    User.groups.through.objects.bulk_create(members, batch_size=batch_size)
+    stats.users = len(created)
+
+    spaces = Namespace.objects.bulk_create([Namespace(name=f"{prefix}{k}") for k in range(namespaces)])
+    stats.namespaces = len(spaces)
+    readers = {space.id: set() for space in spaces}
+
+    for j in range(zones):
+        zone_rng = random.Random(f"{seed}-{j}")
+        space = spaces[j % len(spaces)]
+        count = records // zones + (1 if j < records % zones else 0)
+        with transaction.atomic():
+            zone = Zone.objects.create(name=f"zone{j}.example.test", namespace=space,
+                                       nsmaster=f"ns1.zone{j}.example.test.",
+                                       mail=f"hostmaster.zone{j}.example.test.")
+            rows = zone_records(zone, count, zone_rng)
+            insert_records(zone, rows)
+            stats.records += len(rows)
+
+            zone_groups = zone_rng.sample(shared, min(groups_per_zone, len(shared)))
+            PermZone.objects.bulk_create([PermZone(obj=zone, group=g, action="rc") for g in zone_groups])
+            readers[space.id].update(g.id for g in zone_groups)
+            stats.perms += len(zone_groups)
+            for g in zone_rng.sample(shared, min(grants_per_record, len(shared))):
+                stats.perms += grant_rr_perm(g, "rw", zone.rr_set.all())
+        stats.zones += 1
+        if progress:
+            stats.elapsed = time.perf_counter() - start
+            progress(stats)
+
+    namespace_perms = [PermNamespace(obj_id=space_id, group_id=group_id, action="r")
+                       for space_id, group_ids in readers.items() for group_id in sorted(group_ids)]
+    PermNamespace.objects.bulk_create(namespace_perms)
+    stats.perms += len(namespace_perms)
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
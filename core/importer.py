@@ -0,0 +1,263 @@
+'''
+Import of zone files
+
+A zone file is read as a stream of records (name, ttl, type, rdata), see
+core.zonefile. The first record must be the SOA, which gives the zone
+parameters.
+
+Records are converted to Rr (packed rdata, see core.rdata) and written by
+batches with Rr.objects.bulk_create, in a single transaction: a zone is
+imported completely or not at all. The zone keeps the serial of the SOA
+(unless it is not greater than the serial of an existing empty zone, see
+Zone.save).
+Types without rdata fields in Rr (HINFO, SSHFP, ...) are skipped and
+counted.
+
+import_zone_files() imports many zones at once: parsing is done in
+worker processes, writing by a fixed pool of threads.
+'''
+import os
+import re
+import collections
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from django.db import transaction, connection, connections
+from core.models import Zone, Rr
+from core.signals import deferred_serial
+from core.validators import attrchecks
+from core import rdata as rdata_codec
+from core import zonefile
+
+BATCH_SIZE = 5000
+
+# a character string of TXT or CAA rdata: "quoted" or unquoted
+CHARSTRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+ESCAPE_RE = re.compile(r'\\(\d{3}|.)')
+
+
+class ZoneImportError(Exception):
+    pass
+
+
+@dataclass
+class ImportStats:
+    zone: str = ""
+    created: int = 0
+    skipped: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+
+def unescape(text):
+    return ESCAPE_RE.sub(lambda m: chr(int(m.group(1))) if m.group(1).isdigit() else m.group(1), text)
+
+
+def charstrings(text):
+    '''
+    Character strings of rdata text: '"v=spf1 " "-all"' -> ['v=spf1 ', '-all']
+    '''
+    return [unescape(m.group(1) if m.group(1) is not None else m.group(2))
+            for m in CHARSTRING_RE.finditer(text)]
+
+
+def pack(type, text):
+    '''
+    Packed rdata (core.rdata) from master file rdata text
+    Returns None if type is not supported or text is invalid for type
+    '''
+    fields = attrchecks.get(type)
+    if not fields:
+        return None
+    if type == "TXT":
+        return "".join(charstrings(text))
+    if type == "CAA":
+        parts = text.split(None, 2)
+        if len(parts) != 3:
+            return None
+        return rdata_codec.encode(type, {"caa_flag": parts[0], "caa_tag": parts[1],
+                                         "caa_value": "".join(charstrings(parts[2]))})
+    parts = text.split()
+    if len(parts) != len(fields):
+        return None
+    return " ".join(parts)
+
+
+def soa_params(text):
+    '''
+    Zone fields from SOA rdata text
+    '''
+    parts = text.split()
+    if len(parts) != 7:
+        raise ZoneImportError(f"Invalid SOA '{text}'")
+    mname, rname, *numbers = parts
+    try:
+        serial, refresh, retry, expire, minttl = (int(n) for n in numbers)
+    except ValueError:
+        raise ZoneImportError(f"Invalid SOA '{text}'")
+    return {"nsmaster": mname, "mail": rname, "serial": serial, "refresh": refresh,
+            "retry": retry, "expire": expire, "minttl": minttl}
+
+
+def import_records(namespace, zone_name, records, batch_size=BATCH_SIZE, progress=None):
+    '''
+    Import records into zone zone_name of namespace, created if it does
+    not exist; an existing zone must be empty
+    progress: optional function called with the stats after each batch
+    Returns an ImportStats
+    '''
+    stats = ImportStats(zone=zone_name)
+    start = time.perf_counter()
+    records = iter(records)
+    first = next(records, None)
+    if first is None or first[2] != "SOA":
+        raise ZoneImportError(f"Zone '{zone_name}': first record must be the SOA")
+    params = soa_params(first[3])
+
+    # the zone gets the serial of the file: rr creations do not increment it
+    with transaction.atomic(), deferred_serial(increment=False):
+        zone, created = Zone.objects.get_or_create(name=zone_name, namespace=namespace,
+                                                   defaults=params)
+        if not created:
+            if zone.rr_set.exists():
+                raise ZoneImportError(f"Zone '{zone_name}' is not empty")
+            for attr, value in params.items():
+                setattr(zone, attr, value)
+            zone.save()
+
+        batch = []
+        for name, ttl, type, text in records:
+            rdata = pack(type, text)
+            if rdata is None:
+                stats.skipped[type] = stats.skipped.get(type, 0) + 1
+                continue
+            batch.append(Rr(name=name, ttl=ttl, type=type, rdata=rdata, zone=zone))
+            if len(batch) >= batch_size:
+                Rr.objects.bulk_create(batch)
+                stats.created += len(batch)
+                batch = []
+                if progress:
+                    stats.elapsed = time.perf_counter() - start
+                    progress(stats)
+        Rr.objects.bulk_create(batch)
+        stats.created += len(batch)
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+class ZoneWriter(threading.Thread):
+    '''
+    Writer of the pool of import_zone_files: takes zones from the zones
+    queue, has each one parsed by a worker process and writes its records
+    as they arrive, with its own database connection (one per writer,
+    whatever the number of zones) and a transaction per zone
+    '''
+    def __init__(self, namespace, zones, pool, routes, batch_size, results):
+        super().__init__(name="zone import writer")
+        self.namespace = namespace
+        self.zones = zones
+        self.pool = pool
+        self.routes = routes
+        self.batch_size = batch_size
+        self.results = results
+        # a few batches: parse workers wait when the writer is behind
+        self.queue = queue.Queue(4)
+        self.finished = False
+
+    def records(self, future):
+        while True:
+            try:
+                kind, payload = self.queue.get(timeout=1)
+            except queue.Empty:
+                # the worker died without sending END or ERROR
+                if future.done() and future.exception():
+                    self.finished = True
+                    raise ZoneImportError(str(future.exception()))
+                continue
+            if kind == zonefile.END:
+                self.finished = True
+                return
+            if kind == zonefile.ERROR:
+                self.finished = True
+                raise ZoneImportError(payload)
+            yield from payload
+
+    def import_zone(self, zone, path):
+        self.finished = False
+        # messages of the zone are routed to this writer from now on
+        self.routes[zone] = self.queue
+        future = self.pool.submit(zonefile.parse_worker, zone, path, self.batch_size)
+        try:
+            self.results[zone] = import_records(self.namespace, zone, self.records(future),
+                                                batch_size=self.batch_size)
+        except Exception as e:
+            self.results[zone] = e
+            # consume the remaining messages of the zone
+            while not self.finished:
+                try:
+                    for _ in self.records(future):
+                        pass
+                except ZoneImportError:
+                    pass
+        finally:
+            del self.routes[zone]
+
+    def run(self):
+        try:
+            while True:
+                item = self.zones.get()
+                if item is None:
+                    return
+                self.import_zone(*item)
+        finally:
+            connection.close()
+
+
+def import_zone_files(namespace, zones, jobs=None, batch_size=BATCH_SIZE):
+    '''
+    Import zone files in parallel: a pool of jobs writer threads (default:
+    number of cpus) take the zones from a bounded queue; each zone is
+    parsed by one of jobs worker processes, and its records written by
+    its writer in its own transaction. At most jobs database connections
+    are open, whatever the number of zones.
+    zones: list of (zone name, path)
+    Returns dict zone name -> ImportStats, or the exception which
+    aborted the import of this zone
+    SQLite allows a single writer: zones are then imported one at a time
+    '''
+    jobs = 1 if connection.vendor == "sqlite" else jobs or os.cpu_count()
+    results = {}
+    # zone name -> queue of its writer
+    routes = {}
+    # zones, then a None for each writer to stop
+    pending = collections.deque([*zones, *[None] * jobs])
+    todo = queue.Queue(jobs)
+    messages = multiprocessing.Queue(4 * jobs)
+    # worker processes must not inherit open database connections
+    connections.close_all()
+    with ProcessPoolExecutor(jobs, initializer=zonefile.init_worker,
+                             initargs=(messages,)) as pool:
+        writers = [ZoneWriter(namespace, todo, pool, routes, batch_size, results)
+                   for _ in range(jobs)]
+        for writer in writers:
+            writer.start()
+        while any(writer.is_alive() for writer in writers):
+            while pending:
+                try:
+                    todo.put_nowait(pending[0])
+                except queue.Full:
+                    break
+                pending.popleft()
+            try:
+                zone, kind, payload = messages.get(timeout=1)
+            except queue.Empty:
+                continue
+            routes[zone].put((kind, payload))
+    return results
@@ -0,0 +1,38 @@
+'''
+Replace the rr permissions of groups holding the same action on every rr
+of a zone by a zone level rr permission (PermZoneRr)
+
+    python manage.py collapsepermrr [--namespace N] [--zone Z] [--dry-run]
+
+A PermZoneRr also grants its action on the rr created later in the zone:
+each one is reported, run with --dry-run first to review them.
+'''
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Zone
+from core.permissions import collapse_rr_perms
+
+
+class Command(BaseCommand):
+    help = "Replace the PermRr of groups holding the same action on every rr of a zone by a PermZoneRr"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', help="zone name")
+        parser.add_argument('--namespace', help="namespace name")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="report changes without applying them")
+
+    def handle(self, *args, **options):
+        zones = Zone.objects.all()
+        if options['namespace']:
+            zones = zones.filter(namespace__name=options['namespace'])
+        if options['zone']:
+            zones = zones.filter(name=options['zone'])
+        if (options['namespace'] or options['zone']) and not zones.exists():
+            raise CommandError("No zone found")
+        collapsed = collapse_rr_perms(zones, dry_run=options['dry_run'])
+        verb = "would get" if options['dry_run'] else "gets"
+        for zone, group, action, count in collapsed:
+            self.stdout.write(f"zone '{zone.name}' ({zone.namespace_id}): group '{group.name}' {verb} "
+                              f"'{action}' on every rr, including future ones ({count} PermRr)")
+        self.stdout.write(f"{'would create' if options['dry_run'] else 'created'} "
+                          f"{len(collapsed)} PermZoneRr")
@@ -0,0 +1,65 @@
+'''
+Generate a synthetic dataset (see core/gendata.py)
+
+    python manage.py gendata [--prefix gen] [--namespaces N] [--zones N] [--records N]
+                             [--groups N] [--users N] [--groups-per-user N]
+                             [--groups-per-zone N] [--grants-per-record N] [--seed N]
+
+Big datasets are generated faster with DNSAPP_AUTO_PTR off.
+'''
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import Group
+from core.models import Namespace
+from core.gendata import generate, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Generate namespaces, zones, records, groups, users and permissions for scale tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default="gen",
+                            help="prefix of namespace, group and user names")
+        parser.add_argument('--namespaces', type=int, default=1)
+        parser.add_argument('--zones', type=int, default=10)
+        parser.add_argument('--records', type=int, default=1000, help="records, for all zones")
+        parser.add_argument('--groups', type=int, default=10, help="shared groups")
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--groups-per-user', type=int, default=2)
+        parser.add_argument('--groups-per-zone', type=int, default=2,
+                            help="groups with PermZone 'rc' on each zone")
+        parser.add_argument('--grants-per-record', type=int, default=1,
+                            help="groups with PermRr 'rw' on each record")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default="gendata", help="password of the users")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['namespaces'] < 1 or options['zones'] < 1:
+            raise CommandError("At least one namespace and one zone are needed")
+        if (Namespace.objects.filter(name__startswith=prefix).exists()
+                or Group.objects.filter(name__startswith=f"{prefix}-").exists()):
+            raise CommandError(f"Data with prefix '{prefix}' already exists (use --prefix)")
+
+        verbose = options['verbosity'] > 1
+        last = [time.monotonic()]
+
+        def progress(stats):
+            now = time.monotonic()
+            if verbose and now - last[0] >= 1:
+                last[0] = now
+                self.stdout.write(f"{stats.zones} zones, {stats.records} records, "
+                                  f"{stats.records / stats.elapsed:.0f} records/s")
+
+        stats = generate(prefix=prefix, namespaces=options['namespaces'], zones=options['zones'],
+                         records=options['records'], groups=options['groups'],
+                         users=options['users'], groups_per_user=options['groups_per_user'],
+                         groups_per_zone=options['groups_per_zone'],
+                         grants_per_record=options['grants_per_record'], seed=options['seed'],
+                         password=options['password'], batch_size=options['batch_size'],
+                         progress=progress)
+        self.stdout.write(f"{stats.namespaces} namespaces, {stats.zones} zones, "
+                          f"{stats.records} records, {stats.groups} groups, {stats.users} users, "
+                          f"{stats.perms} permissions in {stats.elapsed:.1f}s "
+                          f"({stats.records / stats.elapsed:.0f} records/s)")
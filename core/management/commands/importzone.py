@@ -0,0 +1,44 @@
+'''
+Import a zone file
+
+    python manage.py importzone <namespace> <zone name> <zone file> [--batch-size N]
+'''
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Namespace
+from core.zonefile import read_zone_file, ZoneFileError
+from core.importer import import_records, ZoneImportError, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Import a zone file into a new (or empty) zone"
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespace', help="namespace name")
+        parser.add_argument('zone', help="zone name (origin of the zone file)")
+        parser.add_argument('file', help="zone file (master file format)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"records per insert (default {BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        try:
+            namespace = Namespace.objects.get(name=options['namespace'])
+        except Namespace.DoesNotExist:
+            raise CommandError(f"Namespace '{options['namespace']}' does not exist")
+
+        progress = None
+        if options['verbosity'] > 1:
+            progress = lambda stats: self.stdout.write(
+                f"{stats.created} rr ({stats.rate:.0f} rr/s)")
+
+        zone = options['zone'].rstrip('.')
+        try:
+            records = read_zone_file(options['file'], zone)
+            stats = import_records(namespace, zone, records,
+                                   batch_size=options['batch_size'], progress=progress)
+        except (OSError, ZoneFileError, ZoneImportError) as e:
+            raise CommandError(f"{options['file']}: {e}")
+
+        self.stdout.write(f"zone {stats.zone}: {stats.created} rr imported "
+                          f"in {stats.elapsed:.2f}s ({stats.rate:.0f} rr/s)")
+        for type, count in sorted(stats.skipped.items()):
+            self.stdout.write(f"  skipped {count} {type} (unsupported type)")
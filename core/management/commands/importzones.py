@@ -0,0 +1,87 @@
+'''
+Import zone files in parallel
+
+    python manage.py importzones <namespace> --directory <dir> [--jobs N]
+        one zone per file, zone name is the file name
+    python manage.py importzones <namespace> --manifest <file> [--jobs N]
+        one zone per line: "<zone name> <zone file>" (relative paths are
+        relative to the manifest directory, # starts a comment)
+'''
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Namespace
+from core.importer import import_zone_files, BATCH_SIZE
+
+
+def read_manifest(path):
+    base = os.path.dirname(path)
+    zones = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) != 2:
+                raise CommandError(f"{path}:{number}: expected '<zone name> <zone file>'")
+            zones.append((parts[0].rstrip('.'), os.path.join(base, parts[1])))
+    return zones
+
+
+def read_directory(path):
+    return [(name.rstrip('.'), os.path.join(path, name))
+            for name in sorted(os.listdir(path))
+            if not name.startswith('.') and os.path.isfile(os.path.join(path, name))]
+
+
+class Command(BaseCommand):
+    help = "Import zone files of a directory or a manifest, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespace', help="namespace name")
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--directory', help="directory of zone files")
+        source.add_argument('--manifest', help="file listing zones and zone files")
+        parser.add_argument('--jobs', type=int, default=None,
+                            help="parse processes (default: number of cpus)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"records per insert (default {BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        try:
+            namespace = Namespace.objects.get(name=options['namespace'])
+        except Namespace.DoesNotExist:
+            raise CommandError(f"Namespace '{options['namespace']}' does not exist")
+        try:
+            if options['directory']:
+                zones = read_directory(options['directory'])
+            else:
+                zones = read_manifest(options['manifest'])
+        except OSError as e:
+            raise CommandError(str(e))
+        names = [zone for zone, _ in zones]
+        if len(set(names)) != len(names):
+            raise CommandError("A zone is listed more than once")
+
+        start = time.perf_counter()
+        results = import_zone_files(namespace, zones, jobs=options['jobs'],
+                                    batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+
+        created = 0
+        failed = []
+        for zone, _ in zones:
+            result = results[zone]
+            if isinstance(result, Exception):
+                failed.append(zone)
+                self.stderr.write(f"zone {zone}: failed: {result}")
+                continue
+            created += result.created
+            skipped = ", ".join(f"{count} {type}" for type, count in sorted(result.skipped.items()))
+            self.stdout.write(f"zone {zone}: {result.created} rr imported"
+                              + (f" (skipped {skipped})" if skipped else ""))
+        self.stdout.write(f"{len(zones) - len(failed)} zones, {created} rr imported "
+                          f"in {elapsed:.2f}s ({created / elapsed if elapsed else 0:.0f} rr/s)")
+        if failed:
+            raise CommandError(f"{len(failed)} zones failed: {', '.join(failed)}")
@@ -0,0 +1,62 @@
+'''
+Grant or revoke a permission of a group on many rr at once
+
+    python manage.py permrr grant <group> <action> [--namespace N --zone Z] [--name REGEXP] [--type T]
+    python manage.py permrr revoke <group> [--namespace N --zone Z] [--name REGEXP] [--type T]
+
+revoke removes the rr permissions (PermRr) only: a zone permission
+(PermZoneRr) of the group still granting an action on the rr is reported
+'''
+import re
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Zone, PERMACTION
+from core.permissions import filter_rrs, grant_rr_perm, revoke_rr_perm, inherited_rr_perms
+
+
+class Command(BaseCommand):
+    help = "Grant or revoke a permission of a group on all rr matching a filter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('operation', choices=['grant', 'revoke'])
+        parser.add_argument('group', help="group name")
+        parser.add_argument('action', nargs='?', choices=[a for a, _ in PERMACTION],
+                            help="permission to grant")
+        parser.add_argument('--zone', help="zone name")
+        parser.add_argument('--namespace', help="namespace of the zone")
+        parser.add_argument('--name', help="regexp matched against rr names")
+        parser.add_argument('--type', help="rr type")
+
+    def handle(self, *args, **options):
+        try:
+            group = Group.objects.get(name=options['group'])
+        except Group.DoesNotExist:
+            raise CommandError(f"Group '{options['group']}' does not exist")
+        zone = None
+        if options['zone']:
+            zones = Zone.objects.filter(name=options['zone'])
+            if options['namespace']:
+                zones = zones.filter(namespace__name=options['namespace'])
+            zones = list(zones)
+            if len(zones) != 1:
+                raise CommandError(f"Zone '{options['zone']}': {len(zones)} zones found "
+                                   "(use --namespace)")
+            zone = zones[0]
+        if options['name']:
+            try:
+                re.compile(options['name'])
+            except re.error as e:
+                raise CommandError(f"Invalid name regexp: {e}")
+        rrs = filter_rrs(zone, options['name'], options['type'])
+
+        if options['operation'] == 'grant':
+            if not options['action']:
+                raise CommandError("Action to grant is missing")
+            count = grant_rr_perm(group, options['action'], rrs)
+            self.stdout.write(f"{count} permissions granted or changed")
+        else:
+            count = revoke_rr_perm(group, rrs)
+            self.stdout.write(f"{count} permissions revoked")
+            for perm in inherited_rr_perms(group, rrs):
+                self.stdout.write(f"Group '{group.name}' still has '{perm.action}' on every rr "
+                                  f"of zone {perm.obj.name} (zone permission)")
@@ -0,0 +1,42 @@
+'''
+Worst endpoints of a query log (see core/querybudget.py)
+
+    python manage.py querystats [--log FILE] [--sort queries|db_ms|rows|total_ms] [--top N]
+'''
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.querybudget import read_log, summarize, query_budget
+
+SORT_KEYS = ["queries", "db_ms", "rows", "total_ms"]
+
+
+class Command(BaseCommand):
+    help = "Summarize queries, database time and rows of the logged requests by endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help="query log (default: DNSAPP_QUERY_LOG)")
+        parser.add_argument('--sort', choices=SORT_KEYS, default="queries",
+                            help="sort endpoints by the maximum of this counter")
+        parser.add_argument('--top', type=int, default=20, help="number of endpoints shown")
+
+    def handle(self, *args, **options):
+        path = options['log'] or getattr(settings, 'DNSAPP_QUERY_LOG', None)
+        if not path:
+            raise CommandError("No query log: set DNSAPP_QUERY_LOG or use --log")
+        try:
+            stats = summarize(read_log(path))
+        except OSError as e:
+            raise CommandError(f"Can't read '{path}': {e}")
+
+        key = f"max_{options['sort']}"
+        stats.sort(key=lambda s: s[key], reverse=True)
+        self.stdout.write(f"{'endpoint':<40} {'requests':>8} {'queries':>13} "
+                          f"{'db ms':>17} {'rows':>13} {'total ms':>17}  budget")
+        for s in stats[:options['top']]:
+            budget = query_budget(s['view'])
+            flag = " !" if s['max_queries'] > budget else ""
+            self.stdout.write(f"{s['method'] + ' ' + s['view']:<40} {s['requests']:>8} "
+                              f"{s['mean_queries']:>6.1f}/{s['max_queries']:<6} "
+                              f"{s['mean_db_ms']:>8.1f}/{s['max_db_ms']:<8.1f} "
+                              f"{s['mean_rows']:>6.0f}/{s['max_rows']:<6} "
+                              f"{s['mean_total_ms']:>8.1f}/{s['max_total_ms']:<8.1f}  {budget}{flag}")
@@ -0,0 +1,30 @@
+'''
+Create missing and remove stale PTR records of a namespace
+
+    python manage.py reconcileptr <namespace> [--dry-run]
+'''
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Namespace
+from core.ptr import reconcile_ptrs
+
+
+class Command(BaseCommand):
+    help = "Make PTR records of a namespace match its A and AAAA records"
+
+    def add_arguments(self, parser):
+        parser.add_argument('namespace', help="namespace name")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="report changes without applying them")
+
+    def handle(self, *args, **options):
+        try:
+            namespace = Namespace.objects.get(name=options['namespace'])
+        except Namespace.DoesNotExist:
+            raise CommandError(f"Namespace '{options['namespace']}' does not exist")
+        missing, stale = reconcile_ptrs(namespace, dry_run=options['dry_run'])
+        if options['verbosity'] > 1:
+            for ptr in missing:
+                self.stdout.write(f"+ {ptr.name} PTR {ptr.ptr}")
+        verb = "would create" if options['dry_run'] else "created"
+        self.stdout.write(f"{verb} {len(missing)} PTR, "
+                          f"{'would remove' if options['dry_run'] else 'removed'} {len(stale)} PTR")
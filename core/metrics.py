@@ -0,0 +1,149 @@
+'''
+Prometheus metrics, exported on /metrics
+
+    dnsapp_request_duration_seconds{view, method}        histogram
+    dnsapp_request_queries{view, method}                 histogram (SQL queries per request)
+    dnsapp_permission_check_duration_seconds{check}      histogram
+    dnsapp_permission_checks_total{check, result}        counter (result: allowed, denied)
+    dnsapp_validation_duration_seconds{serializer}       histogram
+    dnsapp_cache_requests_total{cache, result}           counter (result: hit, miss)
+
+view is the dotted path of the view ("core.views.RrDetail"), check the
+name of a PermCheck/RrPermCheck method ("PermCheck.can_get").
+
+Collectors live in the process. With several worker processes, each one
+only sees its own requests: set the environment variable
+PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers (emptied
+when the server starts), so that /metrics aggregates the metrics of all
+of them. With gunicorn, the child_exit server hook must call
+prometheus_client.multiprocess.mark_process_dead(worker.pid).
+
+Metrics are not collected when settings.DNSAPP_METRICS is False, and
+/metrics is then not found (404). /metrics is served to the clients whose
+address (REMOTE_ADDR: behind a reverse proxy, the address of the proxy)
+is in one of the networks of settings.DNSAPP_METRICS_ALLOWED_IPS, and to
+authenticated superusers; others get a 403.
+'''
+import functools
+import ipaddress
+import os
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.http import HttpResponse, Http404
+from prometheus_client import (Counter, Histogram, CollectorRegistry, REGISTRY,
+                               generate_latest, CONTENT_TYPE_LATEST)
+from prometheus_client import multiprocess
+
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 30, 50, 100, 200, 500)
+CHECK_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25)
+
+REQUEST_DURATION = Histogram('dnsapp_request_duration_seconds', "Request latency",
+                             ['view', 'method'])
+REQUEST_QUERIES = Histogram('dnsapp_request_queries', "SQL queries per request",
+                            ['view', 'method'], buckets=QUERY_BUCKETS)
+CHECK_DURATION = Histogram('dnsapp_permission_check_duration_seconds', "Permission check latency",
+                           ['check'], buckets=CHECK_BUCKETS)
+CHECKS = Counter('dnsapp_permission_checks', "Permission checks", ['check', 'result'])
+VALIDATION_DURATION = Histogram('dnsapp_validation_duration_seconds', "Serializer validation latency",
+                                ['serializer'], buckets=CHECK_BUCKETS)
+CACHE_REQUESTS = Counter('dnsapp_cache_requests', "Cache lookups", ['cache', 'result'])
+
+
+def enabled():
+    return getattr(settings, 'DNSAPP_METRICS', True)
+
+
+def observe_check(check):
+    '''
+    Decorator of permission check functions: latency and result
+    '''
+    @functools.wraps(check)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return check(*args, **kwargs)
+        start = time.perf_counter()
+        result = check(*args, **kwargs)
+        name = check.__qualname__
+        CHECK_DURATION.labels(name).observe(time.perf_counter() - start)
+        CHECKS.labels(name, "allowed" if result else "denied").inc()
+        return result
+    return wrapper
+
+
+class TimedValidationMixin():
+    '''
+    Serializer mixin: latency of is_valid()
+    '''
+    def is_valid(self, *args, **kwargs):
+        if not enabled():
+            return super().is_valid(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().is_valid(*args, **kwargs)
+        finally:
+            VALIDATION_DURATION.labels(type(self).__name__).observe(time.perf_counter() - start)
+
+
+def cache_lookup(cache, hit):
+    '''
+    Count a hit or a miss of cache (name of a cache of the application:
+    "zone", "resolver", "prefs")
+    '''
+    if enabled():
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware():
+    '''
+    Latency and SQL queries (counted by core.querybudget, which must
+    come after this middleware) of each request
+    '''
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match._func_path if match else "none"
+        REQUEST_DURATION.labels(view, request.method).observe(time.perf_counter() - start)
+        counter = getattr(request, 'query_counter', None)
+        if counter is not None:
+            REQUEST_QUERIES.labels(view, request.method).observe(counter.queries)
+        return response
+
+
+def allowed(request):
+    '''
+    True if the client of request may read the metrics: address in
+    DNSAPP_METRICS_ALLOWED_IPS, or superuser
+    '''
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        address = None
+    networks = getattr(settings, 'DNSAPP_METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if address is not None and any(address in ipaddress.ip_network(network, strict=False)
+                                   for network in networks):
+        return True
+    return request.user.is_superuser
+
+
+def metrics_view(request):
+    '''
+    Metrics in the Prometheus text format, aggregated over the worker
+    processes in multiprocess mode
+    '''
+    if not enabled():
+        raise Http404
+    if not allowed(request):
+        raise PermissionDenied
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
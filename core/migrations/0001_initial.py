@@ -1,9 +1,11 @@
-# Generated by Django 3.0.6 on 2020-11-06 14:07
+# Generated by Django 5.2.18 on 2026-10-19 11:16
 
 import core.validators
+import django.contrib.auth.validators
 import django.core.validators
-from django.db import migrations, models
 import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
 
 
 class Migration(migrations.Migration):
@@ -11,7 +13,7 @@ class Migration(migrations.Migration):
     initial = True
 
     dependencies = [
-        ('auth', '0011_update_proxy_permissions'),
+        ('auth', '0012_alter_user_first_name_max_length'),
     ]
 
     operations = [
@@ -29,7 +31,7 @@ class Migration(migrations.Migration):
             name='Zone',
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.TextField(validators=[core.validators.ZoneNameValidator()])),
+                ('name', models.TextField(validators=[core.validators.NamespaceNameValidator()])),
                 ('nsmaster', models.TextField(validators=[core.validators.ValidateRrName])),
                 ('mail', models.TextField(validators=[core.validators.ValidateRrName])),
                 ('serial', models.PositiveIntegerField(default=1)),
@@ -37,16 +39,41 @@ class Migration(migrations.Migration):
                 ('retry', models.PositiveIntegerField(default=180)),
                 ('expire', models.PositiveIntegerField(default=1209600)),
                 ('minttl', models.PositiveIntegerField(default=3600)),
-                ('namespace', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.Namespace')),
+                ('namespace', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.namespace')),
             ],
             options={
                 'default_permissions': (),
+                'unique_together': {('name', 'namespace')},
+            },
+        ),
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('default_pref', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='auth.group')),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
             },
         ),
         migrations.CreateModel(
             name='Zonerule',
             fields=[
-                ('zone', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.Zone')),
+                ('zone', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.zone')),
                 ('namepat', models.TextField(blank=True, null=True, validators=[django.core.validators.MaxLengthValidator(1024)])),
                 ('typepat', models.TextField(blank=True, null=True, validators=[django.core.validators.MaxLengthValidator(1024)])),
             ],
@@ -74,65 +101,46 @@ class Migration(migrations.Migration):
                 ('caa_tag', models.TextField(blank=True, null=True, validators=[django.core.validators.MaxLengthValidator(253)])),
                 ('caa_value', models.TextField(blank=True, null=True, validators=[django.core.validators.MaxLengthValidator(253)])),
                 ('dname', models.TextField(blank=True, null=True, validators=[core.validators.ZoneNameValidator()])),
-                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.Zone')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.zone')),
             ],
             options={
                 'default_permissions': (),
             },
         ),
         migrations.CreateModel(
-            name='PermZone',
+            name='PermNamespace',
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('action', models.TextField(choices=[('AccessZone', 'AccessZone'), ('CreateRrInZone', 'CreateRrInZone')])),
-                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.Group')),
-                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Zone')),
+                ('action', models.TextField(choices=[('r', 'Read-Only'), ('rw', 'Read-Write'), ('rwc', 'Read-Write and Create Records'), ('rc', 'Read and Create Records')])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.namespace')),
             ],
+            options={
+                'unique_together': {('obj', 'group')},
+            },
         ),
         migrations.CreateModel(
             name='PermRr',
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('action', models.TextField(choices=[('AccessRr', 'AccessRr'), ('DeleteRr', 'DeleteRr')])),
-                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.Group')),
-                ('rr', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Rr')),
+                ('action', models.TextField(choices=[('r', 'Read-Only'), ('rw', 'Read-Write'), ('rwc', 'Read-Write and Create Records'), ('rc', 'Read and Create Records')])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.rr')),
             ],
+            options={
+                'unique_together': {('obj', 'group')},
+            },
         ),
         migrations.CreateModel(
-            name='PermNamespace',
+            name='PermZone',
             fields=[
                 ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('action', models.TextField(choices=[('AccessNamespace', 'AccessNamespace'), ('CreateZoneInNamespace', 'CreateZoneInNamespace')])),
-                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.Group')),
-                ('namespace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Namespace')),
+                ('action', models.TextField(choices=[('r', 'Read-Only'), ('rw', 'Read-Write'), ('rwc', 'Read-Write and Create Records'), ('rc', 'Read and Create Records')])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.zone')),
             ],
-        ),
-        migrations.AddConstraint(
-            model_name='namespace',
-            constraint=models.CheckConstraint(check=models.Q(name__regex='^[-0-9a-z.]+$'), name='namespace_name_must_contain_only_letters_numbers_or_dots'),
-        ),
-        migrations.AddConstraint(
-            model_name='zone',
-            constraint=models.CheckConstraint(check=models.Q(name__regex='^[-0-9a-z.]+$'), name='zone_name_must_contain_only_letters_numbers_or_dots'),
-        ),
-        migrations.AlterUniqueTogether(
-            name='zone',
-            unique_together={('name', 'namespace')},
-        ),
-        migrations.AddConstraint(
-            model_name='rr',
-            constraint=models.CheckConstraint(check=models.Q(name__regex='^([-0-9a-zA-Z._*]+|@)$'), name='record_name_must_contain_only_letters_numbers_star_or_dots'),
-        ),
-        migrations.AlterUniqueTogether(
-            name='permzone',
-            unique_together={('zone', 'group', 'action')},
-        ),
-        migrations.AlterUniqueTogether(
-            name='permrr',
-            unique_together={('rr', 'group', 'action')},
-        ),
-        migrations.AlterUniqueTogether(
-            name='permnamespace',
-            unique_together={('namespace', 'group', 'action')},
+            options={
+                'unique_together': {('obj', 'group')},
+            },
         ),
     ]
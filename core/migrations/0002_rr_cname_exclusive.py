@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+from django.db import migrations, models
+import core.triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='rr',
+            constraint=models.UniqueConstraint(condition=models.Q(('type', 'CNAME')), fields=('zone', 'name'), name='rr_single_cname_per_name'),
+        ),
+        migrations.RunPython(core.triggers.create_name_triggers, core.triggers.drop_triggers),
+    ]
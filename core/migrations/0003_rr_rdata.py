@@ -0,0 +1,123 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+from django.db import migrations, models
+import core.rdata
+import core.triggers
+
+
+def pack_rdata(apps, schema_editor):
+    '''
+    Pack type specific columns into rdata
+    '''
+    Rr = apps.get_model('core', 'Rr')
+    batch = []
+    for rr in Rr.objects.iterator(chunk_size=5000):
+        values = {f: getattr(rr, f) for f in core.rdata.RDATA_FIELDS}
+        rr.rdata = core.rdata.encode(rr.type, values)
+        batch.append(rr)
+        if len(batch) == 5000:
+            Rr.objects.bulk_update(batch, ['rdata'])
+            batch = []
+    Rr.objects.bulk_update(batch, ['rdata'])
+
+
+def unpack_rdata(apps, schema_editor):
+    '''
+    Unpack rdata into type specific columns
+    '''
+    Rr = apps.get_model('core', 'Rr')
+    batch = []
+    for rr in Rr.objects.iterator(chunk_size=5000):
+        for f, v in core.rdata.decode(rr.type, rr.rdata).items():
+            setattr(rr, f, v)
+        batch.append(rr)
+        if len(batch) == 5000:
+            Rr.objects.bulk_update(batch, core.rdata.RDATA_FIELDS)
+            batch = []
+    Rr.objects.bulk_update(batch, core.rdata.RDATA_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_rr_cname_exclusive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rr',
+            name='rdata',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_rdata, unpack_rdata),
+        migrations.RemoveField(
+            model_name='rr',
+            name='a',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='aaaa',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='caa_flag',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='caa_tag',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='caa_value',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='cname',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='dname',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='mx',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='ns',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='prio',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='ptr',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='srv_port',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='srv_priority',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='srv_target',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='srv_weight',
+        ),
+        migrations.RemoveField(
+            model_name='rr',
+            name='txt',
+        ),
+        migrations.AddIndex(
+            model_name='rr',
+            index=models.Index(fields=['zone', 'name'], name='rr_zone_name'),
+        ),
+        # SQLite rebuilds core_rr when removing columns
+        migrations.RunPython(core.triggers.create_name_triggers, migrations.RunPython.noop),
+    ]
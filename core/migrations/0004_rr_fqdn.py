@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:23
+
+from django.db import migrations, models
+import core.names
+
+
+def set_names(apps, schema_editor):
+    '''
+    Compute fqdn and rname of existing rr
+    '''
+    Rr = apps.get_model('core', 'Rr')
+    Zone = apps.get_model('core', 'Zone')
+    zone_names = dict(Zone.objects.values_list('id', 'name'))
+    batch = []
+    for rr in Rr.objects.only('id', 'name', 'zone_id').iterator(chunk_size=5000):
+        rr.fqdn = core.names.make_fqdn(rr.name, zone_names[rr.zone_id])
+        rr.rname = core.names.reversed_name(rr.fqdn)
+        batch.append(rr)
+        if len(batch) == 5000:
+            Rr.objects.bulk_update(batch, ['fqdn', 'rname'])
+            batch = []
+    Rr.objects.bulk_update(batch, ['fqdn', 'rname'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rr_rdata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rr',
+            name='fqdn',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rr',
+            name='rname',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(set_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rr',
+            index=models.Index(fields=['fqdn', 'type'], name='rr_fqdn_type'),
+        ),
+        migrations.AddIndex(
+            model_name='rr',
+            index=models.Index(fields=['rname'], name='rr_rname'),
+        ),
+    ]
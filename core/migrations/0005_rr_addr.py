@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:26
+
+from django.db import migrations, models
+import core.addresses
+
+
+def set_addr(apps, schema_editor):
+    '''
+    Compute addr of existing A and AAAA rr (rdata is the address)
+    '''
+    Rr = apps.get_model('core', 'Rr')
+    batch = []
+    for rr in Rr.objects.filter(type__in=('A', 'AAAA')).only('id', 'rdata').iterator(chunk_size=5000):
+        rr.addr = core.addresses.addr_key(rr.rdata)
+        batch.append(rr)
+        if len(batch) == 5000:
+            Rr.objects.bulk_update(batch, ['addr'])
+            batch = []
+    Rr.objects.bulk_update(batch, ['addr'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rr_fqdn'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rr',
+            name='addr',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(set_addr, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rr',
+            index=models.Index(fields=['addr'], name='rr_addr'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_rr_addr'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AddressPool',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('network', models.TextField()),
+                ('first', models.TextField()),
+                ('last', models.TextField()),
+                ('hint', models.TextField()),
+                ('namespace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.namespace')),
+            ],
+            options={
+                'default_permissions': (),
+                'unique_together': {('namespace', 'network')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH = 5000
+
+
+def expand_permzonerr(apps, schema_editor):
+    '''
+    Backward: each PermZoneRr becomes PermRr on the rr of its zone
+    (forward changes no permission: replacing PermRr by a PermZoneRr grants
+    rights on future rr, it is left to the "collapsepermrr" command)
+    '''
+    Rr = apps.get_model('core', 'Rr')
+    PermRr = apps.get_model('core', 'PermRr')
+    PermZoneRr = apps.get_model('core', 'PermZoneRr')
+    for perm in PermZoneRr.objects.all():
+        ids = Rr.objects.filter(zone_id=perm.obj_id).values_list('id', flat=True)
+        PermRr.objects.bulk_create([PermRr(obj_id=id, group_id=perm.group_id, action=perm.action)
+                                    for id in ids.iterator()],
+                                   batch_size=BATCH, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_addresspool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermZoneRr',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.TextField(choices=[('r', 'Read-Only'), ('rw', 'Read-Write'), ('rwc', 'Read-Write and Create Records'), ('rc', 'Read and Create Records')])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.zone')),
+            ],
+            options={
+                'unique_together': {('obj', 'group')},
+            },
+        ),
+        migrations.RunPython(migrations.RunPython.noop, expand_permzonerr),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_permzonerr'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pref',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.TextField(choices=[('r', 'Read-Only'), ('rw', 'Read-Write'), ('rwc', 'Read-Write and Create Records'), ('rc', 'Read and Create Records')])),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.zone')),
+            ],
+            options={
+                'unique_together': {('user', 'zone', 'group')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:33
+
+from django.db import migrations, models
+import core.triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_pref'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='rr',
+            name='rr_single_cname_per_name',
+        ),
+        migrations.AddConstraint(
+            model_name='rr',
+            constraint=models.UniqueConstraint(condition=models.Q(('type', 'CNAME')), fields=('zone', 'fqdn'), name='rr_single_cname_per_fqdn'),
+        ),
+        # triggers compare fqdn instead of name
+        migrations.RunPython(core.triggers.create_triggers, core.triggers.create_name_triggers),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:38
+
+import core.models
+import core.triggers
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_rr_cname_fqdn'),
+    ]
+
+    # On SQLite, the table is rebuilt: triggers are created again after
+    # the change (and after its reversal)
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, core.triggers.create_triggers),
+        migrations.AlterField(
+            model_name='rr',
+            name='rname',
+            field=core.models.BytewiseTextField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(core.triggers.create_triggers, migrations.RunPython.noop),
+    ]
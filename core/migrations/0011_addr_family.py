@@ -0,0 +1,60 @@
+from django.db import migrations
+
+IPV4_MAPPED = 0xffff << 32
+IPV6_FAMILY = 1 << 128
+
+
+def mapped_to_family(key, version):
+    '''
+    Key of 32 digits (IPv4 mapped to ::ffff:0:0/96) -> key of 33 digits
+    (family, then value)
+    '''
+    value = int(key, 16)
+    value = value & 0xffffffff if version == 4 else value | IPV6_FAMILY
+    return f"{value:033x}"
+
+
+def family_to_mapped(key, version):
+    value = int(key, 16)
+    value = value | IPV4_MAPPED if version == 4 else value & (IPV6_FAMILY - 1)
+    return f"{value:032x}"
+
+
+def convert(apps, function):
+    Rr = apps.get_model('core', 'Rr')
+    AddressPool = apps.get_model('core', 'AddressPool')
+    batch = []
+    for rr in Rr.objects.filter(addr__isnull=False).only('id', 'type', 'addr').iterator(chunk_size=5000):
+        rr.addr = function(rr.addr, 4 if rr.type == 'A' else 6)
+        batch.append(rr)
+        if len(batch) == 5000:
+            Rr.objects.bulk_update(batch, ['addr'])
+            batch = []
+    Rr.objects.bulk_update(batch, ['addr'])
+    pools = list(AddressPool.objects.all())
+    for pool in pools:
+        version = 6 if ':' in pool.network else 4
+        pool.first, pool.last, pool.hint = (function(key, version) for key in (pool.first, pool.last, pool.hint))
+    AddressPool.objects.bulk_update(pools, ['first', 'last', 'hint'])
+
+
+def forward(apps, schema_editor):
+    '''
+    Keys of addresses get a family digit (see core.addresses)
+    '''
+    convert(apps, mapped_to_family)
+
+
+def backward(apps, schema_editor):
+    convert(apps, family_to_mapped)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_rr_rname_collation'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
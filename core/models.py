@@ -1,13 +1,35 @@
 import re
-from django.db import models
-from django.db.models import CheckConstraint, Q, F
+import threading
+from bisect import bisect_left
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.db.models import CheckConstraint, Q, F, Value, Case, When
+from django.db.models.deletion import Collector
 from django.core.validators import MaxLengthValidator
 from django.contrib.auth.models import (Group, AbstractUser, BaseUserManager)
 from core.validators import (NamespaceNameValidator, ZoneNameValidator,
                              ValidateRrName)
+from core import rdata as rdata_codec
+from core.names import make_fqdn, reversed_name
+from core.addresses import addr_key
+from core.triggers import CNAME_CONSTRAINT
 
 nameformat = '^[-0-9a-z.]+$'
 
+
+class BytewiseTextField(models.TextField):
+    '''
+    TextField compared bytewise: collation "C" on PostgreSQL (the
+    default collation follows the database locale); SQLite compares
+    text bytewise and has no "C" collation
+    '''
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == 'postgresql':
+            params['collation'] = 'C'
+        return params
+
+
 RECORDTYPES = [
     ("SOA", "SOA"),
     ("NS", "NS"),
@@ -65,13 +87,109 @@ class Zone(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        existing = self.pk is not None
+        renamed = (existing and
+                   Zone.objects.filter(pk=self.pk).exclude(name=self.name).exists())
+        if existing:
+            # an explicit serial greater than the current one is kept as
+            # is, otherwise the serial is incremented: it never goes
+            # backwards, even when saved from a stale instance (rendered
+            # zones are cached by serial, see core.zonecache)
+            self.serial = Case(When(serial__lt=Value(self.serial), then=Value(self.serial)),
+                               default=F('serial') + 1)
+        super().save(*args, **kwargs)
+        if existing:
+            self.refresh_from_db(fields=['serial'])
+        if renamed:
+            self.update_rr_names()
+
+    def update_rr_names(self):
+        '''
+        Recompute fqdn and rname of all rr in this zone
+        '''
+        zone_names = {self.id: self.name}
+        rrs = list(self.rr_set.only('id', 'name', 'zone_id'))
+        for rr in rrs:
+            rr.set_names(zone_names)
+        Rr.objects.bulk_update(rrs, ['fqdn', 'rname'], batch_size=5000)
+
     class Meta:
         default_permissions = ()
         unique_together = ('name', 'namespace', )
 
-#    def save():
-#        self.serial++
-#        self.super.save()
+def rdata_property(field):
+    '''
+    Attribute of Rr for a field of the packed rdata column
+    '''
+    def fget(self):
+        pending = self.__dict__.get("_rdata_pending")
+        if pending and field in pending:
+            return pending[field]
+        return rdata_codec.decode(self.type, self.rdata).get(field)
+
+    def fset(self, value):
+        self.__dict__.setdefault("_rdata_pending", {})[field] = value
+        self.pack_rdata()
+
+    return property(fget, fset)
+
+# Sent after Rr.objects.bulk_create (which sends no post_save), with the
+# list of created rr as "objs"
+rr_bulk_created = Signal()
+
+# Sent after Rr.objects.bulk_delete, with the list of deleted rr (zone_id,
+# fqdn and addr loaded) as "objs"; post_delete receivers of rr
+# and of their PermRr do nothing during a bulk delete (see in_bulk_delete)
+rr_bulk_deleted = Signal()
+
+_bulk = threading.local()
+
+def in_bulk_delete():
+    return getattr(_bulk, "deleting", False)
+
+class RrQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        '''
+        bulk_create does not call save(): pack rdata, compute names and
+        address here
+        '''
+        objs = list(objs)
+        zone_names = {}
+        for rr in objs:
+            rr.pack_rdata()
+            rr.set_names(zone_names)
+            rr.set_addr()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        rr_bulk_created.send(sender=Rr, objs=objs)
+        return objs
+
+    def bulk_delete(self, ids, batch_size=500):
+        '''
+        Delete the rr of ids (in this queryset) with a number of queries
+        which does not depend on the number of rr: receivers of
+        rr_bulk_deleted do the work of post_delete receivers once for all rr
+        Returns the deleted rr
+        '''
+        ids = list(ids)
+        objs = []
+        previous = in_bulk_delete()
+        _bulk.deleting = True
+        try:
+            for i in range(0, len(ids), batch_size):
+                batch = list(self.filter(id__in=ids[i:i + batch_size])
+                             .only('id', 'zone_id', 'fqdn', 'addr'))
+                # collect the loaded rr (and their PermRr) instead of
+                # loading them again like QuerySet.delete
+                collector = Collector(using=self.db)
+                collector.collect(batch)
+                collector.delete()
+                objs.extend(batch)
+        finally:
+            _bulk.deleting = previous
+        if objs:
+            rr_bulk_deleted.send(sender=Rr, objs=objs)
+        return objs
 
 class Rr(models.Model):
     name = models.TextField(validators=[ValidateRrName], blank=False)
@@ -80,40 +198,103 @@ class Rr(models.Model):
     ttl = models.PositiveIntegerField(default=3600, blank=False)
     zone = models.ForeignKey(Zone, on_delete=models.PROTECT, blank=False)
 
+    # Computed from name and zone name (see set_names)
+    # fqdn: "www.example.com." ; rname: "com.example.www"
+    fqdn = models.TextField(blank=True, null=True, editable=False)
+    # Subtree queries are ranges on rname ('.' < '/', see core.names)
+    rname = BytewiseTextField(blank=True, null=True, editable=False)
+    # Address of A and AAAA rr, as a sortable key (see core.addresses)
+    addr = models.TextField(blank=True, null=True, editable=False)
+
+    # Type specific data, packed in a single column by core.rdata
+    # (example for MX: "10 mail.example.com.")
+    rdata = models.TextField(blank=True, null=True)
+
+    # Fields of rdata, as attributes (Rr(type="MX", prio=10, mx=...) or
+    # rr.mx = ...); validation is done by RrSerializer
     # A
-    a = models.GenericIPAddressField(protocol="IPv4", blank=True, null=True)
+    a = rdata_property("a")
     # AAAA
-    aaaa = models.GenericIPAddressField(protocol="IPv6", blank=True, null=True)
+    aaaa = rdata_property("aaaa")
     # CNAME
-    cname = models.TextField(validators=[ValidateRrName], blank=True,
-                             null=True)
+    cname = rdata_property("cname")
     # NS
-    ns = models.TextField(validators=[ValidateRrName], blank=True, null=True)
+    ns = rdata_property("ns")
     # MX
-    prio = models.PositiveIntegerField(blank=True, null=True)
-    mx = models.TextField(validators=[ValidateRrName], blank=True, null=True)
+    prio = rdata_property("prio")
+    mx = rdata_property("mx")
     # PTR
-    ptr = models.TextField(validators=[ValidateRrName], blank=True, null=True)
-    # TXT;
-    # FIXME: valider la longueur maximale
-    txt = models.TextField(validators=[MaxLengthValidator(65535)], blank=True,
-                           null=True)
+    ptr = rdata_property("ptr")
+    # TXT
+    txt = rdata_property("txt")
     # SRV
-    srv_priority = models.PositiveIntegerField(blank=True, null=True)
-    srv_weight = models.PositiveIntegerField(blank=True, null=True)
-    srv_port = models.PositiveIntegerField(blank=True, null=True)
-    srv_target = models.TextField(validators=[ValidateRrName], blank=True,
-                                  null=True)
-    # CAA ;
-    # FIXME: add CHOICE to caa_tag (issue, issuewild, iodef, contactemail)
-    caa_flag = models.PositiveIntegerField(blank=True, null=True)
-    caa_tag = models.TextField(validators=[MaxLengthValidator(253)],
-                               blank=True, null=True)
-    caa_value = models.TextField(validators=[MaxLengthValidator(253)],
-                                 blank=True, null=True)
+    srv_priority = rdata_property("srv_priority")
+    srv_weight = rdata_property("srv_weight")
+    srv_port = rdata_property("srv_port")
+    srv_target = rdata_property("srv_target")
+    # CAA
+    caa_flag = rdata_property("caa_flag")
+    caa_tag = rdata_property("caa_tag")
+    caa_value = rdata_property("caa_value")
     # DNAME
-    dname = models.TextField(validators=[ZoneNameValidator()], blank=True,
-                             null=True)
+    dname = rdata_property("dname")
+
+    objects = RrQuerySet.as_manager()
+
+    def pack_rdata(self):
+        '''
+        Pack rdata fields set as attributes into the rdata column, as soon
+        as all fields for the type are known
+        '''
+        pending = self.__dict__.get("_rdata_pending")
+        if not pending:
+            return
+        values = {**rdata_codec.decode(self.type, self.rdata), **pending}
+        packed = rdata_codec.encode(self.type, values)
+        if packed is not None:
+            self.rdata = packed
+            del self.__dict__["_rdata_pending"]
+
+    def set_names(self, zone_names=None):
+        '''
+        Compute fqdn and rname
+        zone_names: optional cache zone id -> zone name, for bulk paths
+        '''
+        if zone_names is None:
+            zone_name = self.zone.name
+        else:
+            zone_name = zone_names.get(self.zone_id)
+            if zone_name is None:
+                zone_name = zone_names[self.zone_id] = self.zone.name
+        self.fqdn = make_fqdn(self.name, zone_name)
+        self.rname = reversed_name(self.fqdn)
+
+    def set_addr(self):
+        '''
+        Compute addr from rdata
+        '''
+        ip = self.a if self.type == "A" else self.aaaa if self.type == "AAAA" else None
+        self.addr = addr_key(ip) if ip else None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # zone as loaded, the zone_id attribute may be changed before save
+        instance._saved_zone_id = instance.__dict__.get("zone_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.pack_rdata()
+        # (fqdn, addr) and zone before this save, for post_save receivers
+        self.previous = (self.__dict__.get("fqdn"), self.__dict__.get("addr"))
+        self.previous_zone_id = self.__dict__.get("_saved_zone_id")
+        self.set_names()
+        self.set_addr()
+        super().save(*args, **kwargs)
+        self._saved_zone_id = self.zone_id
+        previous_addr = self.previous[1]
+        if previous_addr and previous_addr != self.addr:
+            AddressPool.release(previous_addr)
 
 #    def save():
 #        self.super.save()
@@ -124,6 +305,23 @@ class Rr(models.Model):
 
     class Meta:
         default_permissions = ()
+        # CNAME exclusivity: at most one CNAME for a given name (fqdn, as
+        # names may be relative or absolute) in a zone. Coexistence of a
+        # CNAME with other types is enforced by a trigger (see core.triggers)
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'fqdn'],
+                                    condition=Q(type='CNAME'),
+                                    name=CNAME_CONSTRAINT),
+        ]
+        # Lookup by name in a zone (CNAME trigger, RRset of a name),
+        # by fqdn, by subtree (range of rname, see core.names) and by
+        # address or network (range of addr, see core.addresses)
+        indexes = [
+            models.Index(fields=['zone', 'name'], name='rr_zone_name'),
+            models.Index(fields=['fqdn', 'type'], name='rr_fqdn_type'),
+            models.Index(fields=['rname'], name='rr_rname'),
+            models.Index(fields=['addr'], name='rr_addr'),
+        ]
 
 # Rule to add a record to a zone
 # * namepat is the regexp checked for allowed Rr names
@@ -151,6 +349,58 @@ class Zonerule(models.Model):
         m2 = re.match(self.typepat, type)
         return ((m1 is not None) and (m2 is not None))
 
+# Allocation state of a network, for the next free address allocator
+# (see core.allocator)
+# * first, last: keys of the first and last allocatable addresses
+# * hint: key of the lowest address that may be free; every address
+#   between first and hint is used
+# The row is locked during an allocation in this network
+
+
+class AddressPool(models.Model):
+    namespace = models.ForeignKey(Namespace, on_delete=models.CASCADE,
+                                  blank=False)
+    network = models.TextField(blank=False)
+    first = models.TextField(blank=False)
+    last = models.TextField(blank=False)
+    hint = models.TextField(blank=False)
+
+    class Meta:
+        default_permissions = ()
+        unique_together = ('namespace', 'network')
+
+    def __str__(self):
+        return self.network
+
+    @classmethod
+    def release(cls, key):
+        '''
+        Address key is no longer used: lower hint of pools containing it
+        '''
+        cls.objects.filter(first__lte=key, last__gte=key,
+                           hint__gt=key).update(hint=key)
+
+    @classmethod
+    def release_many(cls, keys):
+        '''
+        Address keys are no longer used: like release, for all keys with
+        one query to read the pools and one to update them
+        '''
+        keys = sorted(set(keys))
+        if not keys:
+            return
+        with transaction.atomic(savepoint=False):
+            pools = list(cls.objects.select_for_update()
+                         .filter(first__lte=keys[-1], last__gte=keys[0], hint__gt=keys[0]))
+            changed = []
+            for pool in pools:
+                # lowest released key of the pool
+                i = bisect_left(keys, pool.first)
+                if i < len(keys) and keys[i] <= pool.last and keys[i] < pool.hint:
+                    pool.hint = keys[i]
+                    changed.append(pool)
+            cls.objects.bulk_update(changed, ['hint'])
+
 # Generic permission model
 
 
@@ -211,3 +461,35 @@ class PermRr(Perm):
         unique_together = ('obj', 'group')
     def __str__(self):
         return f"perm rr='{self.obj.name}', group='{self.group.name}' action='self.group.action'"
+
+# Permission table for all Resource Records of a Zone
+# Semantic: same flags as PermRr, inherited by every Rr of the zone
+# (existing and future ones), so that no PermRr row is needed for them.
+# The rights of a group on a Rr are the union of its PermRr and its
+# PermZoneRr on the zone of the Rr (see core.permissions.rr_perm_filter)
+
+
+class PermZoneRr(Perm):
+    obj = models.ForeignKey(Zone, on_delete=models.CASCADE, blank=False)
+
+    class Meta:
+        unique_together = ('obj', 'group')
+    def __str__(self):
+        return f"perm rr of zone='{self.obj.name}', group='{self.group.name}' action='{self.action}'"
+
+# Preference of a user for the Rr created by this user in a Zone
+# Semantic: a Rr created by user in zone gets a PermRr(rr, group, action)
+# for each Pref of (user, zone), instead of PermRr(rr, user.default_pref, "rw")
+# Prefs are resolved through an in-process cache (see core.prefs)
+
+
+class Pref(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=False)
+    zone = models.ForeignKey(Zone, on_delete=models.CASCADE, blank=False)
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, blank=False)
+    action = models.TextField(choices=PERMACTION, blank=False)
+
+    class Meta:
+        unique_together = ('user', 'zone', 'group')
+    def __str__(self):
+        return f"pref user='{self.user.username}', zone='{self.zone.name}', group='{self.group.name}' action='{self.action}'"
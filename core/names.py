@@ -0,0 +1,46 @@
+'''
+Name helpers
+
+Rr.name is relative to its zone ("www", "@") or absolute
+("www.example.com."). Zone.name has no trailing dot ("example.com").
+'''
+
+
+def make_fqdn(name, zone_name):
+    '''
+    Absolute, lowercase name (with trailing dot) of a rr
+        make_fqdn("www", "example.com")  -> "www.example.com."
+        make_fqdn("@", "example.com")    -> "example.com."
+        make_fqdn("www.example.com.", _) -> "www.example.com."
+    '''
+    name = name.lower()
+    if name.endswith("."):
+        return name
+    if name == "@":
+        return f"{zone_name.lower()}."
+    return f"{name}.{zone_name.lower()}."
+
+
+def normalize_fqdn(fqdn):
+    '''
+    Lowercase fqdn with trailing dot, for names given by clients
+    '''
+    fqdn = fqdn.lower()
+    return fqdn if fqdn.endswith(".") else f"{fqdn}."
+
+
+def reversed_name(fqdn):
+    '''
+    Key with labels in reverse order, so that all names under a given
+    name share a prefix: "www.lab.example.com." -> "com.example.lab.www"
+    '''
+    return ".".join(reversed(fqdn.rstrip(".").split(".")))
+
+
+def subtree_range(fqdn):
+    '''
+    Bounds of the reversed keys strictly below fqdn: keys k such that
+    low <= k < high ('/' is the character following '.')
+    '''
+    key = reversed_name(fqdn)
+    return f"{key}.", f"{key}/"
@@ -1,9 +1,48 @@
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Value, BooleanField
+from django.contrib.auth.models import Group
 from rest_framework import status
 from rest_framework import permissions
-from core.models import Rr, Zone, Zonerule, Namespace, PermRr, PermNamespace, PermZone
+from core.models import (Rr, Zone, Zonerule, Namespace, PermRr, PermNamespace, PermZone,
+                         PermZoneRr)
 from core.serializers import RrSerializer, ZoneSerializer
+from core.zonecache import increment_perm_version
+from core.prefs import resolve_prefs
+from core.metrics import observe_check
 from rest_framework.exceptions import ValidationError
 
+def rr_perm_filter(user, action):
+    '''
+    Condition on Rr: user has one of the flags of action on the rr,
+    through a PermRr of the rr or a PermZoneRr of its zone (both are
+    indexed lookups on (obj, group))
+    '''
+    groups = user.groups.all()
+    rr_perms = PermRr.objects.filter(obj=OuterRef('pk'), group__in=groups,
+                                     action__regex=f"[{action}]")
+    zone_perms = PermZoneRr.objects.filter(obj=OuterRef('zone_id'), group__in=groups,
+                                           action__regex=f"[{action}]")
+    return Exists(rr_perms) | Exists(zone_perms)
+
+def with_perms(queryset, user, permobj, flags):
+    '''
+    queryset annotated with the flags of user on each object: perm_r,
+    perm_w... (one Exists subquery per flag), so that an object and the
+    permissions of user on it are fetched by a single SELECT
+    '''
+    if user.is_superuser:
+        return queryset.annotate(**{f"perm_{flag}": Value(True, output_field=BooleanField())
+                                    for flag in flags})
+    annotations = {}
+    for flag in flags:
+        if permobj is PermRr:
+            annotations[f"perm_{flag}"] = rr_perm_filter(user, flag)
+        else:
+            annotations[f"perm_{flag}"] = Exists(permobj.objects.filter(obj=OuterRef('pk'),
+                                                 group__in=user.groups.all(),
+                                                 action__icontains=flag))
+    return queryset.annotate(**annotations)
+
 def check_permission(user, obj, permobj, action):
     '''
     Generic function to check ONE permission flag for an object and for a user
@@ -11,6 +50,10 @@ def check_permission(user, obj, permobj, action):
     if user.is_superuser:
         return True
 
+    # Rr: inherited permissions of the zone count too
+    if permobj is PermRr:
+        return Rr.objects.filter(pk=obj.pk).filter(rr_perm_filter(user, action)).exists()
+
 ## DEBUG
 #    print("obj")
 #    print(obj)
@@ -58,19 +101,135 @@ def set_perm(user, obj, permobj, action):
     '''
     # 1) Pref(user, zone, group, action)
     # on cree un RR -> cherche la preference pour (user,zone)
-    #               -> exemple : on a trouvé Pref(group="gr1",action="update")
-    #                                        Pref(group="gr1",action="delete")
-    #               -> on cree 2 objets PermRR(rr_créé, "gr1","update") , PermRR(rr_créé, "gr1","delete") 
+    #               -> exemple : on a trouvé Pref(group="gr1",action="rw")
+    #                                        Pref(group="gr2",action="r")
+    #               -> on cree 2 objets PermRR(rr_créé, "gr1","rw") , PermRR(rr_créé, "gr2","r")
     # 2) if no pref defined, use default_pref from user model
+    if permobj is PermRr:
+        for group_id, pref_action in rr_perm_targets(user, obj.zone_id, action):
+            PermRr.objects.create(obj = obj, group_id = group_id, action = pref_action)
+        return
+
+    permobj.objects.create(obj = obj, group = user.default_pref, action = action)
+
+def set_perms(user, zone_id, rrs, action, batch_size=None):
+    '''
+        set_perm for many rr of the same zone: the targets are resolved once
+    '''
+    if not rrs:
+        return
+    targets = rr_perm_targets(user, zone_id, action)
+    PermRr.objects.bulk_create([PermRr(obj = rr, group_id = group_id, action = pref_action)
+                                for group_id, pref_action in targets for rr in rrs],
+                               batch_size=batch_size)
+
+def rr_perm_targets(user, zone_id, action):
+    '''
+        (group id, action) of the PermRr to create for a rr created by user
+        in zone: Pref of (user, zone), or (default_pref, action); the groups
+        which already hold the action on the zone (PermZoneRr) are skipped
+    '''
+    targets = resolve_prefs(user, zone_id) or ((user.default_pref_id, action),)
+    inherited = dict(PermZoneRr.objects.filter(obj_id=zone_id, group_id__in=[g for g, a in targets])
+                     .values_list('group_id', 'action'))
+    return [(g, a) for g, a in targets if not set(a) <= set(inherited.get(g, ""))]
 
-    # FIXME: test if Pref exist for user/zone
-    #
-    # if ... pref ... :
-    #   pref = ....
-    # else:
-    pref = user.default_pref
+def filter_rrs(zone=None, name=None, type=None):
+    '''
+        Rr of zone (optional) with a name matching regexp name (optional)
+        and of type (optional), for bulk permission changes
+    '''
+    rrs = Rr.objects.all()
+    if zone is not None:
+        rrs = rrs.filter(zone=zone)
+    if name:
+        rrs = rrs.filter(name__regex=name)
+    if type:
+        rrs = rrs.filter(type=type.upper())
+    return rrs
+
+def _rr_ids_sql(rrs):
+    return rrs.values('id').query.get_compiler(connection=connection).as_sql()
+
+def _perm_changed(rrs):
+    # cached zone listings of restricted users depend on rr permissions
+    for zone_id in rrs.values_list('zone_id', flat=True).distinct():
+        increment_perm_version(zone_id)
+
+def grant_rr_perm(group, action, rrs):
+    '''
+        Set permission action for group on every rr of queryset rrs, with a
+        single INSERT ... SELECT; an existing permission of the group on a
+        rr is replaced
+        Returns the number of permissions created or changed
+    '''
+    sql, params = _rr_ids_sql(rrs)
+    table = PermRr._meta.db_table
+    with connection.cursor() as cursor:
+        # "WHERE true": SQLite needs it to parse ON CONFLICT after a SELECT
+        cursor.execute(f"""
+            INSERT INTO {table} (obj_id, group_id, action)
+            SELECT rr.id, %s, %s FROM ({sql}) rr WHERE true
+            ON CONFLICT (obj_id, group_id) DO UPDATE SET action = excluded.action
+            WHERE {table}.action <> excluded.action
+            """, [group.id, action, *params])
+        count = cursor.rowcount
+    _perm_changed(rrs)
+    return count
+
+def revoke_rr_perm(group, rrs):
+    '''
+        Remove permissions of group on every rr of queryset rrs, with a
+        single DELETE
+        NB: only PermRr are removed; a PermZoneRr of group on the zone of a
+        rr still grants its action on every rr of the zone (and rr created
+        by group may have no PermRr, see rr_perm_targets): the caller
+        reports them with inherited_rr_perms
+        Returns the number of permissions removed
+    '''
+    sql, params = _rr_ids_sql(rrs)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PermRr._meta.db_table} WHERE group_id = %s AND obj_id IN ({sql})",
+                       [group.id, *params])
+        count = cursor.rowcount
+    _perm_changed(rrs)
+    return count
+
+def inherited_rr_perms(group, rrs):
+    '''
+        PermZoneRr of group on the zones of the rr of queryset rrs: the
+        permissions of group on these rr which revoke_rr_perm can not remove
+    '''
+    return list(PermZoneRr.objects.filter(group=group, obj__in=rrs.values('zone_id'))
+                .select_related('obj').order_by('obj__name'))
 
-    permobj.objects.create(obj = obj, group = pref, action = action)
+def collapse_rr_perms(zones, dry_run=False):
+    '''
+        Replace the PermRr of a group holding the same action on every rr of
+        a zone (of queryset zones) by a PermZoneRr; groups which already
+        have a PermZoneRr on the zone are left alone
+        NB: the PermZoneRr also grants action on every rr created later in
+        the zone, so it widens the rights of the group
+        Returns (zone, group, action, number of PermRr replaced) of each
+        PermZoneRr created (to create with dry_run)
+    '''
+    sizes = dict(Rr.objects.filter(zone__in=zones).values_list('zone_id')
+                 .annotate(Count('id')).order_by())
+    grants = (PermRr.objects.filter(obj__zone__in=zones)
+              .exclude(group__permzonerr__obj=F('obj__zone'))
+              .values_list('obj__zone_id', 'group_id', 'action')
+              .annotate(count=Count('id')).order_by('obj__zone_id', 'group_id'))
+    grants = [grant for grant in grants if grant[3] == sizes.get(grant[0])]
+    zone_objs = Zone.objects.in_bulk({zone_id for zone_id, _, _, _ in grants})
+    groups = Group.objects.in_bulk({group_id for _, group_id, _, _ in grants})
+    collapsed = [(zone_objs[zone_id], groups[group_id], action, count)
+                 for zone_id, group_id, action, count in grants]
+    if not dry_run:
+        with transaction.atomic():
+            for zone, group, action, count in collapsed:
+                PermZoneRr.objects.create(obj=zone, group=group, action=action)
+                revoke_rr_perm(group, zone.rr_set.all())
+    return collapsed
 
 def get_allowed_namespaces(user, action):
     '''
@@ -96,13 +255,13 @@ def get_allowed_rrs(user, action):
     '''
     if user.is_superuser:
         return Rr.objects.all()
-    perms =  get_perms(user, Rr, PermRr, action)
-    return Rr.objects.filter(permrr__in = perms)
+    return Rr.objects.filter(rr_perm_filter(user, action))
 
 class PermCheck():
     '''
         generic methods to check permission
     '''
+    @observe_check
     def can_get(user, obj, permobj):
         r = check_permission(user, obj, permobj, "r")
 ## DEBUG
@@ -111,16 +270,19 @@ class PermCheck():
 
         return r
 
+    @observe_check
     def can_update(user, obj, permobj):
         if user.is_superuser:
             return True
         return check_permission(user, obj, permobj, "w")
 
+    @observe_check
     def can_delete(user, obj, permobj):
         if user.is_superuser:
             return True
         return check_permission(user, obj, permobj, "w")
 
+    @observe_check
     def can_create_record(user, obj, permobj):
         if user.is_superuser:
             return True
@@ -128,6 +290,7 @@ class PermCheck():
         permissions = permobj.objects.filter(obj=obj).filter(action__icontains="c").all()
         return permissions.filter(group__in = groups).exists()
 
+    @observe_check
     def can_generate(user, obj, permobj):
         if user.is_superuser:
             return True
@@ -138,17 +301,21 @@ class PermCheck():
 
 class NamespacePermCheck(PermCheck):
 
+    @observe_check
     def can_delete(user):
         return user.is_superuser
 
+    @observe_check
     def can_update(user):
         return user.is_superuser
 
+    @observe_check
     def can_create(user):
         return user.is_superuser
 
 class RrPermCheck():
 
+    @observe_check
     def can_create_when_name_exist(user, name, type):
         """
         Check if all Rr with same name and same type
@@ -167,17 +334,20 @@ class RrPermCheck():
         #print(f"DEBUG can_create_when_name_exist, name={name}")
         #import ipdb; ipdb.set_trace()
 
-        groups = user.groups.all()
-        for rr in Rr.objects.filter(name=name, type=type):
-            if not PermRr.objects.filter(group__in = groups).filter(obj=rr,action__icontains="w").exists():
-                return False
-        return True
+        return not Rr.objects.filter(name=name, type=type).exclude(rr_perm_filter(user, "w")).exists()
 
-    def can_create_by_rule(user, name, zone, type):
+    @observe_check
+    def can_create_by_rule(user, name, zone, type, rules=None):
+        """
+        rules: Zonerule of zone, if already loaded (bulk paths: one query
+        for all the names checked)
+        """
         if user.is_superuser:
             return True
 
-        for rule in Zonerule.objects.filter(zone=zone):
+        if rules is None:
+            rules = Zonerule.objects.filter(zone=zone)
+        for rule in rules:
             if not rule.is_checked(name, type):
                 return False
         # No rule defined for this zone: permission granted
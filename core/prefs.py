@@ -0,0 +1,109 @@
+'''
+Resolution of the permission preferences (Pref) of a user
+
+set_perm looks up the Pref of (user, zone) for each rr it creates. To
+keep this lookup off the database, the prefs of a user are loaded at
+once, on first use, and kept in memory:
+
+    user id -> {zone id: ((group id, action), ...)}
+
+so that a request creating rr in several zones costs one query, and the
+following requests of the same user none. Only the prefs of the
+settings.DNSAPP_PREFS_CACHE_SIZE most recently seen users are kept.
+
+The cache is invalidated when a Pref is saved or deleted. Other
+processes (workers) see the invalidation through a version number kept
+in the django cache, like core.resolver: with several workers, the
+cache backend must be shared (see CACHES in dnsapp/settings.py). As a
+change not seen here would grant rights to the wrong groups, the prefs
+of a user are also reloaded after settings.DNSAPP_PREFS_CACHE_TIMEOUT
+seconds whatever the version.
+'''
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models import Pref
+from core.metrics import cache_lookup
+
+VERSION_KEY = "core.prefs.version"
+
+_lock = threading.Lock()
+_prefs = OrderedDict()
+_version = None
+
+
+def cache_size():
+    return getattr(settings, "DNSAPP_PREFS_CACHE_SIZE", 1000)
+
+
+def cache_timeout():
+    return getattr(settings, "DNSAPP_PREFS_CACHE_TIMEOUT", 60)
+
+
+def user_prefs(user_id):
+    '''
+    Prefs of user, by zone id
+    '''
+    global _version
+    version = cache.get(VERSION_KEY)
+    now = time.monotonic()
+    with _lock:
+        if version != _version:
+            _prefs.clear()
+            _version = version
+        loaded, prefs = _prefs.get(user_id, (None, None))
+        if prefs is not None and now - loaded > cache_timeout():
+            del _prefs[user_id]
+            prefs = None
+        if prefs is not None:
+            _prefs.move_to_end(user_id)
+    cache_lookup("prefs", prefs is not None)
+    if prefs is not None:
+        return prefs
+
+    prefs = {}
+    for zone_id, group_id, action in (Pref.objects.filter(user_id=user_id)
+                                      .values_list('zone_id', 'group_id', 'action')):
+        prefs.setdefault(zone_id, []).append((group_id, action))
+    prefs = {zone_id: tuple(targets) for zone_id, targets in prefs.items()}
+    with _lock:
+        # not kept if a Pref changed while loading
+        if version == _version:
+            _prefs[user_id] = (now, prefs)
+            while len(_prefs) > cache_size():
+                _prefs.popitem(last=False)
+    return prefs
+
+
+def resolve_prefs(user, zone_id):
+    '''
+    (group id, action) of the Pref of user for zone; empty if none
+    '''
+    return user_prefs(user.id).get(zone_id, ())
+
+
+def invalidate():
+    global _version
+    with _lock:
+        _prefs.clear()
+        _version = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # key does not exist (yet, or evicted)
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+@receiver([post_save, post_delete], sender=Pref, dispatch_uid="core.prefs.invalidate")
+def invalidate_prefs(sender, instance, **kwargs):
+    ''' Receiver for pref creation, modification or delete
+        invalidate now for the current transaction, and again on commit
+        in case another request loaded the prefs in between
+    '''
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -0,0 +1,167 @@
+'''
+Opt-in profiling of live requests
+
+When settings.DNSAPP_PROFILER is True, ProfilerMiddleware runs under
+cProfile:
+  * a random fraction DNSAPP_PROFILER_RATE (0 to 1) of all requests
+  * the requests of superusers sending the header "X-Profile: 1"
+When it is False (the default), django does not load the middleware at
+all, so that requests pay nothing.
+
+Profiles are aggregated by view (dotted path, "core.views.RrDetail") in
+each process, and saved after each profiled request in
+DNSAPP_PROFILER_DIR/<view>/<pid>.prof, so that the profiles of all the
+worker processes can be merged. They are listed and downloaded as
+pstats files (python -m pstats, snakeviz, flameprof...) through
+/profile/ (see core.views.ProfileList and ProfileDetail).
+'''
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+HEADER = "HTTP_X_PROFILE"
+
+# dotted path of a view: no empty label, so never "." or ".."
+VIEW_RE = re.compile(r"^\w+(\.\w+)*$")
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def profile_dir():
+    return (getattr(settings, 'DNSAPP_PROFILER_DIR', None)
+            or os.path.join(tempfile.gettempdir(), "dnsapp-profiles"))
+
+
+def view_dir(view):
+    '''
+    Directory of the profiles of view, inside profile_dir()
+    Raises KeyError if view is not a dotted path
+    '''
+    if not VIEW_RE.fullmatch(view):
+        raise KeyError(view)
+    root = os.path.realpath(profile_dir())
+    path = os.path.realpath(os.path.join(root, view))
+    if os.path.dirname(path) != root:
+        raise KeyError(view)
+    return path
+
+
+def profile_files(path):
+    '''
+    Profiles (.prof files) of the view directory path
+    '''
+    try:
+        return [os.path.join(path, f) for f in os.listdir(path)
+                if f.endswith(".prof") and os.path.isfile(os.path.join(path, f))]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def record(view, profile):
+    '''
+    Add the profile of a request of view to the profile of the view in
+    this process, and save it
+    '''
+    with _lock:
+        stats = _stats.get(view)
+        if stats is None:
+            stats = _stats[view] = pstats.Stats(profile)
+        else:
+            stats.add(profile)
+        path = view_dir(view)
+        os.makedirs(path, exist_ok=True)
+        stats.dump_stats(os.path.join(path, f"{os.getpid()}.prof"))
+
+
+def profiled_views():
+    '''
+    Views having a saved profile
+    '''
+    try:
+        return sorted(v for v in os.listdir(profile_dir()) if VIEW_RE.fullmatch(v))
+    except FileNotFoundError:
+        return []
+
+
+def load(view):
+    '''
+    pstats.Stats of view, merged over the processes
+    Raises KeyError if view has no profile
+    '''
+    files = profile_files(view_dir(view))
+    if not files:
+        raise KeyError(view)
+    return pstats.Stats(*files)
+
+
+def dumps(stats):
+    '''
+    Content of a pstats file for stats (like Stats.dump_stats)
+    '''
+    return marshal.dumps(stats.stats)
+
+
+def report(stats, limit=50):
+    '''
+    Text report of stats, by cumulative time
+    '''
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def clear(view):
+    '''
+    Remove the profiles of view (of all processes): only its .prof files
+    '''
+    path = view_dir(view)
+    with _lock:
+        _stats.pop(view, None)
+        for f in profile_files(path):
+            os.unlink(f)
+
+
+class ProfilerMiddleware():
+    '''
+    Must come after AuthenticationMiddleware (the header is only honored
+    for superusers)
+    '''
+    def __init__(self, get_response):
+        if not getattr(settings, 'DNSAPP_PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate = getattr(settings, 'DNSAPP_PROFILER_RATE', 0.0)
+
+    def wanted(self, request):
+        if request.META.get(HEADER) == "1":
+            user = getattr(request, 'user', None)
+            return user is not None and user.is_superuser
+        return self.rate > 0 and random.random() < self.rate
+
+    def __call__(self, request):
+        if not self.wanted(request):
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is active in this thread
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            record(match._func_path, profile)
+        return response
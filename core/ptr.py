@@ -0,0 +1,222 @@
+'''
+PTR records of A and AAAA rr
+
+When settings.DNSAPP_AUTO_PTR is True, PTR records are maintained
+automatically, in the same transaction as the change of the A or AAAA rr:
+  * rr saved: PTR "<reverse name> PTR <fqdn>" is created in the most
+    specific reverse zone (in-addr.arpa or ip6.arpa) of the namespace,
+    if there is one; the PTR for the previous address or name is removed
+  * rr deleted: its PTR is removed
+  * Rr.objects.bulk_create: missing PTR are created with one query per
+    batch of names
+  * Rr.objects.bulk_delete: PTR are removed with one query per batch of
+    names
+reconcile_ptrs() (command "reconcileptr") repairs a whole namespace.
+PTR pointing to names outside of the namespace zones are never removed.
+'''
+import ipaddress
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models import Zone, Rr, rr_bulk_created, rr_bulk_deleted, in_bulk_delete
+from core.addresses import key_ip
+from core.resolver import resolve_zone, get_trie
+
+REVERSE_SUFFIXES = (".in-addr.arpa", ".ip6.arpa")
+BATCH = 500
+
+
+def reverse_pointer(ip):
+    '''
+    Absolute name of the PTR record for ip
+        192.0.9.1 -> 1.9.0.192.in-addr.arpa.
+    '''
+    return f"{ipaddress.ip_address(ip).reverse_pointer}."
+
+
+def find_reverse_zone(ip, namespace_id):
+    '''
+    Id of the most specific zone of namespace holding the PTR record for ip,
+    or None
+    '''
+    return resolve_zone(reverse_pointer(ip), namespace_id)
+
+
+def make_ptr(rr, zone_id):
+    '''
+    PTR record (not saved) in zone zone_id pointing to A or AAAA rr
+    '''
+    ip = rr.a if rr.type == "A" else rr.aaaa
+    return Rr(name=reverse_pointer(ip), type="PTR", ttl=rr.ttl,
+              ptr=rr.fqdn, zone_id=zone_id)
+
+
+def is_reverse_zone(name):
+    return any(name.endswith(suffix) for suffix in REVERSE_SUFFIXES)
+
+
+def auto_ptr():
+    return getattr(settings, "DNSAPP_AUTO_PTR", False)
+
+
+def add_ptr(rr, namespace_id):
+    '''
+    Create the PTR of A or AAAA rr if it does not exist
+    Returns (PTR, created), or (None, False) if there is no reverse zone
+    for the address in the namespace
+    '''
+    zone_id = find_reverse_zone(key_ip(rr.addr), namespace_id)
+    if zone_id is None:
+        return None, False
+    ptr = make_ptr(rr, zone_id)
+    ptr.set_names()
+    existing = Rr.objects.filter(zone_id=zone_id, fqdn=ptr.fqdn, type="PTR", rdata=rr.fqdn).first()
+    if existing is not None:
+        return existing, False
+    ptr.save()
+    return ptr, True
+
+
+def remove_ptr(addr, fqdn, namespace_id):
+    '''
+    Remove PTR records for address key addr pointing to fqdn
+    '''
+    Rr.objects.filter(zone__namespace_id=namespace_id, type="PTR",
+                      fqdn=reverse_pointer(key_ip(addr)), rdata=fqdn).delete()
+
+
+def remove_ptrs(rrs):
+    '''
+    Remove PTR records pointing to rr in rrs (A and AAAA, fqdn, addr and
+    zone_id loaded), with one query per batch of names
+    Returns the number of PTR removed
+    '''
+    forward = [rr for rr in rrs if rr.addr]
+    if not forward:
+        return 0
+    namespaces = dict(Zone.objects.filter(id__in={rr.zone_id for rr in forward})
+                      .values_list('id', 'namespace_id'))
+    targets = {(namespaces[rr.zone_id], reverse_pointer(key_ip(rr.addr)), rr.fqdn)
+               for rr in forward}
+    names = sorted({name for _, name, _ in targets})
+    ids = []
+    for i in range(0, len(names), BATCH):
+        candidates = (Rr.objects.filter(type="PTR", fqdn__in=names[i:i + BATCH],
+                                        zone__namespace_id__in=set(namespaces.values()))
+                      .values_list('id', 'zone__namespace_id', 'fqdn', 'rdata'))
+        ids.extend(id for id, *key in candidates if tuple(key) in targets)
+    return len(Rr.objects.bulk_delete(ids, batch_size=BATCH))
+
+
+def sync_ptrs(rrs):
+    '''
+    Create missing PTR records of rr in rrs (A and AAAA, saved)
+    Returns the number of PTR created
+    '''
+    forward = [rr for rr in rrs if rr.addr]
+    if not forward:
+        return 0
+    namespaces = dict(Zone.objects.filter(id__in={rr.zone_id for rr in forward})
+                      .values_list('id', 'namespace_id'))
+    trie = get_trie()
+    desired = {}
+    for rr in forward:
+        name = reverse_pointer(key_ip(rr.addr))
+        zone_id = trie.resolve(name, namespaces[rr.zone_id])
+        if zone_id is not None:
+            desired[(zone_id, name, rr.fqdn)] = rr.ttl
+    names = sorted({name for _, name, _ in desired})
+    existing = set()
+    for i in range(0, len(names), BATCH):
+        existing.update(Rr.objects.filter(type="PTR", fqdn__in=names[i:i + BATCH])
+                        .values_list('zone_id', 'fqdn', 'rdata'))
+    missing = [Rr(name=name, type="PTR", ttl=ttl, ptr=target, zone_id=zone_id)
+               for (zone_id, name, target), ttl in desired.items()
+               if (zone_id, name, target) not in existing]
+    Rr.objects.bulk_create(missing, batch_size=BATCH)
+    return len(missing)
+
+
+def reconcile_ptrs(namespace, dry_run=False):
+    '''
+    Make PTR records of namespace match its A and AAAA rr:
+    create missing PTR, remove PTR pointing to a name of a forward zone
+    of the namespace which has no A or AAAA rr for this address
+    Returns (PTR to create, ids of PTR to remove)
+    '''
+    trie = get_trie()
+    desired = {}
+    forward = (Rr.objects.filter(zone__namespace=namespace, addr__isnull=False)
+               .values_list('fqdn', 'addr', 'ttl'))
+    for fqdn, addr, ttl in forward.iterator(chunk_size=5000):
+        name = reverse_pointer(key_ip(addr))
+        zone_id = trie.resolve(name, namespace.id)
+        if zone_id is not None:
+            desired[(zone_id, name, fqdn)] = ttl
+
+    zones = dict(Zone.objects.filter(namespace=namespace).values_list('id', 'name'))
+    reverse_zones = [zone_id for zone_id, name in zones.items() if is_reverse_zone(name)]
+    existing = set()
+    stale = []
+    ptrs = (Rr.objects.filter(zone_id__in=reverse_zones, type="PTR")
+            .values_list('id', 'zone_id', 'fqdn', 'rdata'))
+    for id, zone_id, name, target in ptrs.iterator(chunk_size=5000):
+        key = (zone_id, name, target)
+        if key in desired:
+            existing.add(key)
+            continue
+        target_zone = trie.resolve(target, namespace.id)
+        if target_zone is not None and not is_reverse_zone(zones[target_zone]):
+            stale.append(id)
+
+    missing = [Rr(name=name, type="PTR", ttl=ttl, ptr=target, zone_id=zone_id)
+               for (zone_id, name, target), ttl in desired.items()
+               if (zone_id, name, target) not in existing]
+    if not dry_run:
+        with transaction.atomic():
+            Rr.objects.bulk_create(missing, batch_size=BATCH)
+            Rr.objects.bulk_delete(stale, batch_size=BATCH)
+    return missing, stale
+
+
+@receiver(post_save, sender=Rr, dispatch_uid="core.ptr.save")
+def sync_rr_ptr(sender, instance, raw=False, **kwargs):
+    ''' Receiver for rr creation or modification
+    '''
+    if raw or not auto_ptr():
+        return
+    previous_fqdn, previous_addr = getattr(instance, "previous", (None, None))
+    if (previous_fqdn, previous_addr) == (instance.fqdn, instance.addr):
+        return
+    namespace_id = instance.zone.namespace_id
+    if previous_addr and previous_fqdn:
+        remove_ptr(previous_addr, previous_fqdn, namespace_id)
+    if instance.addr:
+        ptr, created = add_ptr(instance, namespace_id)
+        # PTR created along with the rr (see views.ZoneAllocate)
+        instance.created_ptr = ptr if created else None
+
+
+@receiver(post_delete, sender=Rr, dispatch_uid="core.ptr.delete")
+def remove_rr_ptr(sender, instance, **kwargs):
+    ''' Receiver for rr delete
+    '''
+    if auto_ptr() and instance.addr and not in_bulk_delete():
+        remove_ptr(instance.addr, instance.fqdn, instance.zone.namespace_id)
+
+
+@receiver(rr_bulk_created, sender=Rr, dispatch_uid="core.ptr.bulk")
+def sync_bulk_ptrs(sender, objs, **kwargs):
+    ''' Receiver for rr bulk creation
+    '''
+    if auto_ptr():
+        sync_ptrs(objs)
+
+
+@receiver(rr_bulk_deleted, sender=Rr, dispatch_uid="core.ptr.bulk_delete")
+def remove_bulk_ptrs(sender, objs, **kwargs):
+    ''' Receiver for rr bulk delete
+    '''
+    if auto_ptr():
+        remove_ptrs(objs)
@@ -0,0 +1,136 @@
+'''
+Query budget of requests
+
+QueryBudgetMiddleware counts the SQL queries of each request, their
+total time and the rows reported by the database driver (rows fetched
+by a SELECT on PostgreSQL, rows changed by a write), and returns them in
+a Server-Timing header:
+
+    Server-Timing: db;dur=3.412;desc="7 queries", rows;desc="124", total;dur=18.070
+
+A request whose view runs more queries than its budget is logged as a
+warning (logger "core.querybudget"). Budgets are set by view, the
+default one applying to views without their own:
+
+    DNSAPP_QUERY_BUDGET = 20
+    DNSAPP_QUERY_BUDGETS = {'core.views.ZoneRecords': 200}
+
+When DNSAPP_QUERY_LOG is the path of a file, the counters of every
+request are appended to it as a JSON line; "manage.py querystats"
+summarizes the worst endpoints from this file.
+'''
+import json
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter():
+    '''
+    Database execute wrapper (see connection.execute_wrapper) counting
+    queries, their time and rows
+    '''
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.queries += 1
+            rowcount = getattr(context['cursor'], 'rowcount', -1)
+            if rowcount > 0:
+                self.rows += rowcount
+
+
+def view_name(request):
+    '''
+    Dotted path of the view of request ("core.views.RrDetail"), or None
+    if the request did not match an url
+    '''
+    match = getattr(request, 'resolver_match', None)
+    return match._func_path if match else None
+
+
+def query_budget(view):
+    return getattr(settings, 'DNSAPP_QUERY_BUDGETS', {}).get(
+        view, getattr(settings, 'DNSAPP_QUERY_BUDGET', 20))
+
+
+class QueryBudgetMiddleware():
+    def __init__(self, get_response):
+        if not getattr(settings, 'DNSAPP_QUERY_STATS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        # read by core.metrics.MetricsMiddleware
+        request.query_counter = counter
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = (f'db;dur={counter.time * 1000:.3f};desc="{counter.queries} queries", '
+                                     f'rows;desc="{counter.rows}", total;dur={total * 1000:.3f}')
+
+        view = view_name(request)
+        budget = query_budget(view)
+        if counter.queries > budget:
+            logger.warning("%s %s (%s): %d queries, budget %d",
+                           request.method, request.path, view, counter.queries, budget)
+
+        path = getattr(settings, 'DNSAPP_QUERY_LOG', None)
+        if path and view:
+            record = {"view": view, "method": request.method, "status": response.status_code,
+                      "queries": counter.queries, "db_ms": round(counter.time * 1000, 3),
+                      "rows": counter.rows, "total_ms": round(total * 1000, 3)}
+            # one write per line: lines of concurrent workers do not interleave
+            with open(path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        return response
+
+
+def read_log(path):
+    '''
+    Records of a query log, skipping lines which are not valid JSON
+    (a line may be truncated if a worker was killed while writing)
+    '''
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def summarize(records):
+    '''
+    Statistics by endpoint (view, method) of query log records:
+    list of dicts with requests, max and mean of queries, db_ms, rows
+    and total_ms
+    '''
+    endpoints = {}
+    for r in records:
+        endpoints.setdefault((r["view"], r["method"]), []).append(r)
+    stats = []
+    for (view, method), rs in endpoints.items():
+        s = {"view": view, "method": method, "requests": len(rs)}
+        for key in ("queries", "db_ms", "rows", "total_ms"):
+            values = [r[key] for r in rs]
+            s[f"max_{key}"] = max(values)
+            s[f"mean_{key}"] = sum(values) / len(values)
+        stats.append(s)
+    return stats
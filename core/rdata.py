@@ -0,0 +1,73 @@
+'''
+Codec for the packed rdata column of Rr
+
+Type specific data of a rr is stored in a single text column, in master
+file order and syntax, fields separated by a single space:
+
+    A       192.0.9.1
+    MX      10 mail.example.com.
+    SRV     0 5 5060 sip.example.com.
+    CAA     0 issue letsencrypt.org
+    TXT     v=spf1 -all
+
+The last field of a type takes the rest of the string, so it may contain
+spaces (TXT, CAA value); other fields can not contain whitespace (see
+RrSerializer), encode() refuses them. Field names and order come from
+core.validators.attrchecks.
+'''
+import re
+from core.validators import attrchecks
+
+WHITESPACE_RE = re.compile(r"\s")
+
+# Fields decoded as integers
+INT_FIELDS = {"prio", "srv_priority", "srv_weight", "srv_port", "caa_flag"}
+
+# All rdata fields, in the order of the former Rr columns
+RDATA_FIELDS = ["a", "aaaa", "cname", "ns", "prio", "mx", "ptr", "txt",
+                "srv_priority", "srv_weight", "srv_port", "srv_target",
+                "caa_flag", "caa_tag", "caa_value", "dname"]
+
+
+def encode(type, values):
+    '''
+    Pack values (dict field -> value) for type
+    Returns None if type has no rdata fields or if a field is missing
+    Raises ValueError if a field other than the last one contains
+    whitespace (it could not be decoded)
+    '''
+    fields = attrchecks.get(type)
+    if not fields:
+        return None
+    try:
+        parts = [values[f] for f in fields]
+    except KeyError:
+        return None
+    if any(v is None for v in parts):
+        return None
+    for f, v in zip(fields[:-1], parts):
+        if WHITESPACE_RE.search(str(v)):
+            raise ValueError(f"Field '{f}' can not contain whitespace")
+    return " ".join(str(v) for v in parts)
+
+
+def decode(type, rdata):
+    '''
+    Unpack rdata for type; returns a dict field -> value
+    Returns an empty dict if rdata can not be decoded for this type
+    '''
+    fields = attrchecks.get(type)
+    if rdata is None or not fields:
+        return {}
+    parts = rdata.split(" ", len(fields) - 1)
+    if len(parts) != len(fields):
+        return {}
+    values = {}
+    for f, v in zip(fields, parts):
+        if f in INT_FIELDS:
+            try:
+                v = int(v)
+            except ValueError:
+                return {}
+        values[f] = v
+    return values
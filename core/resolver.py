@@ -0,0 +1,127 @@
+'''
+Resolution of a fqdn to its zone
+
+Zones names of each namespace are kept in memory in a trie of labels,
+from the top level domain down:
+
+    com -> example -> (zone example.com) -> lab -> (zone lab.example.com)
+
+Resolving a name walks its labels from the right, so it costs
+O(number of labels) whatever the number of zones.
+
+The trie is built on first use and invalidated when a zone is saved or
+deleted. Other processes (workers) see the invalidation through a
+version number kept in the django cache: with several workers, the
+cache backend must be shared (memcached, redis, database, see CACHES in
+dnsapp/settings.py). Checks which would refuse a name because of a
+stale trie rebuild it first (zone_path(..., refresh=True)).
+'''
+import threading
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models import Zone
+from core.metrics import cache_lookup
+
+VERSION_KEY = "core.resolver.version"
+
+
+class ZoneTrie():
+    '''
+    Trie of zone names, per namespace
+    A node is a list [zone id or None, {label: node}]
+    '''
+    def __init__(self, zones):
+        '''
+        zones: iterable of (zone id, zone name, namespace id)
+        '''
+        self.roots = {}
+        for zone_id, name, namespace_id in zones:
+            node = self.roots.setdefault(namespace_id, [None, {}])
+            for label in reversed(name.lower().rstrip(".").split(".")):
+                node = node[1].setdefault(label, [None, {}])
+            node[0] = zone_id
+
+    def path(self, fqdn, namespace_id):
+        '''
+        Ids of zones containing fqdn, from the least to the most specific
+        '''
+        zones = []
+        node = self.roots.get(namespace_id)
+        if node is None:
+            return zones
+        for label in reversed(fqdn.lower().rstrip(".").split(".")):
+            node = node[1].get(label)
+            if node is None:
+                break
+            if node[0] is not None:
+                zones.append(node[0])
+        return zones
+
+    def resolve(self, fqdn, namespace_id):
+        '''
+        Id of the most specific zone containing fqdn, or None
+        '''
+        zones = self.path(fqdn, namespace_id)
+        return zones[-1] if zones else None
+
+
+_lock = threading.Lock()
+_trie = None
+_version = None
+
+
+def get_trie(refresh=False):
+    '''
+    Current trie, rebuilt if a zone changed since it was built
+    refresh: rebuilt anyway, for a check that a stale trie would fail
+    (zone just created by another process, whose invalidation is not
+    seen without a shared cache)
+    '''
+    global _trie, _version
+    version = cache.get(VERSION_KEY)
+    trie = _trie
+    if trie is not None and version == _version and not refresh:
+        cache_lookup("resolver", True)
+        return trie
+    cache_lookup("resolver", False)
+    with _lock:
+        if _trie is None or version != _version or refresh:
+            _trie = ZoneTrie(Zone.objects.values_list('id', 'name', 'namespace_id'))
+            _version = version
+        return _trie
+
+
+def invalidate():
+    global _trie
+    _trie = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # key does not exist (yet, or evicted)
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def resolve_zone(fqdn, namespace_id):
+    '''
+    Most specific zone (id) of namespace containing fqdn, or None
+    '''
+    return get_trie().resolve(fqdn, namespace_id)
+
+
+def zone_path(fqdn, namespace_id, refresh=False):
+    '''
+    Zones (ids) of namespace containing fqdn, least specific first
+    '''
+    return get_trie(refresh).path(fqdn, namespace_id)
+
+
+@receiver([post_save, post_delete], sender=Zone, dispatch_uid="core.resolver.invalidate")
+def invalidate_zone_trie(sender, instance, **kwargs):
+    ''' Receiver for zone creation, modification or delete
+        invalidate now for the current transaction, and again on commit
+        in case another request rebuilt the trie in between
+    '''
+    invalidate()
+    transaction.on_commit(invalidate)
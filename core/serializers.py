@@ -1,21 +1,66 @@
 from rest_framework import serializers
-from core.validators import ValidateAbsoluteName, ValidateType, ValidateHostname
+from django.core.validators import MaxLengthValidator, RegexValidator
+from core.validators import (ValidateAbsoluteName, ValidateType, ValidateHostname,
+                             ValidateRrName, ZoneNameValidator, validate_many)
 from core.models import Namespace, Zone, Rr
+from core.resolver import zone_path
+from core.metrics import TimedValidationMixin
 
-class NamespaceSerializer(serializers.ModelSerializer):
+class NamespaceSerializer(TimedValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = Namespace
         fields = ['id', 'name']
 
-class ZoneSerializer(serializers.ModelSerializer):
+class ZoneSerializer(TimedValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = Zone
         fields = ['id', 'name', 'namespace', 'nsmaster', 'mail', 'serial', 'refresh', 'retry', 'expire', 'minttl']
 
-class RrSerializer(serializers.ModelSerializer):
+def RdataField(field_class=serializers.CharField, **kwargs):
+    '''
+    Serializer field for an attribute of the packed rdata column of Rr
+    '''
+    return field_class(required=False, allow_null=True, **kwargs)
+
+class RrSerializer(TimedValidationMixin, serializers.ModelSerializer):
+    # rdata fields (see core.rdata)
+    a = RdataField(serializers.IPAddressField, protocol="IPv4")
+    aaaa = RdataField(serializers.IPAddressField, protocol="IPv6")
+    cname = RdataField(validators=[ValidateRrName])
+    ns = RdataField(validators=[ValidateRrName])
+    prio = RdataField(serializers.IntegerField, min_value=0)
+    mx = RdataField(validators=[ValidateRrName])
+    ptr = RdataField(validators=[ValidateRrName])
+    txt = RdataField(allow_blank=True, validators=[MaxLengthValidator(65535)])
+    srv_priority = RdataField(serializers.IntegerField, min_value=0)
+    srv_weight = RdataField(serializers.IntegerField, min_value=0)
+    srv_port = RdataField(serializers.IntegerField, min_value=0)
+    srv_target = RdataField(validators=[ValidateRrName])
+    # FIXME: add CHOICE to caa_tag (issue, issuewild, iodef, contactemail)
+    caa_flag = RdataField(serializers.IntegerField, min_value=0)
+    # not the last field of the packed rdata: no whitespace (see core.rdata)
+    caa_tag = RdataField(allow_blank=True, validators=[MaxLengthValidator(253),
+                                                       RegexValidator(r'^\S*$', "CAA tag can not contain whitespace")])
+    caa_value = RdataField(allow_blank=True, validators=[MaxLengthValidator(253)])
+    dname = RdataField(validators=[ZoneNameValidator()])
+
     class Meta:
         model = Rr
         fields = ['id', 'name', 'type', 'ttl', 'zone', 'a', 'aaaa', 'cname', 'ns', 'prio', 'mx', 'ptr', 'txt', 'srv_priority', 'srv_weight', 'srv_port', 'srv_target', 'caa_flag', 'caa_tag', 'caa_value', 'dname' ]
+        # No validator generated from the CNAME UniqueConstraint: it costs
+        # a query per rr (whatever its type) and refuses an unchanged
+        # CNAME in a zone synchronization; the database checks it on
+        # write (see save_rr and core.sync.apply_sync)
+        validators = []
+
+    def __init__(self, *args, fields=None, **kwargs):
+        '''
+        fields: optional subset of Meta.fields to serialize (list views)
+        '''
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for f in set(self.fields) - set(fields):
+                self.fields.pop(f)
 
     def validate(self, attrs):
         ValidateType(attrs)
@@ -28,15 +73,71 @@ class RrSerializer(serializers.ModelSerializer):
         if attrs["type"] == "A" or attrs["type"] == "AAAA":
             ValidateHostname(name)
 
-        # Check if absolute name ends with zone name
+        # Check if absolute name is in zone
+        # Names of a child zone are only allowed for delegation (NS and glue)
         if name.endswith("."):
-            if not name.endswith(f"{zone}."):
-                raise ValidationException(detail=f"Absolute name '{name}' does not end with zone name")
+            zones = zone_path(name, attrs["zone"].namespace_id)
+            if attrs["zone"].id not in zones:
+                # zone may be missing from the trie of this process
+                zones = zone_path(name, attrs["zone"].namespace_id, refresh=True)
+            if attrs["zone"].id not in zones:
+                raise serializers.ValidationError(detail=f"Absolute name '{name}' does not end with zone name")
+            if zones[-1] != attrs["zone"].id and attrs["type"] not in ("NS", "A", "AAAA"):
+                raise serializers.ValidationError(detail=f"Absolute name '{name}' belongs to a child zone of '{zone}'")
 
         # Name and zone name should have been validated up to this point
         # Just check total length 
         fqdn = f"{name}.{attrs['zone'].name}"
         if len(fqdn) > 255:
-            raise ValidationException(detail=f"Full name '{fqdn}' is too long (length must be <= 255)")
+            raise serializers.ValidationError(detail=f"Full name '{fqdn}' is too long (length must be <= 255)")
 
         return attrs
+
+class CurrentZoneDefault():
+    '''
+    Default of the zone field: the zone of the view (context["zone"])
+    '''
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return serializer_field.context["zone"]
+
+# Fields of RrSerializer validated by ValidateRrName
+NAME_FIELDS = ('name', 'cname', 'ns', 'mx', 'ptr', 'srv_target')
+
+class ZoneRrSerializer(RrSerializer):
+    '''
+    Rr of the zone given in context["zone"], for views working on a
+    zone (no zone field in data, no query to validate it)
+    With context["names_validated"], names are not validated again (see
+    validate_names)
+    '''
+    zone = serializers.HiddenField(default=CurrentZoneDefault())
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("names_validated"):
+            for name in NAME_FIELDS:
+                fields[name].validators = [v for v in fields[name].validators if v is not ValidateRrName]
+        return fields
+
+def validate_names(data):
+    '''
+    Validate the names of a list of rr (NAME_FIELDS of each dict) in one
+    call, for bulk paths
+    Returns None, or the errors as reported by a serializer with many=True
+    (one dict per rr)
+    '''
+    def value(record, name):
+        # as converted by CharField; blank values are left to the field
+        v = record.get(name) if isinstance(record, dict) else None
+        if isinstance(v, (str, int)) and not isinstance(v, bool):
+            return str(v).strip() or None
+        return None
+
+    errors = validate_many(v for record in data for name in NAME_FIELDS
+                           if (v := value(record, name)) is not None)
+    if not errors:
+        return None
+    return [{name: [errors[v]] for name in NAME_FIELDS if (v := value(record, name)) in errors}
+            for record in data]
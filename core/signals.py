@@ -1,19 +1,61 @@
+'''
+Zone serial: incremented on each change of the zone (see Zone.save) or
+of one of its rr, with a single UPDATE so that concurrent changes are
+all counted
+
+Changes made inside a "with deferred_serial():" block increment the
+serial of each changed zone once, at the end of the block (not at all
+with deferred_serial(increment=False))
+'''
+import threading
+from contextlib import contextmanager
+from django.db.models import F
 from django.db.models.signals import post_save, post_delete
-from core.models import Rr, Zone
 from django.dispatch import receiver
+from core.models import Rr, Zone, rr_bulk_created, rr_bulk_deleted, in_bulk_delete
+
+
+_deferred = threading.local()
+
+
+def increment_serial(zone_ids):
+    deferred = getattr(_deferred, "zone_ids", None)
+    if deferred is not None:
+        deferred.update(zone_ids)
+        return
+    Zone.objects.filter(id__in=zone_ids).update(serial=F('serial') + 1)
+
 
-@receiver([post_save, post_delete], sender=Rr)
-def increment_serial_rr_mod(sender, instance, **kwargs):
+@contextmanager
+def deferred_serial(increment=True):
+    '''
+    Increment the serial of zones changed in the block once, when the
+    block exits without exception
+    increment=False: changes in the block do not increment serials (zone
+    import, which sets the serial of the zone file)
+    '''
+    previous = getattr(_deferred, "zone_ids", None)
+    zone_ids = _deferred.zone_ids = set()
+    try:
+        yield
+    finally:
+        _deferred.zone_ids = previous
+    if zone_ids and increment:
+        increment_serial(zone_ids)
+
+
+@receiver([post_save, post_delete], sender=Rr, dispatch_uid="core.signals.serial")
+def increment_serial_rr_mod(sender, instance, raw=False, **kwargs):
     ''' Receiver for rr creation, modification or delete
+        an rr moved to another zone changes both zones
     '''
-    rr = instance
-    print(f"rr id={rr.id} rr name={rr.name}")
-    rr.zone.serial += 1
+    if not raw and not in_bulk_delete():
+        zone_ids = {instance.zone_id, getattr(instance, "previous_zone_id", None)}
+        increment_serial(zone_ids - {None})
+
 
-@receiver([post_save], sender=Zone)
-def increment_serial_zone_mod(sender, instance, **kwargs):
-    ''' Receiver for zone modifications
+@receiver([rr_bulk_created, rr_bulk_deleted], sender=Rr, dispatch_uid="core.signals.serial_bulk")
+def increment_serial_rr_bulk(sender, objs, **kwargs):
+    ''' Receiver for rr bulk creation or delete: one increment per zone
     '''
-    zone = instance
-    print(f"zone id={zone.id} zone name={zone.name}")
-    zone.serial += 1
+    increment_serial({rr.zone_id for rr in objs})
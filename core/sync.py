@@ -0,0 +1,158 @@
+'''
+Synchronization of rr with a desired set of records
+
+A record is identified by a hash of (fqdn, type, ttl, rdata): the desired
+records and the rr in the database are compared by hash, records present
+on both sides are left untouched, others are inserted or deleted. A TTL
+or rdata change is a delete and an insert.
+
+Permissions are checked once per changed RRset (fqdn, type):
+  * insert: "c" on the zone (once), zone rules (loaded once) for the
+    name and type
+  * delete, and insert in a RRset which has rr: "w" on each rr of the
+    RRset which is in the database (PermRr or PermZoneRr)
+Changes are applied in one transaction, incrementing the zone serial
+once; the number of queries does not depend on the number of changed rr
+(batches of BATCH rr, see Rr.objects.bulk_delete and bulk_create).
+'''
+import hashlib
+from dataclasses import dataclass, field
+from django.db import transaction, IntegrityError
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from core.models import Rr, PermZone, Zonerule
+from core.names import make_fqdn
+from core.permissions import PermCheck, RrPermCheck, rr_perm_filter, set_perms
+from core.serializers import ZoneRrSerializer, validate_names
+from core.signals import deferred_serial
+from core.triggers import is_cname_conflict
+from core.zonefile import read_zone_text, ZoneFileError
+from core.importer import pack
+from core import rdata as rdata_codec
+
+BATCH = 500
+
+
+def record_key(fqdn, type, ttl, rdata):
+    return hashlib.blake2b(f"{fqdn}\0{type}\0{ttl}\0{rdata}".encode(),
+                           digest_size=16).digest()
+
+
+@dataclass
+class SyncPlan:
+    # desired rr not in the database (unsaved)
+    inserts: list = field(default_factory=list)
+    # ids of rr to delete, with their RRset
+    deletes: dict = field(default_factory=dict)
+    unchanged: int = 0
+    # (fqdn, type) -> ids of rr in database, for changed RRsets
+    rrsets: dict = field(default_factory=dict)
+
+    def changed_rrsets(self):
+        return ({(rr.fqdn, rr.type) for rr in self.inserts}
+                | set(self.deletes.values()))
+
+
+def parse_records(zone, data):
+    '''
+    Desired records from request data: a list of rr (as in rr views,
+    without zone) or {"zonefile": "<zone file text>"}
+    Raises ValidationError
+    '''
+    if isinstance(data, dict) and "zonefile" in data:
+        records = []
+        try:
+            for name, ttl, type, text in read_zone_text(data["zonefile"], zone.name):
+                if type == "SOA":
+                    continue
+                packed = pack(type, text)
+                if packed is None:
+                    raise ValidationError(detail=f"Unsupported record '{name} {type} {text}'")
+                records.append({"name": name, "ttl": ttl, "type": type,
+                                **rdata_codec.decode(type, packed)})
+        except ZoneFileError as e:
+            raise ValidationError(detail=str(e))
+        data = records
+    if not isinstance(data, list):
+        raise ValidationError(detail="Expected a list of records or a zone file")
+    errors = validate_names(data)
+    if errors:
+        raise ValidationError(detail=errors)
+    serializer = ZoneRrSerializer(data=data, many=True, context={"zone": zone, "names_validated": True})
+    serializer.is_valid(raise_exception=True)
+    return [Rr(**values) for values in serializer.validated_data]
+
+
+def plan_sync(zone, desired, existing=None):
+    '''
+    Changes to make existing rr (queryset, default: all rr of zone) equal
+    to desired (unsaved Rr of zone)
+    '''
+    if existing is None:
+        existing = zone.rr_set.all()
+    zone_names = {zone.id: zone.name}
+    wanted = {}
+    for rr in desired:
+        rr.pack_rdata()
+        rr.set_names(zone_names)
+        wanted.setdefault(record_key(rr.fqdn, rr.type, rr.ttl, rr.rdata), rr)
+
+    plan = SyncPlan()
+    found = set()
+    rows = existing.values_list('id', 'fqdn', 'type', 'ttl', 'rdata')
+    for id, fqdn, type, ttl, rdata in rows.iterator(chunk_size=5000):
+        key = record_key(fqdn, type, ttl, rdata)
+        plan.rrsets.setdefault((fqdn, type), []).append(id)
+        if key in wanted and key not in found:
+            found.add(key)
+            plan.unchanged += 1
+        else:
+            plan.deletes[id] = (fqdn, type)
+    plan.inserts = [rr for key, rr in wanted.items() if key not in found]
+
+    changed = plan.changed_rrsets()
+    plan.rrsets = {rrset: ids for rrset, ids in plan.rrsets.items() if rrset in changed}
+    return plan
+
+
+def check_sync_permissions(user, zone, plan):
+    '''
+    Raises PermissionDenied if user may not apply plan
+    '''
+    if user.is_superuser:
+        return
+    if plan.inserts and not PermCheck.can_create_record(user, zone, PermZone):
+        raise PermissionDenied('rr create unauthorized for this zone')
+
+    ids = [id for rrset_ids in plan.rrsets.values() for id in rrset_ids]
+    writable = set()
+    for i in range(0, len(ids), BATCH):
+        writable.update(Rr.objects.filter(id__in=ids[i:i + BATCH])
+                        .filter(rr_perm_filter(user, "w")).values_list('id', flat=True))
+
+    names = {(rr.fqdn, rr.type): rr.name for rr in plan.inserts}
+    rules = list(Zonerule.objects.filter(zone=zone)) if names else []
+    for rrset in sorted(plan.changed_rrsets()):
+        fqdn, type = rrset
+        if not all(id in writable for id in plan.rrsets.get(rrset, ())):
+            raise PermissionDenied(f"rr update unauthorized for '{fqdn} {type}'")
+        if rrset in names and not RrPermCheck.can_create_by_rule(user, names[rrset], zone, type, rules):
+            raise PermissionDenied(f"rr create unauthorized: '{fqdn} {type}' invalid by rule")
+
+
+def apply_sync(user, zone, plan):
+    '''
+    Apply plan in one transaction; created rr get the permissions of
+    user (like set_perm)
+    Raises ValidationError if CNAME exclusivity is violated, other
+    integrity errors are raised as is
+    '''
+    try:
+        with transaction.atomic(), deferred_serial():
+            Rr.objects.bulk_delete(plan.deletes, batch_size=BATCH)
+            created = Rr.objects.bulk_create(plan.inserts, batch_size=BATCH)
+            set_perms(user, zone.id, created, "rw", batch_size=BATCH)
+    except IntegrityError as e:
+        if not is_cname_conflict(e):
+            raise
+        raise ValidationError(detail="CNAME and other data with same name can not coexist in zone")
+    zone.refresh_from_db(fields=['serial'])
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import Group
+from rest_framework.test import APITestCase
+from core.models import Namespace, Zone, PermZone, User
+
+
+class ZoneTestCase(APITestCase):
+    '''
+    Fixture shared by the API tests: user 'user' (password 'user') in
+    group 'group', its default pref, and zone example.com in namespace
+    'namespace'
+    zone_action: action of the PermZone of group on the zone (none if None)
+    '''
+    group_name = 'group'
+    zone_action = None
+
+    def setUp(self):
+        self.group = Group.objects.create(name=self.group_name)
+        self.user = self.create_user('user', self.group)
+        self.group.user_set.add(self.user)
+        self.namespace = Namespace.objects.create(name='namespace')
+        self.zone = self.create_zone('example.com')
+        if self.zone_action is not None:
+            PermZone.objects.create(action=self.zone_action, group=self.group, obj=self.zone)
+
+    def create_user(self, username, default_pref, **kwargs):
+        '''
+        User whose password is its name
+        '''
+        user = User.objects.create(username=username, default_pref=default_pref, **kwargs)
+        user.set_password(username)
+        user.save()
+        return user
+
+    def create_admin(self):
+        '''
+        Superuser 'admin' (password 'admin'), in self.admin
+        '''
+        self.admin = self.create_user('admin', Group.objects.create(name='admins'), is_superuser=True)
+
+    def create_zone(self, name):
+        return Zone.objects.create(name=name, namespace=self.namespace,
+                                   nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
@@ -0,0 +1,121 @@
+from unittest import mock
+from django.test import override_settings
+from rest_framework import status
+from core.models import Rr, Zonerule, PermZone, PermRr
+from core.tests.base import ZoneTestCase
+
+class APIAllocateTests(ZoneTestCase):
+    zone_action = 'rc'
+
+    def setUp(self):
+        super().setUp()
+        self.reverse = self.create_zone('20.10.in-addr.arpa')
+        self.url = f'/zone/{self.zone.id}/allocate/'
+        self.client.login(username='user', password='user')
+
+    def test_000_allocate_until_full(self):
+        """ allocate in a /29 where .1 is already used
+            -> .2 to .6, then network is full
+        """
+        Rr.objects.create(name='gw', type='A', a='10.20.0.1', zone=self.zone)
+        for i in range(2, 7):
+            response = self.client.post(self.url, {'cidr': '10.20.0.0/29', 'name': f'h{i}'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['a'], f'10.20.0.{i}')
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/29', 'name': 'h7'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # rr created with permission for user
+        rr = Rr.objects.get(name='h2')
+        self.assertTrue(PermRr.objects.filter(obj=rr, group=self.group, action='rw').exists())
+
+    def test_001_released_address_is_reused(self):
+        for i in range(1, 4):
+            self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': f'h{i}'}, format='json')
+        Rr.objects.get(name='h2').delete()
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h4'}, format='json')
+        self.assertEqual(response.data['a'], '10.20.0.2')
+
+        # address changed: old address is free again
+        rr = Rr.objects.get(name='h1')
+        rr.a = '10.20.0.200'
+        rr.save()
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h5'}, format='json')
+        self.assertEqual(response.data['a'], '10.20.0.1')
+
+    def test_002_allocate_with_ptr(self):
+        PermZone.objects.create(action='rc', group=self.group, obj=self.reverse)
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['ptr']['name'], '1.0.20.10.in-addr.arpa.')
+        self.assertEqual(response.data['ptr']['ptr'], 'h1.example.com.')
+        self.assertEqual(response.data['ptr']['zone'], self.reverse.id)
+
+    def test_003_allocate_with_ptr_denied(self):
+        """ no create permission in reverse zone
+            -> must be denied, and nothing is created
+        """
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Rr.objects.filter(name='h1').exists())
+
+    def test_004_allocate_invalid(self):
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': '-h1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'cidr': 'nonsense', 'name': 'h1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_005_allocate_with_existing_ptr(self):
+        """ PTR of the allocated address already there, with a permission
+            for the group -> created, permissions of the PTR unchanged
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.reverse)
+        ptr = Rr.objects.create(name='1.0.20.10.in-addr.arpa.', type='PTR', ptr='h1.example.com.', zone=self.reverse)
+        PermRr.objects.create(action='rw', group=self.group, obj=ptr)
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['ptr']['id'], ptr.id)
+        self.assertEqual(PermRr.objects.filter(obj=ptr).count(), 1)
+
+    @override_settings(DNSAPP_AUTO_PTR=True)
+    def test_006_allocate_with_auto_ptr(self):
+        """ PTR created along with the rr -> user may write it
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.reverse)
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ptr = Rr.objects.get(type='PTR')
+        self.assertEqual(response.data['ptr']['id'], ptr.id)
+        self.assertTrue(PermRr.objects.filter(obj=ptr, group=self.group, action='rw').exists())
+
+    def test_007_denied_before_allocation(self):
+        """ name of a rr not writable by user -> denied without allocating
+        """
+        Rr.objects.create(name='h1', type='A', a='10.30.0.1', zone=self.zone)
+        with mock.patch('core.views.allocate_address') as allocate:
+            response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        allocate.assert_not_called()
+
+    def test_008_allocate_with_ptr_denied_by_rule(self):
+        """ PTR denied by the rule of the reverse zone
+            -> denied, nothing created and the address stays free
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.reverse)
+        Zonerule.objects.create(zone=self.reverse, typepat='^A$', namepat='.*')
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Rr.objects.filter(name='h1').exists())
+        self.assertFalse(Rr.objects.filter(type='PTR').exists())
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h2'}, format='json')
+        self.assertEqual(response.data['a'], '10.20.0.1')
+
+    def test_009_allocate_with_ptr_not_writable(self):
+        """ PTR of the allocated address owned by another group
+            -> denied, nothing created
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.reverse)
+        Rr.objects.create(name='1.0.20.10.in-addr.arpa.', type='PTR', ptr='other.example.com.', zone=self.reverse)
+        response = self.client.post(self.url, {'cidr': '10.20.0.0/24', 'name': 'h1', 'ptr': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Rr.objects.filter(name='h1').exists())
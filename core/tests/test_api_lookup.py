@@ -0,0 +1,113 @@
+from unittest import mock
+from django.db import connection
+from rest_framework import status
+from core.models import Rr, PermRr
+from core.tests.base import ZoneTestCase
+
+class APILookupTests(ZoneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lab = self.create_zone('lab.example.com')
+
+        # same host, relative and absolute names
+        self.www = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        self.www6 = Rr.objects.create(name='www.example.com.', type='AAAA', aaaa='2001:db8::1', zone=self.zone)
+        self.labapex = Rr.objects.create(name='@', type='A', a='192.0.9.2', zone=self.lab)
+        self.labhost = Rr.objects.create(name='h1', type='A', a='192.0.9.3', zone=self.lab)
+        # "lab-foo" sorts between "lab" and "lab." : not in subtree
+        self.labfoo = Rr.objects.create(name='lab-foo', type='A', a='192.0.9.4', zone=self.zone)
+        for rr in (self.www, self.www6, self.labapex, self.labhost, self.labfoo):
+            PermRr.objects.create(action='r', group=self.group, obj=rr)
+        # not readable by user
+        Rr.objects.create(name='h2', type='A', a='192.0.9.5', zone=self.lab)
+
+        self.client.login(username='user', password='user')
+
+    def test_000_lookup_fqdn(self):
+        """ lookup by fqdn, with and without type
+        """
+        response = self.client.get('/lookup/?fqdn=WWW.example.com')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(r['id'] for r in response.data), sorted([self.www.id, self.www6.id]))
+
+        response = self.client.get('/lookup/?fqdn=www.example.com.&type=aaaa')
+        self.assertEqual([r['id'] for r in response.data], [self.www6.id])
+
+    def test_001_lookup_subtree(self):
+        """ lookup of all readable names under lab.example.com
+        """
+        response = self.client.get('/lookup/?fqdn=lab.example.com&subtree=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(r['id'] for r in response.data), sorted([self.labapex.id, self.labhost.id]))
+
+    def test_002_lookup_after_zone_rename(self):
+        """ names of rr follow zone renaming
+        """
+        self.lab.name = 'lab2.example.com'
+        self.lab.save()
+        response = self.client.get('/lookup/?fqdn=h1.lab2.example.com')
+        self.assertEqual([r['id'] for r in response.data], [self.labhost.id])
+
+    def test_003_lookup_without_fqdn(self):
+        response = self.client.get('/lookup/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class APIByIpTests(ZoneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a1 = Rr.objects.create(name='h1', type='A', a='10.1.2.3', zone=self.zone)
+        self.a2 = Rr.objects.create(name='h2', type='A', a='10.1.255.255', zone=self.zone)
+        self.a3 = Rr.objects.create(name='h3', type='A', a='10.2.0.0', zone=self.zone)
+        self.aaaa = Rr.objects.create(name='h4', type='AAAA', aaaa='2001:db8::1', zone=self.zone)
+        for rr in (self.a1, self.a2, self.a3, self.aaaa):
+            PermRr.objects.create(action='r', group=self.group, obj=rr)
+        self.client.login(username='user', password='user')
+
+    def test_000_by_addr(self):
+        response = self.client.get('/rr/by-ip/?addr=10.1.2.3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data], [self.a1.id])
+        response = self.client.get('/rr/by-ip/?addr=2001:db8:0::1')
+        self.assertEqual([r['id'] for r in response.data], [self.aaaa.id])
+
+    def test_001_by_cidr(self):
+        response = self.client.get('/rr/by-ip/?cidr=10.1.0.0/16')
+        self.assertEqual([r['id'] for r in response.data], [self.a1.id, self.a2.id])
+        response = self.client.get('/rr/by-ip/?cidr=2001:db8::/32')
+        self.assertEqual([r['id'] for r in response.data], [self.aaaa.id])
+
+    def test_002_address_follows_update(self):
+        self.a3.a = '10.1.0.1'
+        self.a3.save()
+        response = self.client.get('/rr/by-ip/?cidr=10.1.0.0/16')
+        self.assertEqual([r['id'] for r in response.data], [self.a3.id, self.a1.id, self.a2.id])
+
+    def test_003_invalid(self):
+        response = self.client.get('/rr/by-ip/?cidr=10.1.0.0/33')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/rr/by-ip/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_004_rname_collation(self):
+        """ rname compared bytewise: collation "C" on PostgreSQL only
+        """
+        field = Rr._meta.get_field('rname')
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(field.db_parameters(connection)['collation'], 'C')
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            self.assertIsNone(field.db_parameters(connection)['collation'])
+
+    def test_005_ipv4_mapped_address(self):
+        """ AAAA ::ffff:10.1.2.3 -> found by its IPv6 address or network
+            only, not by 10.1.2.3 or 10.1.0.0/16
+        """
+        mapped = Rr.objects.create(name='h5', type='AAAA', aaaa='::ffff:10.1.2.3', zone=self.zone)
+        PermRr.objects.create(action='r', group=self.group, obj=mapped)
+        response = self.client.get('/rr/by-ip/?addr=10.1.2.3')
+        self.assertEqual([r['id'] for r in response.data], [self.a1.id])
+        response = self.client.get('/rr/by-ip/?cidr=10.1.0.0/16')
+        self.assertEqual([r['id'] for r in response.data], [self.a1.id, self.a2.id])
+        response = self.client.get('/rr/by-ip/?addr=::ffff:10.1.2.3')
+        self.assertEqual([r['id'] for r in response.data], [mapped.id])
+        response = self.client.get('/rr/by-ip/?cidr=::ffff:0:0/96')
+        self.assertEqual([r['id'] for r in response.data], [mapped.id])
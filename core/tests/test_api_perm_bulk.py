@@ -0,0 +1,87 @@
+from io import StringIO
+from django.core.management import call_command
+from rest_framework import status
+from core.models import Zone, Rr, PermRr, PermZoneRr
+from core.tests.base import ZoneTestCase
+
+class APIPermBulkTests(ZoneTestCase):
+    group_name = 'team'
+
+    def setUp(self):
+        super().setUp()
+        self.create_admin()
+        other = self.create_zone('example.net')
+        Rr.objects.bulk_create([Rr(name=f'web{i}', type='A', a=f'192.0.9.{i}', zone=self.zone) for i in range(10)])
+        Rr.objects.bulk_create([Rr(name=f'db{i}', type='A', a=f'192.0.8.{i}', zone=self.zone) for i in range(5)])
+        Rr.objects.create(name='web0', type='AAAA', aaaa='2001:db8::1', zone=self.zone)
+        Rr.objects.create(name='web0', type='A', a='192.0.7.1', zone=other)
+
+    def perms(self, action=None):
+        perms = PermRr.objects.filter(group=self.group)
+        return perms.filter(action=action).count() if action else perms.count()
+
+    def test_000_grant_revoke(self):
+        self.client.login(username='admin', password='admin')
+        url = '/permrr/grant/'
+        data = {'group': self.group.id, 'action': 'r', 'zone': self.zone.id, 'name': '^web', 'type': 'A'}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], 10)
+        self.assertEqual(self.perms('r'), 10)
+
+        # idempotent
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.data['changed'], 0)
+        self.assertEqual(self.perms(), 10)
+
+        # action replaced, and added on other rr of the zone
+        response = self.client.post(url, {'group': self.group.id, 'action': 'rw', 'zone': self.zone.id}, format='json')
+        self.assertEqual(response.data['changed'], 16)
+        self.assertEqual(self.perms('rw'), 16)
+
+        response = self.client.post('/permrr/revoke/', {'group': self.group.id, 'zone': self.zone.id, 'name': '^db'}, format='json')
+        self.assertEqual(response.data['changed'], 5)
+        self.assertEqual(self.perms(), 11)
+
+    def test_001_denied_and_invalid(self):
+        self.client.login(username='user', password='user')
+        response = self.client.post('/permrr/grant/', {'group': self.group.id, 'action': 'rw'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.login(username='admin', password='admin')
+        response = self.client.post('/permrr/grant/', {'group': self.group.id, 'action': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/permrr/grant/', {'group': self.group.id, 'action': 'r', 'name': '('}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.perms(), 0)
+
+    def test_002_command(self):
+        out = StringIO()
+        call_command('permrr', 'grant', 'team', 'rw', '--zone', 'example.com', '--type', 'aaaa', stdout=out)
+        self.assertIn('1 permissions granted', out.getvalue())
+        call_command('permrr', 'grant', 'team', 'r', '--name', '^web0$', stdout=out)
+        self.assertEqual(self.perms('r'), 3)
+        call_command('permrr', 'revoke', 'team', stdout=out)
+        self.assertEqual(self.perms(), 0)
+
+    def test_003_revoke_inherited(self):
+        """ group holding "rw" on every rr of the zone by a PermZoneRr
+            -> revoke removes the PermRr, reports the PermZoneRr
+        """
+        PermZoneRr.objects.create(action='rw', group=self.group, obj=self.zone)
+        self.client.login(username='admin', password='admin')
+        self.client.post('/permrr/grant/', {'group': self.group.id, 'action': 'r', 'name': '^db'}, format='json')
+        response = self.client.post('/permrr/revoke/', {'group': self.group.id, 'name': '^db'}, format='json')
+        self.assertEqual(response.data['changed'], 5)
+        self.assertEqual(response.data['inherited'], [{'zone': self.zone.id, 'action': 'rw'}])
+        self.assertEqual(self.perms(), 0)
+
+        other = Zone.objects.get(name='example.net')
+        response = self.client.post('/permrr/revoke/', {'group': self.group.id, 'zone': other.id}, format='json')
+        self.assertEqual(response.data['inherited'], [])
+
+        out = StringIO()
+        call_command('permrr', 'revoke', 'team', '--name', '^web', stdout=out)
+        self.assertIn("still has 'rw' on every rr of zone example.com", out.getvalue())
+        call_command('permrr', 'revoke', 'team', '--zone', 'example.net', stdout=out)
+        self.assertNotIn('example.net', out.getvalue())
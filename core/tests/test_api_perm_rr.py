@@ -1,4 +1,6 @@
+from unittest import mock
 from django.contrib.auth.models import Group
+from django.db import IntegrityError
 from rest_framework import status
 from rest_framework.test import APITestCase
 from core.models import Namespace, Zone, Rr, Zonerule, PermRr, PermZone, User
@@ -565,3 +567,208 @@ class APIPermRrTests(APITestCase):
 #        response = self.client.delete(urldelete)
 #        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 #
+
+    def test_019_api_create_cname_name_exist_denied(self):
+        """ create a CNAME with the same name as an existing A rr
+            -> must be rejected as invalid, and nothing is created
+        """
+        n019 = Namespace.objects.create(name='namespace019')
+        n019.save()
+        zone019 = Zone.objects.create(name='zone019.example.com',namespace=n019, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        zone019.save()
+
+        group019 = Group.objects.create(name='group019')
+        group019.save()
+        user019 = User.objects.create(username='user019', default_pref=group019)
+        user019.set_password('user019')
+        user019.save()
+        group019.user_set.add(user019)
+
+        zp019 = PermZone(action='rc', group = group019, obj = zone019)
+        zp019.save()
+
+        rr019 = Rr.objects.create(name='rr019',type='A',a='192.0.9.19',zone=zone019)
+        rr019.save()
+
+        self.client.login(username='user019', password='user019')
+        url = f'/rr/'
+        data = {'name': 'rr019', 'type': 'CNAME', 'zone': zone019.id, 'cname': 'www.example.com.',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Rr.objects.filter(name='rr019').count(), 1)
+        self.assertFalse(PermRr.objects.filter(group=group019).exists())
+
+    def test_020_api_create_rr_cname_exist_denied(self):
+        """ create an A rr with the same name as an existing CNAME
+            -> must be rejected as invalid
+            same name in another zone
+            -> must be allowed
+        """
+        n020 = Namespace.objects.create(name='namespace020')
+        n020.save()
+        zone020 = Zone.objects.create(name='zone020.example.com',namespace=n020, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        zone020.save()
+        zone020_2 = Zone.objects.create(name='zone020-2.example.com',namespace=n020, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        zone020_2.save()
+
+        group020 = Group.objects.create(name='group020')
+        group020.save()
+        user020 = User.objects.create(username='user020', default_pref=group020)
+        user020.set_password('user020')
+        user020.save()
+        group020.user_set.add(user020)
+
+        PermZone.objects.create(action='rc', group = group020, obj = zone020)
+        PermZone.objects.create(action='rc', group = group020, obj = zone020_2)
+
+        rr020 = Rr.objects.create(name='rr020',type='CNAME',cname='www.example.com.',zone=zone020)
+        rr020.save()
+
+        self.client.login(username='user020', password='user020')
+        url = f'/rr/'
+        data = {'name': 'rr020', 'type': 'A', 'zone': zone020.id, 'a': '192.0.9.20',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {'name': 'rr020', 'type': 'A', 'zone': zone020_2.id, 'a': '192.0.9.20',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_021_api_get_all_allowed_rr_with_fields(self):
+        """ list allowed rr with a subset of fields
+            -> response must contain only requested fields (and id)
+            unknown field
+            -> must be rejected as invalid
+        """
+        n021 = Namespace.objects.create(name='namespace021')
+        n021.save()
+        zone021 = Zone.objects.create(name='zone021.example.com',namespace=n021, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        zone021.save()
+
+        group021 = Group.objects.create(name='group021')
+        group021.save()
+        user021 = User.objects.create(username='user021', default_pref=group021)
+        user021.set_password('user021')
+        user021.save()
+        group021.user_set.add(user021)
+
+        rr021 = Rr.objects.create(name='rr021',type='TXT',txt='v=spf1 -all',zone=zone021)
+        rr021.save()
+        PermRr.objects.create(action="r", group=group021, obj=rr021)
+
+        self.client.login(username='user021', password='user021')
+        response = self.client.get('/rr/?fields=name,type')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': rr021.id, 'name': 'rr021', 'type': 'TXT'}])
+
+        response = self.client.get('/rr/?fields=name,nosuchfield')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_022_api_create_rr_absolute_name_not_in_zone(self):
+        """ create rr with an absolute name outside of its zone
+            (zone022.example.com. ends with zone name but is not in zone)
+            -> must be rejected as invalid
+        """
+        n022 = Namespace.objects.create(name='namespace022')
+        n022.save()
+        zone022 = Zone.objects.create(name='e022.example.com',namespace=n022, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        zone022.save()
+
+        admin022 = User.objects.create(username='admin022', default_pref=Group.objects.create(name='group022'), is_superuser=True)
+        admin022.set_password('admin022')
+        admin022.save()
+
+        self.client.login(username='admin022', password='admin022')
+        url = f'/rr/'
+        data = {'name': 'zone022.example.com.', 'type': 'A', 'zone': zone022.id, 'a': '192.0.9.22',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {'name': 'www.e022.example.com.', 'type': 'A', 'zone': zone022.id, 'a': '192.0.9.22',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_023_api_get_rr_single_query(self):
+        """ get rr: rr and its permissions are fetched by a single query
+            -> 404 for a missing rr, 403 without permission, in any case
+               one query after session and user
+        """
+        group023 = Group.objects.create(name='group023')
+        user023 = User.objects.create(username='user023', default_pref=group023)
+        user023.set_password('user023')
+        user023.save()
+        group023.user_set.add(user023)
+        n023 = Namespace.objects.create(name='namespace023')
+        zone023 = Zone.objects.create(name='zone023.example.com',namespace=n023, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        rr023 = Rr.objects.create(name='rr023',type='A',a='192.0.9.23',zone=zone023)
+        denied023 = Rr.objects.create(name='denied023',type='A',a='192.0.9.24',zone=zone023)
+        PermRr.objects.create(action="r",group=group023,obj=rr023)
+
+        self.client.login(username='user023', password='user023')
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/rr/{rr023.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/rr/{denied023.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/rr/{denied023.id + 1000}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        # read only
+        response = self.client.delete(f'/rr/{rr023.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_024_api_create_cname_relative_and_absolute_name(self):
+        """ CNAME exclusivity applies to the owner name, relative ("www")
+            or absolute ("www.zone024.example.com.")
+            -> CNAME with the absolute name of an A rr must be rejected
+            -> A rr with the relative name of a CNAME must be rejected
+            -> second CNAME with the other form of the name must be rejected
+        """
+        n024 = Namespace.objects.create(name='namespace024')
+        zone024 = Zone.objects.create(name='zone024.example.com',namespace=n024, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        admin024 = User.objects.create(username='admin024', default_pref=Group.objects.create(name='group024'), is_superuser=True)
+        admin024.set_password('admin024')
+        admin024.save()
+
+        self.client.login(username='admin024', password='admin024')
+        url = f'/rr/'
+        data = {'name': 'www', 'type': 'A', 'zone': zone024.id, 'a': '192.0.9.24',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = {'name': 'www.zone024.example.com.', 'type': 'CNAME', 'zone': zone024.id, 'cname': 'host.example.com.',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {'name': 'ftp.zone024.example.com.', 'type': 'CNAME', 'zone': zone024.id, 'cname': 'host.example.com.',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = {'name': 'ftp', 'type': 'A', 'zone': zone024.id, 'a': '192.0.9.25',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        data = {'name': 'ftp', 'type': 'CNAME', 'zone': zone024.id, 'cname': 'other.example.com.',}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Rr.objects.filter(zone=zone024).count(), 2)
+
+        # rename of the A rr to the name of the CNAME
+        www = Rr.objects.get(zone=zone024, name='www')
+        data = {'name': 'ftp.zone024.example.com.', 'type': 'A', 'zone': zone024.id, 'a': '192.0.9.24',}
+        response = self.client.put(f'/rr/{www.id}/', data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_025_api_create_rr_other_integrity_error(self):
+        """ integrity error other than CNAME exclusivity
+            -> not reported as a CNAME conflict
+        """
+        n025 = Namespace.objects.create(name='namespace025')
+        zone025 = Zone.objects.create(name='zone025.example.com',namespace=n025, nsmaster='ns1.example.com', mail='hostmaster.example.com')
+        admin025 = User.objects.create(username='admin025', default_pref=Group.objects.create(name='group025'), is_superuser=True)
+        admin025.set_password('admin025')
+        admin025.save()
+
+        self.client.login(username='admin025', password='admin025')
+        data = {'name': 'www', 'type': 'A', 'zone': zone025.id, 'a': '192.0.9.25',}
+        with mock.patch.object(RrSerializer, 'save', side_effect=IntegrityError('FOREIGN KEY constraint failed')):
+            with self.assertRaises(IntegrityError):
+                self.client.post('/rr/', data)
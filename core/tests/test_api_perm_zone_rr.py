@@ -0,0 +1,89 @@
+from importlib import import_module
+from io import StringIO
+from django.apps import apps
+from django.core.management import call_command
+from django.db.migrations import RunPython
+from django.contrib.auth.models import Group
+from rest_framework import status
+from core.models import Zonerule, Rr, PermRr, PermZoneRr
+from core.tests.base import ZoneTestCase
+from core.permissions import get_allowed_rrs, PermCheck
+
+class APIPermZoneRrTests(ZoneTestCase):
+    zone_action = 'rc'
+
+    def setUp(self):
+        super().setUp()
+        self.other = self.create_zone('example.net')
+        Zonerule.objects.create(zone=self.zone, typepat='^A$', namepat='.*')
+        self.rr = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        self.rr_other = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.other)
+        self.client.login(username='user', password='user')
+
+    def test_000_inherited_rights(self):
+        self.assertFalse(PermCheck.can_get(self.user, self.rr, PermRr))
+        self.assertEqual(get_allowed_rrs(self.user, "r").count(), 0)
+
+        PermZoneRr.objects.create(action='r', group=self.group, obj=self.zone)
+        self.assertTrue(PermCheck.can_get(self.user, self.rr, PermRr))
+        self.assertFalse(PermCheck.can_update(self.user, self.rr, PermRr))
+        self.assertFalse(PermCheck.can_get(self.user, self.rr_other, PermRr))
+        self.assertEqual(list(get_allowed_rrs(self.user, "r")), [self.rr])
+
+        response = self.client.get(f'/rr/{self.rr.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(f'/rr/{self.rr.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # union with per rr permissions
+        PermRr.objects.create(action='rw', group=self.group, obj=self.rr)
+        self.assertTrue(PermCheck.can_update(self.user, self.rr, PermRr))
+
+    def test_001_create_without_permrr(self):
+        PermZoneRr.objects.create(action='rw', group=self.group, obj=self.zone)
+        response = self.client.post('/rr/', {'name': 'web', 'type': 'A', 'a': '192.0.9.2', 'zone': self.zone.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        rr = Rr.objects.get(name='web')
+        self.assertFalse(PermRr.objects.exists())
+        self.assertTrue(PermCheck.can_update(self.user, rr, PermRr))
+
+        # read only zone grant: the creator gets its own PermRr
+        PermZoneRr.objects.filter(obj=self.zone).update(action='r')
+        response = self.client.post('/rr/', {'name': 'web2', 'type': 'A', 'a': '192.0.9.3', 'zone': self.zone.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PermRr.objects.get().obj.name, 'web2')
+
+    def test_002_collapse_command(self):
+        web = Rr.objects.create(name='web', type='A', a='192.0.9.2', zone=self.zone)
+        readers = Group.objects.create(name='readers')
+        PermRr.objects.create(action='rw', group=self.group, obj=self.rr)
+        PermRr.objects.create(action='rw', group=self.group, obj=web)
+        PermRr.objects.create(action='r', group=readers, obj=self.rr)
+        PermRr.objects.create(action='rw', group=self.group, obj=self.rr_other)
+
+        # the migration changes no permission
+        migration = import_module('core.migrations.0007_permzonerr')
+        self.assertIs(migration.Migration.operations[-1].code, RunPython.noop)
+
+        out = StringIO()
+        call_command('collapsepermrr', '--zone', 'example.com', '--dry-run', stdout=out)
+        self.assertIn("zone 'example.com'", out.getvalue())
+        self.assertIn("group 'group' would get 'rw' on every rr, including future ones (2 PermRr)", out.getvalue())
+        self.assertFalse(PermZoneRr.objects.exists())
+
+        call_command('collapsepermrr', '--zone', 'example.com', stdout=out)
+        self.assertEqual(list(PermZoneRr.objects.values_list('obj', 'group', 'action')),
+                         [(self.zone.id, self.group.id, 'rw')])
+        # readers do not have all rr of the zone, other zone not collapsed
+        self.assertEqual(sorted(PermRr.objects.values_list('obj', 'group')),
+                         [(self.rr.id, readers.id), (self.rr_other.id, self.group.id)])
+        self.assertTrue(PermCheck.can_update(self.user, web, PermRr))
+        # groups with a PermZoneRr on the zone are left alone
+        PermRr.objects.create(action='r', group=self.group, obj=self.rr)
+        PermRr.objects.create(action='r', group=self.group, obj=web)
+        call_command('collapsepermrr', '--zone', 'example.com', stdout=out)
+        self.assertEqual(PermZoneRr.objects.get().action, 'rw')
+        PermRr.objects.filter(group=self.group, obj__zone=self.zone).delete()
+
+        migration.expand_permzonerr(apps, None)
+        self.assertEqual(PermRr.objects.filter(group=self.group, action='rw').count(), 3)
@@ -0,0 +1,162 @@
+import tempfile
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from benchmarks import bench_api as benchmark
+from core.models import Namespace, Zone, Zonerule, Rr, PermZone, PermRr
+from core.urls import urlpatterns
+
+# Records per zone of the two datasets
+SIZES = (20, 200)
+
+def address(i):
+    return f'198.51.{i // 250}.{i % 250 + 1}'
+
+# (url pattern, method) -> SQL queries of the request, the same for both
+# datasets; caches (zone lists, resolver, preferences) are cleared before
+# each request. Authentication (session and user) counts for 2 queries.
+QUERIES = {
+    ('namespace/', 'GET'): 3,
+    ('namespace/', 'POST'): 4,
+    ('namespace/<int:pk>/', 'GET'): 3,
+    ('namespace/<int:pk>/', 'PUT'): 5,
+    ('namespace/<int:pk>/', 'DELETE'): 7,
+    ('zone/', 'GET'): 3,
+    ('zone/', 'POST'): 5,
+    ('zone/<int:pk>/', 'GET'): 3,
+    ('zone/<int:pk>/', 'PUT'): 8,
+    ('zone/<int:pk>/', 'DELETE'): 9,
+    ('zone/<int:pk>/rr/', 'GET'): 5,
+    ('zone/<int:pk>/allocate/', 'POST'): 25,
+    ('zone/<int:pk>/records/', 'PUT'): 24,
+    ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'GET'): 5,
+    ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'PUT'): 24,
+    ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'DELETE'): 17,
+    ('resolve/', 'GET'): 4,
+    ('rr/', 'GET'): 3,
+    ('rr/', 'POST'): 16,
+    ('rr/<int:pk>/', 'GET'): 3,
+    ('rr/<int:pk>/', 'PUT'): 9,
+    ('rr/<int:pk>/', 'DELETE'): 10,
+    ('rr/by-ip/', 'GET'): 3,
+    ('lookup/', 'GET'): 3,
+    ('permrr/grant/', 'POST'): 6,
+    ('permrr/revoke/', 'POST'): 7,
+    ('metrics', 'GET'): 0,
+    ('profile/', 'GET'): 2,
+    ('profile/<str:view>/', 'GET'): 2,
+    ('profile/<str:view>/', 'DELETE'): 2,
+}
+
+class APIQueryCountTests(APITestCase):
+    '''
+    Queries of each endpoint on a small and a big dataset (benchmarks.bench_api
+    points): a count growing with the dataset is an N+1
+    '''
+    def requests(self, point, size):
+        '''
+        (url pattern, method, user, path, data, expected status) on point,
+        a dataset of size records per zone
+        '''
+        p = point
+        zone = p.zone
+        ns = zone.namespace_id
+        empty_ns = Namespace.objects.create(name='empty')
+        empty_zone = Zone.objects.create(name='empty.example.test', namespace_id=ns,
+                                         nsmaster='ns1.example.test.', mail='hostmaster.example.test.')
+        other = zone.rr_set.filter(type='A').exclude(pk=p.rr.pk).order_by('id').first()
+        zone_data = {'namespace': ns, 'nsmaster': 'ns1.example.test.', 'mail': 'hostmaster.example.test.'}
+        # the rows changed by the sync and RRset requests grow with the
+        # dataset (size // 2 rr, at most 100: django deletes and sqlite
+        # inserts by chunks of about 100 rows): the sync replaces every rr
+        # of a zone, the RRset requests replace then delete an RRset.
+        # The sync runs as user ("rc" on the zone, with a zone rule), so
+        # that its permission checks are counted
+        changed = size // 2
+        sync_zone = Zone.objects.create(name='sync.example.test', namespace_id=ns,
+                                        nsmaster='ns1.example.test.', mail='hostmaster.example.test.')
+        rrs = Rr.objects.bulk_create([Rr(name=f'old{i}', type='A', a=address(i), zone=sync_zone) for i in range(changed)]
+                                     + [Rr(name='set', type='A', a=address(i), zone=zone) for i in range(changed)])
+        PermRr.objects.bulk_create([PermRr(obj=rr, group=p.group, action='rw') for rr in rrs])
+        PermZone.objects.create(obj=sync_zone, group=p.group, action='rc')
+        Zonerule.objects.create(zone=sync_zone, typepat='^A$', namepat='^new')
+        synced = [{'name': f'new{i}', 'type': 'A', 'a': address(changed + i)} for i in range(changed)]
+        rrset = f'/zone/{zone.id}/rrset/set/A/'
+        replaced = [{'a': address(changed + i)} for i in range(changed)]
+        return [
+            ('namespace/', 'GET', p.user, '/namespace/', None, status.HTTP_200_OK),
+            ('namespace/', 'POST', p.admin, '/namespace/', {'name': 'new'}, status.HTTP_201_CREATED),
+            ('namespace/<int:pk>/', 'GET', p.user, f'/namespace/{ns}/', None, status.HTTP_200_OK),
+            ('namespace/<int:pk>/', 'PUT', p.admin, f'/namespace/{empty_ns.id}/', {'name': 'renamed'}, status.HTTP_200_OK),
+            ('namespace/<int:pk>/', 'DELETE', p.admin, f'/namespace/{empty_ns.id}/', None, status.HTTP_204_NO_CONTENT),
+            ('zone/', 'GET', p.user, '/zone/', None, status.HTTP_200_OK),
+            ('zone/', 'POST', p.admin, '/zone/', {'name': 'new.example.test', **zone_data}, status.HTTP_201_CREATED),
+            ('zone/<int:pk>/', 'GET', p.user, f'/zone/{zone.id}/', None, status.HTTP_200_OK),
+            ('zone/<int:pk>/', 'PUT', p.admin, f'/zone/{empty_zone.id}/', {'name': 'empty.example.test', **zone_data, 'refresh': 7200}, status.HTTP_200_OK),
+            ('zone/<int:pk>/', 'DELETE', p.admin, f'/zone/{empty_zone.id}/', None, status.HTTP_204_NO_CONTENT),
+            ('zone/<int:pk>/rr/', 'GET', p.user, f'/zone/{zone.id}/rr/', None, status.HTTP_200_OK),
+            ('zone/<int:pk>/allocate/', 'POST', p.user, f'/zone/{zone.id}/allocate/', {'cidr': '10.0.0.0/16', 'name': 'alloc'}, status.HTTP_201_CREATED),
+            ('zone/<int:pk>/records/', 'PUT', p.user, f'/zone/{sync_zone.id}/records/', synced, status.HTTP_200_OK),
+            ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'GET', p.user, f'/zone/{zone.id}/rrset/host0/A/', None, status.HTTP_200_OK),
+            ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'PUT', p.user, rrset, replaced, status.HTTP_200_OK),
+            ('zone/<int:pk>/rrset/<str:name>/<str:type>/', 'DELETE', p.user, rrset, None, status.HTTP_204_NO_CONTENT),
+            ('resolve/', 'GET', p.user, f'/resolve/?fqdn=host0.{zone.name}&namespace={ns}', None, status.HTTP_200_OK),
+            ('rr/', 'GET', p.user, '/rr/', None, status.HTTP_200_OK),
+            ('rr/', 'POST', p.user, '/rr/', {'name': 'new', 'type': 'A', 'a': '192.0.2.20', 'zone': zone.id}, status.HTTP_201_CREATED),
+            ('rr/<int:pk>/', 'GET', p.user, f'/rr/{p.rr.id}/', None, status.HTTP_200_OK),
+            ('rr/<int:pk>/', 'PUT', p.user, f'/rr/{p.rr.id}/', {'name': p.rr.name, 'type': 'A', 'a': '192.0.2.30', 'zone': zone.id}, status.HTTP_200_OK),
+            ('rr/<int:pk>/', 'DELETE', p.user, f'/rr/{other.id}/', None, status.HTTP_204_NO_CONTENT),
+            ('rr/by-ip/', 'GET', p.user, '/rr/by-ip/?cidr=10.0.0.0/8', None, status.HTTP_200_OK),
+            ('lookup/', 'GET', p.user, f'/lookup/?fqdn={zone.name}&subtree=1', None, status.HTTP_200_OK),
+            ('permrr/grant/', 'POST', p.admin, '/permrr/grant/', {'group': p.group.id, 'action': 'rw', 'zone': zone.id}, status.HTTP_200_OK),
+            ('permrr/revoke/', 'POST', p.admin, '/permrr/revoke/', {'group': p.group.id, 'zone': zone.id, 'type': 'MX'}, status.HTTP_200_OK),
+            ('metrics', 'GET', None, '/metrics', None, status.HTTP_200_OK),
+            ('profile/', 'GET', p.admin, '/profile/', None, status.HTTP_200_OK),
+            ('profile/<str:view>/', 'GET', p.admin, '/profile/core.views.RrDetail/', None, status.HTTP_404_NOT_FOUND),
+            ('profile/<str:view>/', 'DELETE', p.admin, '/profile/core.views.RrDetail/', None, status.HTTP_204_NO_CONTENT),
+        ]
+
+    def count_queries(self, size):
+        '''
+        (url pattern, method) -> (queries, response) on a dataset of size
+        records per zone
+        '''
+        point = benchmark.setup_point(records_per_zone=size, groups_per_user=2, grants_per_record=2)
+        self.assertGreaterEqual(Rr.objects.filter(zone=point.zone).count(), size)
+        counts = {}
+        for pattern, method, user, path, data, expected in self.requests(point, size):
+            benchmark.reset_caches(cache)
+            if user is None:
+                self.client.logout()
+            else:
+                self.client.force_login(user)
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(self.client, method.lower())(path, data, format='json')
+            self.assertEqual(response.status_code, expected, f"{method} {path}: {response.content[:200]}")
+            counts[(pattern, method)] = len(captured)
+        return counts
+
+    def test_000_query_counts(self):
+        for size in SIZES:
+            with tempfile.TemporaryDirectory() as profiles, override_settings(DNSAPP_PROFILER_DIR=profiles), \
+                    transaction.atomic():
+                counts = self.count_queries(size)
+                transaction.set_rollback(True)
+            for key, count in counts.items():
+                with self.subTest(endpoint=key, size=size):
+                    self.assertEqual(count, QUERIES[key])
+
+    def test_001_every_endpoint_counted(self):
+        ''' every method of every url has an expected count
+        '''
+        for url in urlpatterns:
+            view = getattr(url.callback, 'view_class', None)
+            if view is None and hasattr(url, 'url_patterns'):
+                continue
+            methods = ['GET'] if view is None else [m.upper() for m in ('get', 'post', 'put', 'delete', 'patch')
+                                                    if hasattr(view, m)]
+            for method in methods:
+                self.assertIn((str(url.pattern), method), QUERIES)
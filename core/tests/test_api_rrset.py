@@ -0,0 +1,65 @@
+from rest_framework import status
+from core.models import Zone, Rr, PermRr
+from core.tests.base import ZoneTestCase
+
+class APIRrsetTests(ZoneTestCase):
+    zone_action = 'rc'
+
+    def setUp(self):
+        super().setUp()
+        self.rrs = [Rr.objects.create(name='www', type='A', a=f'192.0.9.{i}', zone=self.zone) for i in range(1, 4)]
+        for rr in self.rrs:
+            PermRr.objects.create(action='rw', group=self.group, obj=rr)
+        Rr.objects.create(name='www', type='AAAA', aaaa='2001:db8::1', zone=self.zone)
+        self.url = f'/zone/{self.zone.id}/rrset/www/A/'
+        self.client.login(username='user', password='user')
+
+    def addresses(self):
+        return sorted(rr.a for rr in Rr.objects.filter(zone=self.zone, name='www', type='A'))
+
+    def test_000_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(rr['a'] for rr in response.data), ['192.0.9.1', '192.0.9.2', '192.0.9.3'])
+        # absolute name, only readable rr
+        response = self.client.get(f'/zone/{self.zone.id}/rrset/www.example.com./AAAA/')
+        self.assertEqual(response.data, [])
+
+    def test_001_replace(self):
+        serial = Zone.objects.get(id=self.zone.id).serial
+        response = self.client.put(self.url, [{'a': '192.0.9.1'}, {'a': '192.0.9.10', 'ttl': 600}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(rr['a'] for rr in response.data), ['192.0.9.1', '192.0.9.10'])
+        self.assertEqual(self.addresses(), ['192.0.9.1', '192.0.9.10'])
+        self.assertEqual(Zone.objects.get(id=self.zone.id).serial, serial + 1)
+        # AAAA RRset untouched
+        self.assertTrue(Rr.objects.filter(name='www', type='AAAA').exists())
+
+    def test_002_replace_denied(self):
+        """ one rr of the RRset not writable by user: nothing changed
+        """
+        PermRr.objects.filter(obj=self.rrs[2]).delete()
+        response = self.client.put(self.url, [{'a': '192.0.9.10'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(self.addresses()), 3)
+
+    def test_003_delete(self):
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.addresses(), [])
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_004_invalid(self):
+        response = self.client.put(self.url, [{'a': '2001:db8::1'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(self.url, {'a': '192.0.9.1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # not a record: refused, not ignored (the RRset would be emptied)
+        response = self.client.put(self.url, ['192.0.9.1'], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(self.url, [{'a': '192.0.9.1'}, None], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.addresses()), 3)
@@ -0,0 +1,178 @@
+from unittest import mock
+from django.db import connection, IntegrityError
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from core.models import Zone, Zonerule, Rr, PermZone, PermRr, AddressPool
+from core.tests.base import ZoneTestCase
+from core.addresses import addr_key
+
+class APISyncTests(ZoneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_admin()
+        self.www = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        self.mail = Rr.objects.create(name='mail', type='A', a='192.0.9.2', ttl=3600, zone=self.zone)
+        self.old = Rr.objects.create(name='old', type='A', a='192.0.9.3', zone=self.zone)
+        self.url = f'/zone/{self.zone.id}/records/'
+
+    def records(self):
+        return sorted((rr.name, rr.type, rr.ttl, rr.rdata) for rr in Rr.objects.filter(zone=self.zone))
+
+    def test_000_sync(self):
+        """ unchanged rr kept, ttl change, new rr, removed rr; serial incremented once
+        """
+        self.client.login(username='admin', password='admin')
+        serial = Zone.objects.get(id=self.zone.id).serial
+        desired = [
+            {'name': 'www', 'type': 'A', 'a': '192.0.9.1'},
+            {'name': 'mail', 'type': 'A', 'ttl': 600, 'a': '192.0.9.2'},
+            {'name': '@', 'type': 'MX', 'prio': 10, 'mx': 'mail.example.com.'},
+            {'name': 'www', 'type': 'A', 'a': '192.0.9.1'},
+        ]
+        response = self.client.put(self.url, desired, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'inserted': 2, 'deleted': 2, 'unchanged': 1, 'serial': serial + 1})
+        self.assertEqual(self.records(), [
+            ('@', 'MX', 3600, '10 mail.example.com.'),
+            ('mail', 'A', 600, '192.0.9.2'),
+            ('www', 'A', 3600, '192.0.9.1'),
+        ])
+        self.assertTrue(Rr.objects.filter(id=self.www.id).exists())
+
+        # same set again: nothing to do
+        response = self.client.put(self.url, desired, format='json')
+        self.assertEqual(response.data, {'inserted': 0, 'deleted': 0, 'unchanged': 3, 'serial': serial + 1})
+
+    def test_001_zonefile_and_dry_run(self):
+        self.client.login(username='admin', password='admin')
+        zonefile = '$TTL 3600\nwww A 192.0.9.1\nmail A 192.0.9.2\nftp CNAME www\n'
+        response = self.client.put(f'{self.url}?dry_run=1', {'zonefile': zonefile}, format='json')
+        self.assertEqual(response.data['inserted'], 1)
+        self.assertEqual(response.data['deleted'], 1)
+        self.assertEqual(len(self.records()), 3)
+        self.assertFalse(Rr.objects.filter(name='ftp').exists())
+
+        response = self.client.put(self.url, {'zonefile': zonefile}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Rr.objects.get(name='ftp').cname, 'www.example.com.')
+        self.assertFalse(Rr.objects.filter(name='old').exists())
+
+        # existing CNAME kept
+        response = self.client.put(self.url, {'zonefile': zonefile}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unchanged'], 3)
+
+    def test_002_invalid(self):
+        self.client.login(username='admin', password='admin')
+        response = self.client.put(self.url, [{'name': 'www', 'type': 'A', 'a': 'not-an-address'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(self.url, {'zonefile': '$INCLUDE /etc/passwd\n'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # names of all records checked at once, errors by record
+        response = self.client.put(self.url, [
+            {'name': 'www', 'type': 'A', 'a': '192.0.9.1'},
+            {'name': '-www', 'type': 'MX', 'prio': 10, 'mx': 'mail..example.com.'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'name', 'mx'})
+        response = self.client.put(self.url, [
+            {'name': 'ftp', 'type': 'CNAME', 'cname': 'www'},
+            {'name': 'ftp', 'type': 'A', 'a': '192.0.9.9'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.records()), 3)
+
+    def test_003_permissions(self):
+        """ user may create in zone and write www and mail, not old
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.zone)
+        PermRr.objects.create(action='rw', group=self.group, obj=self.www)
+        PermRr.objects.create(action='rw', group=self.group, obj=self.mail)
+        self.client.login(username='user', password='user')
+
+        keep_old = {'name': 'old', 'type': 'A', 'a': '192.0.9.3'}
+        response = self.client.put(self.url, [
+            {'name': 'www', 'type': 'A', 'a': '192.0.9.10'},
+            {'name': 'new', 'type': 'A', 'a': '192.0.9.11'},
+            keep_old,
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        new = Rr.objects.get(name='new')
+        self.assertTrue(PermRr.objects.filter(obj=new, group=self.group, action='rw').exists())
+
+        # deleting old is denied: nothing changed
+        response = self.client.put(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(self.records()), 3)
+
+        # adding a rr to the RRset of old is denied
+        response = self.client.put(self.url, [keep_old, {'name': 'old', 'type': 'A', 'a': '192.0.9.12'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_004_no_read_permission(self):
+        self.client.login(username='user', password='user')
+        response = self.client.put(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_005_delete_queries(self):
+        """ deleting rr (with permissions and addresses) costs the same
+        queries whatever their number
+        """
+        self.client.login(username='admin', password='admin')
+        pool = AddressPool.objects.create(namespace=self.zone.namespace, network='198.51.100.0/24',
+                                          first=addr_key('198.51.100.1'), last=addr_key('198.51.100.254'),
+                                          hint=addr_key('198.51.100.254'))
+        counts = []
+        for count in (10, 100):
+            rrs = Rr.objects.bulk_create([Rr(name=f'h{i}', type='A', a=f'198.51.100.{i + 1}', zone=self.zone)
+                                          for i in range(count)])
+            PermRr.objects.bulk_create([PermRr(obj=rr, group=self.group, action='rw') for rr in rrs])
+            pool.hint = addr_key('198.51.100.254')
+            pool.save()
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.put(self.url, [], format='json')
+            self.assertEqual(response.data['deleted'], count + (3 if count == 10 else 0))
+            counts.append(len(captured))
+            self.assertEqual(self.records(), [])
+            self.assertFalse(PermRr.objects.exists())
+            pool.refresh_from_db()
+            self.assertEqual(pool.hint, addr_key('198.51.100.1'))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_006_permission_queries(self):
+        """ permissions of user (zone rules included) cost the same
+        queries whatever the number of changed RRsets
+        """
+        PermZone.objects.create(action='rc', group=self.group, obj=self.zone)
+        Zonerule.objects.create(zone=self.zone, typepat='^A$', namepat='.*')
+        PermRr.objects.bulk_create([PermRr(action='rw', group=self.group, obj=rr) for rr in (self.www, self.mail, self.old)])
+        self.client.login(username='user', password='user')
+        counts = []
+        for count in (10, 100):
+            desired = [{'name': f'h{count}-{i}', 'type': 'A', 'a': '192.0.9.1'} for i in range(count)]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.put(self.url, desired, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['inserted'], count)
+            counts.append(len(captured))
+        self.assertEqual(counts[0], counts[1])
+
+        # denied by rule
+        response = self.client.put(self.url, [{'name': '@', 'type': 'MX', 'prio': 10, 'mx': 'mail.example.com.'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_007_other_integrity_error(self):
+        """ CNAME conflict -> 400, other integrity error -> raised as is
+        """
+        self.client.login(username='admin', password='admin')
+        response = self.client.put(self.url, [
+            {'name': 'www', 'type': 'A', 'a': '192.0.9.1'},
+            {'name': 'www', 'type': 'CNAME', 'cname': 'host.example.com.'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with mock.patch('core.sync.set_perms', side_effect=IntegrityError('NOT NULL constraint failed')):
+            with self.assertRaises(IntegrityError):
+                self.client.put(self.url, [{'name': 'new', 'type': 'A', 'a': '192.0.9.4'}], format='json')
+        self.assertEqual(len(self.records()), 3)
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from rest_framework import status
+from core.models import Zone, Rr, PermZone, PermRr, User
+from core.tests.base import ZoneTestCase
+
+class APIZoneCacheTests(ZoneTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.other = self.create_zone('example.net')
+        for i in range(3):
+            Rr.objects.create(name=f'h{i}', type='A', a=f'192.0.9.{i}', zone=self.zone)
+        Rr.objects.create(name='www', type='A', a='192.0.9.10', zone=self.other)
+        self.url = f'/zone/{self.zone.id}/rr/'
+        self.client.login(username='user', password='user')
+
+    def test_000_serial_incremented(self):
+        """ serial incremented by rr changes and zone save, never decremented
+        """
+        serial = Zone.objects.get(id=self.zone.id).serial
+        rr = Rr.objects.create(name='h9', type='A', a='192.0.9.9', zone=self.zone)
+        rr.delete()
+        Rr.objects.bulk_create([Rr(name=f'b{i}', type='A', a='192.0.9.20', zone=self.zone) for i in range(3)])
+        self.assertEqual(Zone.objects.get(id=self.zone.id).serial, serial + 3)
+
+        zone = Zone.objects.get(id=self.zone.id)
+        zone.serial = 1
+        zone.save()
+        self.assertEqual(zone.serial, serial + 4)
+        # explicit serial greater than the current one: kept as is
+        zone.serial = 2025010100
+        zone.save()
+        self.assertEqual(zone.serial, 2025010100)
+        self.client.logout()
+        admin = User.objects.create(username='admin', is_superuser=True, default_pref=Group.objects.create(name='admins'))
+        self.client.force_login(admin)
+        data = {'name': zone.name, 'namespace': zone.namespace_id, 'nsmaster': zone.nsmaster, 'mail': zone.mail}
+        response = self.client.put(f'/zone/{zone.id}/', {**data, 'serial': 2025020100}, format='json')
+        self.assertEqual(response.data['serial'], 2025020100)
+        response = self.client.put(f'/zone/{zone.id}/', {**data, 'serial': 2025020100}, format='json')
+        self.assertEqual(response.data['serial'], 2025020101)
+
+    def test_001_generate_cached(self):
+        """ generate permission: rr of this zone only, second request
+            served from cache, new rr visible
+        """
+        PermZone.objects.create(action='g', group=self.group, obj=self.zone)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(rr['name'] for rr in response.data), ['h0', 'h1', 'h2'])
+
+        # session, user, zone with its permission: no rr query
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(response.data), 3)
+
+        Rr.objects.create(name='h3', type='A', a='192.0.9.3', zone=self.zone)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 4)
+
+        response = self.client.get(self.url, {'fields': 'name'})
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+
+    def test_002_read_permission_scope(self):
+        """ rr read permission: cache entry per permission scope
+        """
+        rrs = list(Rr.objects.filter(zone=self.zone).order_by('name'))
+        PermRr.objects.create(action='r', group=self.group, obj=rrs[0])
+        response = self.client.get(self.url)
+        self.assertEqual([rr['name'] for rr in response.data], ['h0'])
+
+        PermRr.objects.create(action='r', group=self.group, obj=rrs[1])
+        response = self.client.get(self.url)
+        self.assertEqual(sorted(rr['name'] for rr in response.data), ['h0', 'h1'])
+
+        # another user, other groups: not served from the first user cache
+        group = Group.objects.create(name='other')
+        other = self.create_user('other', group)
+        group.user_set.add(other)
+        self.client.login(username='other', password='other')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, [])
+
+    def test_003_rr_moved_to_another_zone(self):
+        """ rr moved by PUT /rr/<pk>/: both zone listings change
+        """
+        for zone in (self.zone, self.other):
+            PermZone.objects.create(action='g', group=self.group, obj=zone)
+        other_url = f'/zone/{self.other.id}/rr/'
+        self.assertEqual(len(self.client.get(self.url).data), 3)
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+        serials = {z.id: z.serial for z in Zone.objects.all()}
+
+        self.create_admin()
+        self.client.force_login(self.admin)
+        rr = Rr.objects.get(name='h0')
+        response = self.client.put(f'/rr/{rr.id}/', {'name': 'h0', 'type': 'A', 'a': '192.0.9.0', 'zone': self.other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for zone in Zone.objects.all():
+            self.assertEqual(zone.serial, serials[zone.id] + 1)
+
+        self.client.force_login(self.user)
+        self.assertEqual(sorted(rr['name'] for rr in self.client.get(self.url).data), ['h1', 'h2'])
+        self.assertEqual(sorted(rr['name'] for rr in self.client.get(other_url).data), ['h0', 'www'])
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+from argparse import Namespace
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from django.test import TestCase
+from benchmarks import bench_api as benchmark, common
+from core.models import Rr, User
+
+class BenchmarkTests(TestCase):
+    def test_000_points(self):
+        points = list(benchmark.points({"records_per_zone": [10, 100], "grants_per_record": [3]}))
+        self.assertEqual([(axis, value) for axis, value, _ in points],
+                         [("records_per_zone", 10), ("records_per_zone", 100), ("grants_per_record", 3)])
+        self.assertEqual(points[2][2], {**benchmark.BASELINE, "grants_per_record": 3})
+
+    def test_001_run_point(self):
+        point = benchmark.setup_point(records_per_zone=20, groups_per_user=3, grants_per_record=2)
+        self.assertEqual(Rr.objects.filter(zone=point.zone).count(), 20)
+        self.assertEqual(point.user.groups.count(), 4)
+        self.assertTrue(User.objects.get(username="bench-admin").is_superuser)
+
+        results = benchmark.run_point(point, [benchmark.ClientTransport()], 2)
+        scenarios = {r["scenario"]: r for r in results}
+        self.assertEqual(set(scenarios), set(benchmark.HTTP_SCENARIOS) | set(benchmark.HELPER_SCENARIOS))
+        for result in results:
+            self.assertEqual(result["errors"], 0, result["scenario"])
+            self.assertLessEqual(result["min_ms"], result["median_ms"])
+            self.assertGreater(result["queries"], 0, result["scenario"])
+
+        results = benchmark.run_point(point, [], 2, ["check_can_get"])
+        self.assertEqual([r["scenario"] for r in results], ["check_can_get"])
+
+    def test_002_compare(self):
+        old = [{"axis": "records_per_zone", "value": 10, "transport": "client", "scenario": s, "median_ms": 10.0}
+               for s in ("a", "b")]
+        new = [{**old[0], "median_ms": 12.0}, {**old[1], "median_ms": 13.0},
+               {**old[1], "scenario": "c", "median_ms": 100.0}]
+        self.assertEqual(common.compare(old, new, benchmark.KEY, "median_ms"),
+                         [(("records_per_zone", 10, "client", "b"), 10.0, 13.0)])
+        self.assertEqual(len(common.compare(old, new, benchmark.KEY, "median_ms", threshold=1.1)), 2)
+
+    def test_003_run_micro(self):
+        self.assertIn('mx0.example.test.', benchmark.record_names(300))
+        results = benchmark.run_micro(200, 2)
+        self.assertEqual([r["scenario"] for r in results], list(benchmark.MICRO_SCENARIOS))
+        self.assertEqual([r["errors"] for r in results], [0, 0])
+
+    def test_004_report(self):
+        """ one result format for every benchmark: written by report, read
+            back by --compare -> regression is an error
+        """
+        results = [{"fields": "all", "view_s": 0.5}, {"fields": "name", "view_s": 0.1}]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.json")
+            args = Namespace(repeat=3, json=path, compare=None, old=None, threshold=1.25)
+            with redirect_stdout(StringIO()):
+                common.report("rr_list_fields", results, args, ("fields",), "view_s")
+            with open(path) as f:
+                data = json.load(f)
+        self.assertEqual(data["benchmark"], "rr_list_fields")
+        self.assertEqual(data["results"], results)
+        self.assertEqual(data["meta"]["options"], {"repeat": 3, "threshold": 1.25})
+        self.assertIn("revision", data["meta"])
+
+        args = Namespace(json=None, compare="old.json", old=data, threshold=1.25)
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            common.report("rr_list_fields", results, args, ("fields",), "view_s")
+            with self.assertRaises(SystemExit):
+                common.report("rr_list_fields", [{"fields": "all", "view_s": 0.8}], args, ("fields",), "view_s")
+            with self.assertRaises(SystemExit):
+                common.report("rr_by_ip", results, args, ("fields",), "view_s")
@@ -0,0 +1,64 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from core.models import Namespace, Zone, Rr, PermNamespace, PermZone, PermRr, User
+from core.permissions import get_allowed_rrs
+from core.rdata import decode
+from core.serializers import RrSerializer
+from core.sync import parse_records, plan_sync
+
+class GenDataTests(TestCase):
+    def records(self, prefix):
+        return list(Rr.objects.filter(zone__namespace__name__startswith=prefix)
+                    .order_by('zone__name', 'id').values_list('zone__name', 'name', 'type', 'ttl', 'rdata'))
+
+    def test_000_gendata(self):
+        out = StringIO()
+        call_command('gendata', '--namespaces', '2', '--zones', '5', '--records', '503', '--groups', '4',
+                     '--users', '3', '--grants-per-record', '2', '--seed', '7', stdout=out)
+        self.assertIn('2 namespaces, 5 zones, 503 records, 4 groups, 3 users', out.getvalue())
+        self.assertEqual(Namespace.objects.count(), 2)
+        self.assertEqual(Zone.objects.count(), 5)
+        self.assertEqual(Rr.objects.count(), 503)
+        self.assertEqual(sorted(z.rr_set.count() for z in Zone.objects.all()), [100, 100, 101, 101, 101])
+        self.assertEqual(PermRr.objects.count(), 2 * 503)
+        self.assertEqual(PermZone.objects.count(), 10)
+        self.assertTrue(PermNamespace.objects.exists())
+
+        types = dict.fromkeys(Rr.objects.values_list('type', flat=True))
+        self.assertEqual(set(types), {'NS', 'A', 'AAAA', 'CNAME', 'TXT', 'MX', 'SRV'})
+        # generated records are valid
+        for rr in Rr.objects.all()[:200]:
+            self.assertTrue(decode(rr.type, rr.rdata), rr.rdata)
+        self.assertTrue(RrSerializer(data=RrSerializer(Rr.objects.filter(type='MX').first()).data).is_valid())
+
+        # users can log in and see the records of their groups
+        user = User.objects.get(username='gen-user0')
+        self.assertTrue(user.check_password('gendata'))
+        self.assertIn(user.default_pref, user.groups.all())
+        self.assertTrue(get_allowed_rrs(user, 'r').exists())
+
+        with self.assertRaises(CommandError):
+            call_command('gendata', stdout=out)
+
+    def test_001_deterministic(self):
+        out = StringIO()
+        for prefix, seed in [('a', 1), ('b', 1), ('c', 2)]:
+            call_command('gendata', '--prefix', prefix, '--zones', '3', '--records', '300', '--seed', str(seed), stdout=out)
+        self.assertEqual(self.records('a'), self.records('b'))
+        self.assertNotEqual(self.records('a'), self.records('c'))
+
+    def test_002_canonical_rdata(self):
+        ''' rdata as stored by the API: a zone synchronized with its own
+            records is unchanged
+        '''
+        call_command('gendata', '--zones', '1', '--records', '300', stdout=StringIO())
+        zone = Zone.objects.get()
+        kept = zone.rr_set.exclude(type__in=('SRV', 'CNAME'))
+        records = [{**RrSerializer(rr).data} for rr in kept]
+        for record in records:
+            del record['id'], record['zone']
+        plan = plan_sync(zone, parse_records(zone, records))
+        self.assertEqual(len(plan.inserts), 0)
+        self.assertEqual(len(plan.deletes), zone.rr_set.count() - kept.count())
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from core.models import Namespace, Zone, Rr
+from core import importer
+
+ZONE = '''$ORIGIN example.com.
+$TTL 3600
+@       IN SOA ns1.example.com. hostmaster.example.com. ( 2020010101 1200 180 1209600 300 )
+        IN NS  ns1
+        IN MX  10 mail
+ns1     IN A   192.0.9.1
+www 600 IN A   192.0.9.2
+        IN AAAA 2001:db8::2
+mail    IN A   192.0.9.3
+ftp     IN CNAME www
+_sip._udp IN SRV 0 5 5060 sip.example.net.
+@       IN TXT "v=spf1 " "mx -all"
+@       IN CAA 0 issue "letsencrypt.org"
+www     IN HINFO "PC" "Linux"
+'''
+
+class ImportZoneTests(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(name='namespace')
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write(ZONE)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_000_import(self):
+        out = StringIO()
+        call_command('importzone', 'namespace', 'example.com', self.path, '--batch-size', '3', stdout=out)
+        self.assertIn('zone example.com: 10 rr imported', out.getvalue())
+        self.assertIn('skipped 1 HINFO', out.getvalue())
+
+        zone = Zone.objects.get(name='example.com')
+        self.assertEqual((zone.nsmaster, zone.mail, zone.minttl), ('ns1.example.com.', 'hostmaster.example.com.', 300))
+        # serial of the file, whatever the number of batches
+        self.assertEqual(zone.serial, 2020010101)
+
+        rrs = {(rr.name, rr.type): rr for rr in zone.rr_set.all()}
+        self.assertEqual(len(rrs), 10)
+        self.assertEqual(rrs[('www', 'A')].ttl, 600)
+        self.assertEqual(rrs[('www', 'AAAA')].aaaa, '2001:db8::2')
+        self.assertEqual(rrs[('@', 'MX')].mx, 'mail.example.com.')
+        self.assertEqual(rrs[('@', 'MX')].prio, 10)
+        self.assertEqual(rrs[('ftp', 'CNAME')].cname, 'www.example.com.')
+        self.assertEqual(rrs[('_sip._udp', 'SRV')].srv_port, 5060)
+        self.assertEqual(rrs[('@', 'TXT')].txt, 'v=spf1 mx -all')
+        self.assertEqual(rrs[('@', 'CAA')].caa_value, 'letsencrypt.org')
+        self.assertEqual(rrs[('www', 'A')].fqdn, 'www.example.com.')
+
+    def test_001_zone_not_empty(self):
+        call_command('importzone', 'namespace', 'example.com', self.path, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('importzone', 'namespace', 'example.com', self.path, stdout=StringIO())
+        self.assertEqual(Rr.objects.count(), 10)
+
+    def test_002_invalid_file(self):
+        with open(self.path, 'a') as f:
+            f.write('bad IN A not-an-address\n')
+        with self.assertRaises(CommandError):
+            call_command('importzone', 'namespace', 'example.com', self.path, stdout=StringIO())
+        self.assertFalse(Zone.objects.filter(name='example.com').exists())
+
+
+class ImportZonesTests(TransactionTestCase):
+    """ writers use their own connection and transaction: data must be committed
+    """
+    def setUp(self):
+        Namespace.objects.create(name='namespace')
+        self.dir = tempfile.mkdtemp()
+        for zone in ('example.com', 'example.org'):
+            with open(os.path.join(self.dir, zone), 'w') as f:
+                f.write(ZONE.replace('example.com', zone))
+        with open(os.path.join(self.dir, 'broken.example'), 'w') as f:
+            f.write(ZONE.replace('example.com', 'broken.example') + 'bad IN A not-an-address\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_000_directory(self):
+        """ a broken zone file does not abort the others
+        """
+        out = StringIO()
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 zones failed: broken.example'):
+            call_command('importzones', 'namespace', '--directory', self.dir, '--jobs', '2', stdout=out, stderr=err)
+        self.assertIn('2 zones, 20 rr imported', out.getvalue())
+        self.assertIn('zone broken.example: failed', err.getvalue())
+        self.assertEqual(Rr.objects.filter(zone__name='example.org').count(), 10)
+        self.assertFalse(Zone.objects.filter(name='broken.example').exists())
+
+    def test_001_manifest(self):
+        manifest = os.path.join(self.dir, 'manifest')
+        with open(manifest, 'w') as f:
+            f.write('# zones\nexample.com example.com\nexample.org. example.org\n')
+        out = StringIO()
+        call_command('importzones', 'namespace', '--manifest', manifest, stdout=out)
+        self.assertIn('2 zones, 20 rr imported', out.getvalue())
+        self.assertEqual(Rr.objects.count(), 20)
+
+    def test_002_writer_pool(self):
+        """ zones are written by a fixed pool of writers (one on SQLite)
+        """
+        for i in range(5):
+            with open(os.path.join(self.dir, f'z{i}.example'), 'w') as f:
+                f.write(ZONE.replace('example.com', f'z{i}.example'))
+        zones = [(name, os.path.join(self.dir, name)) for name in sorted(os.listdir(self.dir))]
+        with mock.patch('core.importer.ZoneWriter', wraps=importer.ZoneWriter) as writer:
+            results = importer.import_zone_files(Namespace.objects.get(), zones, jobs=4)
+        self.assertEqual(writer.call_count, 1)
+        self.assertEqual(len(results), 8)
+        self.assertIsInstance(results['broken.example'], importer.ZoneImportError)
+        self.assertEqual(Rr.objects.filter(zone__name='z4.example').count(), 10)
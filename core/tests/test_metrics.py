@@ -0,0 +1,69 @@
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from rest_framework import status
+from core.models import Rr
+from core.tests.base import ZoneTestCase
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class MetricsTests(ZoneTestCase):
+    zone_action = 'rg'
+
+    def setUp(self):
+        super().setUp()
+        Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        self.client.login(username='user', password='user')
+
+    def test_000_request_metrics(self):
+        view = {'view': 'core.views.ZoneRrList', 'method': 'GET'}
+        requests = sample('dnsapp_request_duration_seconds_count', **view)
+        queries = sample('dnsapp_request_queries_sum', **view)
+        hits = sample('dnsapp_cache_requests_total', cache='zone', result='hit')
+        misses = sample('dnsapp_cache_requests_total', cache='zone', result='miss')
+
+        self.client.get(f'/zone/{self.zone.id}/rr/')
+        self.client.get(f'/zone/{self.zone.id}/rr/')
+        self.assertEqual(sample('dnsapp_request_duration_seconds_count', **view), requests + 2)
+        self.assertGreater(sample('dnsapp_request_queries_sum', **view), queries)
+        self.assertEqual(sample('dnsapp_cache_requests_total', cache='zone', result='miss'), misses + 1)
+        self.assertEqual(sample('dnsapp_cache_requests_total', cache='zone', result='hit'), hits + 1)
+
+    def test_001_check_and_validation_metrics(self):
+        denied = sample('dnsapp_permission_checks_total', check='PermCheck.can_create_record', result='denied')
+        validations = sample('dnsapp_validation_duration_seconds_count', serializer='RrSerializer')
+
+        response = self.client.post('/rr/', {'name': 'web', 'type': 'A', 'a': '192.0.9.2', 'zone': self.zone.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(sample('dnsapp_permission_checks_total', check='PermCheck.can_create_record', result='denied'), denied + 1)
+        self.assertEqual(sample('dnsapp_validation_duration_seconds_count', serializer='RrSerializer'), validations + 1)
+
+    def test_002_endpoint(self):
+        self.client.get(f'/zone/{self.zone.id}/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('dnsapp_request_duration_seconds_bucket{le="0.005",method="GET",view="core.views.ZoneDetail"}', body)
+        self.assertIn('dnsapp_permission_check_duration_seconds_count', body)
+
+    @override_settings(DNSAPP_METRICS_ALLOWED_IPS=['192.0.2.0/24'])
+    def test_003_endpoint_access(self):
+        """ /metrics: addresses of DNSAPP_METRICS_ALLOWED_IPS and superusers
+            -> others denied, not found when metrics are off
+        """
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+        response = self.client.get('/metrics', REMOTE_ADDR='192.0.2.7')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/metrics', REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.create_admin()
+        self.client.login(username='admin', password='admin')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.settings(DNSAPP_METRICS=False):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,51 @@
+from django.test import TestCase
+from core.models import Namespace, Zone, Rr
+from core.serializers import RrSerializer
+from core import rdata
+
+class RrRdataTests(TestCase):
+    def setUp(self):
+        n = Namespace.objects.create(name='default')
+        n.save()
+        self.z = Zone.objects.create(name='example.com',namespace=n)
+        self.z.save()
+
+    def test_000_pack_and_unpack(self):
+        r = Rr.objects.create(name="srv", zone=self.z, type="SRV", srv_priority=0, srv_weight=5, srv_port=5060, srv_target="sip.example.com.")
+        self.assertEqual(r.rdata, "0 5 5060 sip.example.com.")
+        r = Rr.objects.get(pk=r.pk)
+        self.assertEqual(r.srv_port, 5060)
+        self.assertEqual(r.srv_target, "sip.example.com.")
+        self.assertIsNone(r.a)
+
+    def test_001_last_field_with_spaces(self):
+        r = Rr.objects.create(name="txt", zone=self.z, type="TXT", txt="v=spf1 mx -all")
+        r = Rr.objects.get(pk=r.pk)
+        self.assertEqual(r.txt, "v=spf1 mx -all")
+        self.assertEqual(rdata.decode("CAA", "0 issue a b"), {"caa_flag": 0, "caa_tag": "issue", "caa_value": "a b"})
+
+    def test_002_update_one_field(self):
+        r = Rr.objects.create(name="mx", zone=self.z, type="MX", prio=10, mx="mx1.example.com.")
+        r.mx = "mx2.example.com."
+        r.save()
+        r = Rr.objects.get(pk=r.pk)
+        self.assertEqual(r.rdata, "10 mx2.example.com.")
+
+    def test_003_serializer(self):
+        r = Rr.objects.create(name="mx", zone=self.z, type="MX", prio=10, mx="mx1.example.com.")
+        data = RrSerializer(r).data
+        self.assertEqual(data['prio'], 10)
+        self.assertEqual(data['mx'], "mx1.example.com.")
+        self.assertIsNone(data['a'])
+
+    def test_004_whitespace_in_field(self):
+        """ whitespace only in the last field, which reads back as written
+        """
+        r = Rr.objects.create(name="caa", zone=self.z, type="CAA", caa_flag=0, caa_tag="issue", caa_value="ca.example.net; account=1 2")
+        r = Rr.objects.get(pk=r.pk)
+        self.assertEqual((r.caa_flag, r.caa_tag, r.caa_value), (0, "issue", "ca.example.net; account=1 2"))
+        with self.assertRaises(ValueError):
+            Rr.objects.create(name="caa", zone=self.z, type="CAA", caa_flag=0, caa_tag="is sue", caa_value="x")
+        serializer = RrSerializer(data={'name': 'caa', 'type': 'CAA', 'zone': self.z.id, 'caa_flag': 0, 'caa_tag': 'is sue', 'caa_value': 'x'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('caa_tag', serializer.errors)
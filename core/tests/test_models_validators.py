@@ -1,5 +1,6 @@
 from django.test import TestCase
 from core.models import Namespace, Zone, Rr
+from core.validators import ValidateRrName, ValidateRelativeName, ValidateHostname, validate_many
 from rest_framework.exceptions import ValidationError
 
 import sys
@@ -69,3 +70,30 @@ class RrModelValidator(TestCase):
 
         raise ValidationError(detail=f"Relative name must be '@', '*' or an alpha-numeric string")
         raise ValidationError(detail=f"Absolute name '{name}' is too long (length must be <= 255)")
+
+class NameValidatorTests(TestCase):
+    def test_000_validate_many(self):
+        names = ['www', 'www', 'mail.example.com.', '_dmarc', '*.lab', '-www', 'a..b', 'a..example.com.', '.']
+        errors = validate_many(names)
+        self.assertEqual(set(errors), {'-www', 'a..b', 'a..example.com.', '.'})
+        self.assertEqual(errors['-www'], "Relative name '-www' must not start or end with dash or dot")
+        self.assertEqual(errors['a..b'], "Relative name 'a..b' can not contain two successive dots")
+        self.assertEqual(errors['.'], "Absolute name '.' can not contain an empty label")
+        self.assertEqual(validate_many(['www', 'mail.'], ValidateRelativeName), {'mail.': "Relative name 'mail.' must not start or end with dash or dot"})
+
+    def test_001_same_result_one_by_one(self):
+        names = ['a' * 64, 'a' * 65, f"{'a' * 63}.", f"{'a' * 64}.", f"{'a' * 63}.{'b' * 63}.{'c' * 63}.{'d' * 63}.",
+                 f"{'a' * 63}.{'b' * 63}.{'c' * 63}.{'d' * 64}.", '_a.b', 'a._b.', 'a-.b.', '@', '@.', '*', '*.a', 'a.*', '']
+        errors = validate_many(names)
+        for name in names:
+            try:
+                ValidateRrName(name)
+                self.assertNotIn(name, errors)
+            except ValidationError as e:
+                self.assertEqual(errors[name], e.detail[0])
+
+    def test_002_hostname(self):
+        ValidateHostname('www.lab')
+        for name in ('_www', 'www.l_b', '_www.example.com.'):
+            with self.assertRaises(ValidationError):
+                ValidateHostname(name)
@@ -0,0 +1,96 @@
+from unittest import mock
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from core.models import Zonerule, Rr, PermZone, PermRr, Pref
+from core.tests.base import ZoneTestCase
+from core.permissions import set_perms
+from core import prefs
+from core.prefs import resolve_prefs
+
+class PrefTests(ZoneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ops = Group.objects.create(name='ops')
+        self.audit = Group.objects.create(name='audit')
+        self.other = self.create_zone('example.net')
+        for zone in (self.zone, self.other):
+            PermZone.objects.create(action='rc', group=self.group, obj=zone)
+            Zonerule.objects.create(zone=zone, typepat='^A$', namepat='.*')
+        self.client.login(username='user', password='user')
+
+    def perms(self, name):
+        return sorted(PermRr.objects.filter(obj__name=name).values_list('group__name', 'action'))
+
+    def test_000_create_with_prefs(self):
+        Pref.objects.create(user=self.user, zone=self.zone, group=self.ops, action='rw')
+        Pref.objects.create(user=self.user, zone=self.zone, group=self.audit, action='r')
+        response = self.client.post('/rr/', {'name': 'www', 'type': 'A', 'a': '192.0.9.1', 'zone': self.zone.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.perms('www'), [('audit', 'r'), ('ops', 'rw')])
+
+        # no pref for this zone: default_pref
+        response = self.client.post('/rr/', {'name': 'web', 'type': 'A', 'a': '192.0.9.1', 'zone': self.other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.perms('web'), [('group', 'rw')])
+
+    def test_001_cache(self):
+        Pref.objects.create(user=self.user, zone=self.zone, group=self.ops, action='rw')
+        resolve_prefs(self.user, self.zone.id)
+        # prefs of all zones of the user are loaded at once
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.ops.id, 'rw'),))
+            self.assertEqual(resolve_prefs(self.user, self.other.id), ())
+
+        # invalidated on change
+        Pref.objects.create(user=self.user, zone=self.other, group=self.audit, action='r')
+        self.assertEqual(resolve_prefs(self.user, self.other.id), ((self.audit.id, 'r'),))
+        Pref.objects.filter(zone=self.zone).get().delete()
+        self.assertEqual(resolve_prefs(self.user, self.zone.id), ())
+
+    def test_002_bulk(self):
+        Pref.objects.create(user=self.user, zone=self.zone, group=self.ops, action='rw')
+        rrs = Rr.objects.bulk_create([Rr(name=f'host{i}', type='A', a=f'192.0.9.{i}', zone=self.zone) for i in range(20)])
+        resolve_prefs(self.user, self.zone.id)
+        # PermZoneRr lookup + insert, whatever the number of rr
+        with self.assertNumQueries(2):
+            set_perms(self.user, self.zone.id, rrs, 'rw')
+        self.assertEqual(PermRr.objects.filter(group=self.ops, action='rw').count(), 20)
+
+    @override_settings(DNSAPP_PREFS_CACHE_SIZE=2)
+    def test_003_cache_size(self):
+        """ prefs of the least recently seen user dropped first
+        """
+        users = [self.user] + [self.create_user(f'user{i}', Group.objects.create(name=f'group{i}')) for i in range(2)]
+        resolve_prefs(users[0], self.zone.id)
+        resolve_prefs(users[1], self.zone.id)
+        with self.assertNumQueries(0):
+            resolve_prefs(users[0], self.zone.id)
+        resolve_prefs(users[2], self.zone.id)
+        with self.assertNumQueries(0):
+            resolve_prefs(users[0], self.zone.id)
+            resolve_prefs(users[2], self.zone.id)
+        with self.assertNumQueries(1):
+            resolve_prefs(users[1], self.zone.id)
+
+    def test_004_other_process(self):
+        """ Pref changed by another process: seen through the version in
+            the shared cache, or after DNSAPP_PREFS_CACHE_TIMEOUT without it
+        """
+        pref = Pref.objects.create(user=self.user, zone=self.zone, group=self.ops, action='rw')
+        self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.ops.id, 'rw'),))
+        # changed without signal (queryset update), then the other
+        # process increments the version
+        Pref.objects.filter(id=pref.id).update(group=self.audit)
+        self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.ops.id, 'rw'),))
+        cache.incr(prefs.VERSION_KEY)
+        self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.audit.id, 'rw'),))
+
+        # version not shared: reloaded after the timeout
+        Pref.objects.filter(id=pref.id).update(action='r')
+        now = prefs.time.monotonic()
+        with mock.patch('core.prefs.time.monotonic', return_value=now + 30):
+            self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.audit.id, 'rw'),))
+        with mock.patch('core.prefs.time.monotonic', return_value=now + 61):
+            self.assertEqual(resolve_prefs(self.user, self.zone.id), ((self.audit.id, 'r'),))
@@ -0,0 +1,92 @@
+import os
+import marshal
+import pstats
+import shutil
+import tempfile
+from django.test import override_settings
+from rest_framework import status
+from core.models import Rr, PermRr
+from core.tests.base import ZoneTestCase
+from core import profiler
+
+class ProfilerTests(ZoneTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        super().setUp()
+        self.create_admin()
+        self.rr = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        PermRr.objects.create(action='r', group=self.group, obj=self.rr)
+
+    def tearDown(self):
+        profiler._stats.clear()
+        shutil.rmtree(self.dir)
+
+    def test_000_disabled(self):
+        with override_settings(DNSAPP_PROFILER_DIR=self.dir, DNSAPP_PROFILER_RATE=1.0):
+            self.client.login(username='admin', password='admin')
+            self.client.get(f'/rr/{self.rr.id}/', HTTP_X_PROFILE='1')
+            self.assertEqual(profiler.profiled_views(), [])
+
+    def test_001_header_and_download(self):
+        with override_settings(DNSAPP_PROFILER=True, DNSAPP_PROFILER_DIR=self.dir):
+            # header ignored for non superusers
+            self.client.login(username='user', password='user')
+            self.client.get(f'/rr/{self.rr.id}/', HTTP_X_PROFILE='1')
+            self.assertEqual(profiler.profiled_views(), [])
+
+            self.client.login(username='admin', password='admin')
+            self.client.get(f'/rr/{self.rr.id}/')
+            self.assertEqual(profiler.profiled_views(), [])
+            for _ in range(2):
+                self.client.get(f'/rr/{self.rr.id}/', HTTP_X_PROFILE='1')
+            response = self.client.get('/profile/')
+            self.assertEqual(response.data, ['core.views.RrDetail'])
+
+            response = self.client.get('/profile/core.views.RrDetail/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            stats = marshal.loads(response.content)
+            get = [v for (file, line, name), v in stats.items() if file.endswith('views.py') and name == 'get']
+            # primitive calls of RrDetail.get
+            self.assertEqual(get[0][0], 2)
+
+            response = self.client.get('/profile/core.views.RrDetail/', {'output': 'text'})
+            self.assertIn('cumulative', response.content.decode())
+
+            response = self.client.delete('/profile/core.views.RrDetail/')
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            response = self.client.get('/profile/core.views.RrDetail/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+            self.client.login(username='user', password='user')
+            response = self.client.get('/profile/')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_002_rate(self):
+        with override_settings(DNSAPP_PROFILER=True, DNSAPP_PROFILER_DIR=self.dir, DNSAPP_PROFILER_RATE=1.0):
+            self.client.login(username='user', password='user')
+            self.client.get(f'/rr/{self.rr.id}/')
+            self.assertEqual(profiler.profiled_views(), ['core.views.RrDetail'])
+            self.assertIsInstance(profiler.load('core.views.RrDetail'), pstats.Stats)
+
+    def test_003_outside_profile_dir(self):
+        ''' view names never reach outside of the profile directory
+        '''
+        profiles = f'{self.dir}/profiles'
+        with open(f'{self.dir}/other.prof', 'w'), open(f'{self.dir}/other', 'w'):
+            pass
+        with override_settings(DNSAPP_PROFILER=True, DNSAPP_PROFILER_DIR=profiles):
+            self.client.login(username='admin', password='admin')
+            self.client.get(f'/rr/{self.rr.id}/', HTTP_X_PROFILE='1')
+            for view in ('%2E%2E', '%2E', 'core..views', '.core'):
+                response = self.client.delete(f'/profile/{view}/')
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                response = self.client.get(f'/profile/{view}/')
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertEqual(sorted(os.listdir(self.dir)), ['other', 'other.prof', 'profiles'])
+
+            # only profiles are removed
+            with open(f'{profiles}/core.views.RrDetail/notes', 'w'):
+                pass
+            response = self.client.delete('/profile/core.views.RrDetail/')
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            self.assertEqual(os.listdir(f'{profiles}/core.views.RrDetail'), ['notes'])
@@ -0,0 +1,100 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from core.models import Namespace, Zone, Rr
+
+@override_settings(DNSAPP_AUTO_PTR=True)
+class AutoPtrTests(TestCase):
+    def setUp(self):
+        self.namespace = Namespace.objects.create(name='namespace')
+        self.zone = Zone.objects.create(name='example.com', namespace=self.namespace, nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+        self.reverse = Zone.objects.create(name='20.10.in-addr.arpa', namespace=self.namespace, nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+        self.reverse6 = Zone.objects.create(name='8.b.d.0.1.0.0.2.ip6.arpa', namespace=self.namespace, nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+
+    def ptrs(self):
+        return sorted((rr.name, rr.ptr, rr.zone_id) for rr in Rr.objects.filter(type='PTR'))
+
+    def test_000_create_update_delete(self):
+        rr = Rr.objects.create(name='h1', type='A', a='10.20.0.1', zone=self.zone)
+        self.assertEqual(self.ptrs(), [('1.0.20.10.in-addr.arpa.', 'h1.example.com.', self.reverse.id)])
+
+        rr.a = '10.20.0.2'
+        rr.save()
+        self.assertEqual(self.ptrs(), [('2.0.20.10.in-addr.arpa.', 'h1.example.com.', self.reverse.id)])
+
+        rr.name = 'h2'
+        rr.save()
+        self.assertEqual(self.ptrs(), [('2.0.20.10.in-addr.arpa.', 'h2.example.com.', self.reverse.id)])
+
+        # ttl change: PTR untouched
+        rr.ttl = 600
+        rr.save()
+        self.assertEqual(len(self.ptrs()), 1)
+
+        rr.delete()
+        self.assertEqual(self.ptrs(), [])
+
+    def test_001_aaaa_and_no_reverse_zone(self):
+        Rr.objects.create(name='h1', type='AAAA', aaaa='2001:db8::1', zone=self.zone)
+        Rr.objects.create(name='h2', type='A', a='192.0.2.1', zone=self.zone)
+        ptrs = self.ptrs()
+        self.assertEqual(len(ptrs), 1)
+        self.assertEqual(ptrs[0][1:], ('h1.example.com.', self.reverse6.id))
+
+    def test_002_other_ptr_kept(self):
+        """ PTR of another name for the same address is not removed
+        """
+        Rr.objects.create(name='1.0.20.10.in-addr.arpa.', type='PTR', ptr='other.example.net.', zone=self.reverse)
+        rr = Rr.objects.create(name='h1', type='A', a='10.20.0.1', zone=self.zone)
+        rr.delete()
+        self.assertEqual(self.ptrs(), [('1.0.20.10.in-addr.arpa.', 'other.example.net.', self.reverse.id)])
+
+    def test_003_bulk_create(self):
+        Rr.objects.create(name='h0', type='A', a='10.20.0.10', zone=self.zone)
+        Rr.objects.bulk_create([Rr(name=f'h{i}', type='A', a=f'10.20.0.{10 + i}', zone=self.zone) for i in range(5)])
+        self.assertEqual(len(self.ptrs()), 5)
+
+    @override_settings(DNSAPP_AUTO_PTR=False)
+    def test_004_disabled(self):
+        Rr.objects.create(name='h1', type='A', a='10.20.0.1', zone=self.zone)
+        self.assertEqual(self.ptrs(), [])
+
+    @override_settings(DNSAPP_AUTO_PTR=False)
+    def test_005_reconcile(self):
+        Rr.objects.create(name='h1', type='A', a='10.20.0.1', zone=self.zone)
+        Rr.objects.create(name='h2', type='A', a='10.20.0.2', zone=self.zone)
+        Rr.objects.create(name='2.0.20.10.in-addr.arpa.', type='PTR', ptr='h2.example.com.', zone=self.reverse)
+        Rr.objects.create(name='3.0.20.10.in-addr.arpa.', type='PTR', ptr='old.example.com.', zone=self.reverse)
+        Rr.objects.create(name='4.0.20.10.in-addr.arpa.', type='PTR', ptr='host.example.net.', zone=self.reverse)
+
+        out = StringIO()
+        call_command('reconcileptr', 'namespace', '--dry-run', stdout=out)
+        self.assertIn('would create 1 PTR, would remove 1 PTR', out.getvalue())
+        self.assertEqual(len(self.ptrs()), 3)
+
+        call_command('reconcileptr', 'namespace', stdout=out)
+        self.assertEqual(self.ptrs(), [
+            ('1.0.20.10.in-addr.arpa.', 'h1.example.com.', self.reverse.id),
+            ('2.0.20.10.in-addr.arpa.', 'h2.example.com.', self.reverse.id),
+            ('4.0.20.10.in-addr.arpa.', 'host.example.net.', self.reverse.id),
+        ])
+
+    def test_006_bulk_delete(self):
+        """ PTR of bulk deleted rr removed with the same queries whatever
+        their number; PTR of another name kept, reverse zone serial incremented
+        """
+        Rr.objects.create(name='1.0.20.10.in-addr.arpa.', type='PTR', ptr='other.example.net.', zone=self.reverse)
+        counts = []
+        for count in (5, 50):
+            rrs = Rr.objects.bulk_create([Rr(name=f'h{i}', type='A', a=f'10.20.0.{i + 1}', zone=self.zone)
+                                          for i in range(count)])
+            self.assertEqual(len(self.ptrs()), count + 1)
+            serial = Zone.objects.get(id=self.reverse.id).serial
+            with CaptureQueriesContext(connection) as captured:
+                Rr.objects.bulk_delete([rr.id for rr in rrs])
+            counts.append(len(captured))
+            self.assertEqual(self.ptrs(), [('1.0.20.10.in-addr.arpa.', 'other.example.net.', self.reverse.id)])
+            self.assertEqual(Zone.objects.get(id=self.reverse.id).serial, serial + 1)
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Namespace, Zone, Rr, User
+
+class QueryBudgetTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', is_superuser=True, default_pref=Group.objects.create(name='admins'))
+        self.admin.set_password('admin')
+        self.admin.save()
+        n = Namespace.objects.create(name='namespace')
+        self.zone = Zone.objects.create(name='example.com', namespace=n, nsmaster='ns1.example.com.', mail='hostmaster.example.com.')
+        self.rr = Rr.objects.create(name='www', type='A', a='192.0.9.1', zone=self.zone)
+        self.client.login(username='admin', password='admin')
+        fd, self.log = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.log)
+
+    def test_000_server_timing(self):
+        response = self.client.get(f'/rr/{self.rr.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # session, user, rr
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[0-9.]+;desc="3 queries", rows;desc="[0-9]+", total;dur=[0-9.]+$')
+
+    def test_001_budget(self):
+        with override_settings(DNSAPP_QUERY_BUDGET=2):
+            with self.assertLogs('core.querybudget', 'WARNING') as logs:
+                self.client.get(f'/rr/{self.rr.id}/')
+        self.assertIn('core.views.RrDetail): 3 queries, budget 2', logs.output[0])
+
+        with override_settings(DNSAPP_QUERY_BUDGET=2, DNSAPP_QUERY_BUDGETS={'core.views.RrDetail': 3}):
+            with self.assertNoLogs('core.querybudget', 'WARNING'):
+                self.client.get(f'/rr/{self.rr.id}/')
+
+    def test_002_log(self):
+        with override_settings(DNSAPP_QUERY_LOG=self.log):
+            self.client.get(f'/rr/{self.rr.id}/')
+            self.client.delete(f'/rr/{self.rr.id}/')
+        with open(self.log) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([(r['view'], r['method'], r['status']) for r in records],
+                         [('core.views.RrDetail', 'GET', 200), ('core.views.RrDetail', 'DELETE', 204)])
+        self.assertEqual(records[0]['queries'], 3)
+
+    def test_003_report(self):
+        with open(self.log, 'w') as f:
+            for view, method, queries in [('core.views.RrDetail', 'GET', 3), ('core.views.ZoneRrList', 'GET', 5),
+                                          ('core.views.RrDetail', 'GET', 4)]:
+                f.write(json.dumps({'view': view, 'method': method, 'status': 200, 'queries': queries,
+                                    'db_ms': 1.0, 'rows': 1, 'total_ms': 2.0}) + '\n')
+            f.write('{"view": "trunc')
+
+        out = StringIO()
+        with override_settings(DNSAPP_QUERY_BUDGET=4):
+            call_command('querystats', '--log', self.log, '--sort', 'queries', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        # worst endpoint first, flagged over budget
+        self.assertTrue(lines[1].startswith('GET core.views.ZoneRrList'))
+        self.assertTrue(lines[1].endswith('4 !'))
+        self.assertRegex(lines[2], r'^GET core.views.RrDetail +2 +3.5/4 ')
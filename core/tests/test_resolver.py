@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase
+from rest_framework import status
+from core.models import Zone, PermZone
+from core.resolver import ZoneTrie, resolve_zone
+from core.tests.base import ZoneTestCase
+
+class ZoneTrieTests(SimpleTestCase):
+    def setUp(self):
+        self.trie = ZoneTrie([
+            (1, 'example.com', 1),
+            (2, 'lab.example.com', 1),
+            (3, 'example.com', 2),
+            (4, '2.0.192.in-addr.arpa', 1),
+        ])
+
+    def test_000_most_specific_zone(self):
+        self.assertEqual(self.trie.resolve('www.lab.example.com.', 1), 2)
+        self.assertEqual(self.trie.resolve('lab.example.com', 1), 2)
+        self.assertEqual(self.trie.resolve('www.example.com', 1), 1)
+        self.assertEqual(self.trie.resolve('WWW.Example.COM', 1), 1)
+        self.assertEqual(self.trie.resolve('1.2.0.192.in-addr.arpa.', 1), 4)
+
+    def test_001_namespaces(self):
+        self.assertEqual(self.trie.resolve('www.lab.example.com', 2), 3)
+        self.assertIsNone(self.trie.resolve('www.example.com', 3))
+
+    def test_002_no_zone(self):
+        self.assertIsNone(self.trie.resolve('example.org', 1))
+        # label boundary: notexample.com is not in example.com
+        self.assertIsNone(self.trie.resolve('www.notexample.com', 1))
+        self.assertEqual(self.trie.path('www.lab.example.com', 1), [1, 2])
+
+class APIZoneResolveTests(ZoneTestCase):
+    zone_action = 'r'
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='user', password='user')
+
+    def test_000_resolve_ok(self):
+        response = self.client.get(f'/resolve/?fqdn=www.example.com&namespace={self.namespace.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.zone.id)
+
+    def test_001_resolve_new_zone_not_allowed(self):
+        """ zone created after a first resolution is found
+            user has no read permission on it -> must be denied
+        """
+        self.client.get(f'/resolve/?fqdn=www.example.com&namespace={self.namespace.id}')
+        self.create_zone('lab.example.com')
+        response = self.client.get(f'/resolve/?fqdn=www.lab.example.com&namespace={self.namespace.id}')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_002_resolve_not_found(self):
+        response = self.client.get(f'/resolve/?fqdn=www.example.org&namespace={self.namespace.id}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_003_zone_created_by_another_process(self):
+        """ zone created without invalidation of the trie of this process
+            (another worker, cache not shared): absolute names accepted
+        """
+        resolve_zone('www.example.com', self.namespace.id)
+        # bulk_create sends no signal: the trie is not invalidated
+        lab, = Zone.objects.bulk_create([Zone(name='lab.example.com', namespace=self.namespace,
+                                              nsmaster='ns1.example.com.', mail='hostmaster.example.com.')])
+        PermZone.objects.create(action='rc', group=self.group, obj=lab)
+        response = self.client.post('/rr/', {'name': 'www.lab.example.com.', 'type': 'A', 'a': '192.0.2.1', 'zone': lab.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import dns.zone
+import dns.rdatatype
+from django.test import SimpleTestCase
+from core.zonefile import read_zone_file, parse_ttl, ZoneFileError
+from core.importer import pack, soa_params
+
+MAIN = '''$TTL 1h
+@   IN  SOA ns1 hostmaster ( 2020010101 ; serial
+                             20m        ; refresh
+                             3m 2w 300 )
+    IN  NS  ns1
+    IN  NS  ns2.example.net.
+    IN  MX  10 mail
+ns1 300 IN A 192.0.9.1
+Www IN 600 AAAA 2001:DB8:0::0:1
+mail    A   192.0.9.3
+ftp     CNAME www
+_sip._udp SRV 0 5 5060 sip
+txt     TXT "v=spf1 ; not a comment" "say \\"hi\\"" unquoted
+@       CAA 0 issue "letsencrypt.org"
+outside.example.net. A 192.0.9.99
+$ORIGIN lab.example.com.
+host    1d A 192.0.9.4
+        AAAA 2001:db8::4
+sub     NS  ns1.sub
+$INCLUDE {include} dev.example.com.
+after   A 192.0.9.6
+'''
+
+INCLUDED = '''router  A   192.0.9.5
+        MX  20 @
+'''
+
+class ZoneFileTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'example.com')
+        include = os.path.join(self.dir, 'dev.inc')
+        with open(include, 'w') as f:
+            f.write(INCLUDED)
+        with open(self.path, 'w') as f:
+            f.write(MAIN.format(include=include))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def normalize(self, records):
+        result = set()
+        for name, ttl, type, rdata in records:
+            if type == 'SOA':
+                rdata = tuple(sorted(soa_params(rdata).items()))
+            else:
+                rdata = pack(type, rdata)
+            result.add((name.lower(), ttl, type, rdata))
+        return result
+
+    def dnspython_records(self):
+        zone = dns.zone.from_file(self.path, 'example.com', relativize=True)
+        for name, ttl, rdata in zone.iterate_rdatas():
+            yield (name.to_text(), ttl, dns.rdatatype.to_text(rdata.rdtype),
+                   rdata.to_text(origin=zone.origin, relativize=False))
+
+    def test_000_same_as_dnspython(self):
+        records = list(read_zone_file(self.path, 'example.com'))
+        self.assertEqual(records[0][2], 'SOA')
+        self.assertEqual(len(records), 17)
+        self.assertEqual(self.normalize(records), self.normalize(self.dnspython_records()))
+
+    def test_001_records(self):
+        records = {(r[0], r[2]): r for r in read_zone_file(self.path, 'example.com.')}
+        self.assertEqual(records[('@', 'SOA')][3],
+                         'ns1.example.com. hostmaster.example.com. 2020010101 1200 180 1209600 300')
+        self.assertEqual(records[('Www', 'AAAA')][1:], (600, 'AAAA', '2001:db8::1'))
+        # $TTL, not the TTL of the previous record
+        self.assertEqual(records[('host.lab', 'A')][1], 86400)
+        self.assertEqual(records[('host.lab', 'AAAA')][1], 3600)
+        self.assertEqual(records[('router.dev', 'MX')][3], '20 dev.example.com.')
+        self.assertEqual(records[('after.lab', 'A')][1], 3600)
+        self.assertNotIn(('outside.example.net.', 'A'), records)
+
+    def test_002_errors(self):
+        """ records are produced before an error later in the file is read
+        """
+        with open(self.path, 'a') as f:
+            f.write('bad A 192.0.9.300\n')
+        records = read_zone_file(self.path, 'example.com')
+        self.assertEqual(next(records)[2], 'SOA')
+        with self.assertRaisesRegex(ZoneFileError, ':22:'):
+            list(records)
+
+        with open(self.path, 'w') as f:
+            f.write('@ SOA ns1 hostmaster ( 1 2 3 4 5\n')
+        with self.assertRaisesRegex(ZoneFileError, 'unbalanced'):
+            list(read_zone_file(self.path, 'example.com'))
+
+    def test_003_ttl(self):
+        self.assertEqual(parse_ttl('3600'), 3600)
+        self.assertEqual(parse_ttl('1h30m'), 5400)
+        self.assertEqual(parse_ttl('1W2d'), 777600)
+        for ttl in ('', 'h', '1x', '1h30'):
+            with self.assertRaises(ValueError):
+                parse_ttl(ttl)
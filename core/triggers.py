@@ -0,0 +1,128 @@
+'''
+Database triggers for constraints that can not be expressed with
+django model constraints.
+
+CNAME exclusivity (RFC 1034 section 3.6.2): a name holding a CNAME
+can not hold any other data. A partial unique index on (zone, fqdn)
+(see Rr.Meta) only forbids two CNAME with the same name; the coexistence of a CNAME
+with other types is checked by the triggers below, so that the check
+and the write happen in a single statement.
+
+Triggers are created from migrations. On SQLite, django rebuilds the
+table for most schema changes, which drops its triggers: migrations
+altering core_rr must call create_triggers() again.
+'''
+
+CNAME_CONFLICT_MESSAGE = "CNAME and other data can not coexist for the same name"
+CNAME_CONSTRAINT = "rr_single_cname_per_fqdn"
+
+
+def is_cname_conflict(error):
+    '''
+    True if IntegrityError error is a violation of CNAME exclusivity
+    (trigger or unique constraint on CNAME), other integrity errors
+    (foreign key, not null...) are not a CNAME conflict
+    '''
+    message = str(error)
+    return CNAME_CONFLICT_MESSAGE in message or CNAME_CONSTRAINT in message
+
+
+def sqlite_triggers(column):
+    return [
+        "DROP TRIGGER IF EXISTS core_rr_cname_exclusive_insert",
+        "DROP TRIGGER IF EXISTS core_rr_cname_exclusive_update",
+        f"""
+        CREATE TRIGGER core_rr_cname_exclusive_insert
+        BEFORE INSERT ON core_rr
+        WHEN EXISTS (SELECT 1 FROM core_rr
+                     WHERE zone_id = NEW.zone_id AND {column} = NEW.{column}
+                       AND (NEW.type = 'CNAME' OR type = 'CNAME'))
+        BEGIN
+            SELECT RAISE(ABORT, '{CNAME_CONFLICT_MESSAGE}');
+        END
+        """,
+        f"""
+        CREATE TRIGGER core_rr_cname_exclusive_update
+        BEFORE UPDATE OF {column}, type, zone_id ON core_rr
+        WHEN EXISTS (SELECT 1 FROM core_rr
+                     WHERE zone_id = NEW.zone_id AND {column} = NEW.{column}
+                       AND id <> NEW.id
+                       AND (NEW.type = 'CNAME' OR type = 'CNAME'))
+        BEGIN
+            SELECT RAISE(ABORT, '{CNAME_CONFLICT_MESSAGE}');
+        END
+        """,
+    ]
+
+# The advisory lock serializes concurrent writers of the same name in the
+# same zone: the second writer waits for the first one to commit, then
+# sees its row (each statement of a plpgsql function takes a new snapshot)
+def postgresql_triggers(column):
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION core_rr_cname_exclusive() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(NEW.zone_id, hashtext(NEW.{column}));
+            IF EXISTS (SELECT 1 FROM core_rr
+                       WHERE zone_id = NEW.zone_id AND {column} = NEW.{column}
+                         AND id <> NEW.id
+                         AND (NEW.type = 'CNAME' OR type = 'CNAME')) THEN
+                RAISE EXCEPTION '{CNAME_CONFLICT_MESSAGE}'
+                    USING ERRCODE = 'integrity_constraint_violation';
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS core_rr_cname_exclusive ON core_rr",
+        f"""
+        CREATE TRIGGER core_rr_cname_exclusive
+        BEFORE INSERT OR UPDATE OF {column}, type, zone_id ON core_rr
+        FOR EACH ROW EXECUTE PROCEDURE core_rr_cname_exclusive()
+        """,
+    ]
+
+# Names are compared by fqdn (the canonical owner name: "www" and
+# "www.example.com." are the same name in zone example.com); triggers
+# created before the fqdn column existed compared the raw name
+SQLITE_TRIGGERS = sqlite_triggers("fqdn")
+POSTGRESQL_TRIGGERS = postgresql_triggers("fqdn")
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_rr_cname_exclusive_insert",
+    "DROP TRIGGER IF EXISTS core_rr_cname_exclusive_update",
+]
+
+POSTGRESQL_DROP = [
+    "DROP TRIGGER IF EXISTS core_rr_cname_exclusive ON core_rr",
+    "DROP FUNCTION IF EXISTS core_rr_cname_exclusive()",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_triggers(apps, schema_editor):
+    '''
+    RunPython forward function: (re)create triggers for the current backend
+    '''
+    _run(schema_editor, {"sqlite": SQLITE_TRIGGERS,
+                         "postgresql": POSTGRESQL_TRIGGERS})
+
+
+def create_name_triggers(apps, schema_editor):
+    '''
+    RunPython function of migrations run before the fqdn column existed
+    '''
+    _run(schema_editor, {"sqlite": sqlite_triggers("name"),
+                         "postgresql": postgresql_triggers("name")})
+
+
+def drop_triggers(apps, schema_editor):
+    '''
+    RunPython backward function
+    '''
+    _run(schema_editor, {"sqlite": SQLITE_DROP,
+                         "postgresql": POSTGRESQL_DROP})
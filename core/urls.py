@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from core import views
+from core.metrics import metrics_view
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -15,6 +16,17 @@ urlpatterns += [
     path('zone/', views.ZoneListOrCreate.as_view()),
     path('zone/<int:pk>/', views.ZoneDetail.as_view()),
     path('zone/<int:pk>/rr/', views.ZoneRrList.as_view()),
+    path('zone/<int:pk>/allocate/', views.ZoneAllocate.as_view()),
+    path('zone/<int:pk>/records/', views.ZoneRecords.as_view()),
+    path('zone/<int:pk>/rrset/<str:name>/<str:type>/', views.ZoneRrset.as_view()),
+    path('resolve/', views.ZoneResolve.as_view()),
     path('rr/', views.RrListOrCreate.as_view()),
     path('rr/<int:pk>/', views.RrDetail.as_view()),
+    path('rr/by-ip/', views.RrByIp.as_view()),
+    path('lookup/', views.RrLookup.as_view()),
+    path('permrr/grant/', views.PermRrBulk.as_view(), {'operation': 'grant'}),
+    path('permrr/revoke/', views.PermRrBulk.as_view(), {'operation': 'revoke'}),
+    path('metrics', metrics_view),
+    path('profile/', views.ProfileList.as_view()),
+    path('profile/<str:view>/', views.ProfileDetail.as_view()),
 ]
@@ -2,6 +2,7 @@ from django.core.validators import RegexValidator
 from rest_framework.exceptions import ValidationError
 from django.core.validators import validate_ipv4_address,validate_ipv6_address
 import re
+from itertools import filterfalse
 
 class NamespaceNameValidator(RegexValidator):
     regex = '^[-0-9a-z.]+$'
@@ -37,32 +38,76 @@ def ValidateType(attrs):
     if missing:
         raise ValidationError(detail=f"missing fields '{','.join(missing)}' for type '{t}'")
 
+# Names of rr, compiled once
+# c: characters of a relative name; label: one label of an absolute name
+c = '[.a-zA-Z0-9-]+'
+RELATIVE_NAME_RE = re.compile(rf'@|\*|\*\.{c}|_?{c}')
+# Valid names in a single match, the checks below only run to explain
+# an error
+label = r'(?=[^.]{1,64}\.)(?!-)(?:@|\*|_?[a-zA-Z0-9-]+)(?<!-)\.'
+VALID_RELATIVE_NAME = rf'(?=.{{1,64}}\Z)(?![-.])(?!.*\.\.)(?:@|\*|\*\.{c}|_?{c})(?<![-.])'
+VALID_ABSOLUTE_NAME = rf'(?=.{{1,255}}\Z)(?:{label})+'
+VALID_RELATIVE_NAME_RE = re.compile(VALID_RELATIVE_NAME)
+VALID_ABSOLUTE_NAME_RE = re.compile(VALID_ABSOLUTE_NAME)
+VALID_RR_NAME_RE = re.compile(f'(?:{VALID_RELATIVE_NAME})|(?:{VALID_ABSOLUTE_NAME})')
+
 def ValidateRelativeName(name):
+    if VALID_RELATIVE_NAME_RE.fullmatch(name):
+        return
     if len(name) > 64:
         raise ValidationError(detail=f"Relative name '{name}' is too long (length must be <= 64)")
-    if name[0] in ('-','.') or name[-1] in ('-','.'):
+    if name[:1] in ('-','.') or name[-1:] in ('-','.'):
         raise ValidationError(detail=f"Relative name '{name}' must not start or end with dash or dot")
-    if re.match(r'\.\.', name):
+    if '..' in name:
         raise ValidationError(detail=f"Relative name '{name}' can not contain two successive dots")
-    c = '[.a-zA-Z0-9-]+'
-    if not re.match(f"^(@|\*|\*\.{c}|{c}|_{c})$", name):
+    if not RELATIVE_NAME_RE.fullmatch(name):
         raise ValidationError(detail=f"Relative name must be '@', '*' or an alpha-numeric string")
-    
+
 def ValidateAbsoluteName(name):
+    if VALID_ABSOLUTE_NAME_RE.fullmatch(name):
+        return
     if len(name) > 255:
         raise ValidationError(detail=f"Absolute name '{name}' is too long (length must be <= 255)")
     for component in name.split('.')[0:-1]:
+        if not component:
+            raise ValidationError(detail=f"Absolute name '{name}' can not contain an empty label")
         ValidateRelativeName(component)
 
 def ValidateRrName(name):
+    if VALID_RR_NAME_RE.fullmatch(name):
+        return
     # if absolute name (ending with dot)
-    if name[-1] == '.':
+    if name[-1:] == '.':
         ValidateAbsoluteName(name)
     else: # relative name
         ValidateRelativeName(name)
 
 # Name has been *already been validated* by RrNameValidate
 def ValidateHostname(name):
-    for component in name.split('.')[0:-1]:
-        if "_" in name:
-            raise ValidationError(detail=f"hostname '{name}' can't contain underscore")
+    if "_" in name:
+        raise ValidationError(detail=f"hostname '{name}' can't contain underscore")
+
+# validator -> pattern matching the names it accepts
+VALID_NAME_PATTERNS = {
+    ValidateRrName: VALID_RR_NAME_RE,
+    ValidateRelativeName: VALID_RELATIVE_NAME_RE,
+    ValidateAbsoluteName: VALID_ABSOLUTE_NAME_RE,
+}
+
+def validate_many(names, validator=ValidateRrName):
+    '''
+    Validate many names in one call (bulk paths, see
+    core.serializers.validate_names): valid names cost a single match
+    each, validator only runs for the others
+    Returns dict name -> error message, for invalid names only
+    '''
+    pattern = VALID_NAME_PATTERNS.get(validator)
+    errors = {}
+    for name in names if pattern is None else filterfalse(pattern.fullmatch, names):
+        if name in errors:
+            continue
+        try:
+            validator(name)
+        except ValidationError as e:
+            errors[name] = str(e.detail[0])
+    return errors
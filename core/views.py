@@ -1,13 +1,28 @@
-from django.http import Http404
+import re
+import ipaddress
+from django.http import Http404, HttpResponse
+from django.db.models import Q
+from django.db import transaction, IntegrityError
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
-from core.models import (Namespace, Zone, Rr, Zonerule,
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.contrib.auth.models import Group
+from core.models import (Namespace, Zone, Rr, Zonerule, PERMACTION,
                          PermNamespace, PermZone, PermRr)
 from core.serializers import NamespaceSerializer, ZoneSerializer, RrSerializer
+from core.rdata import RDATA_FIELDS
+from core.names import make_fqdn, normalize_fqdn, subtree_range
+from core.resolver import resolve_zone
+from core.addresses import addr_key, network_range
+from core.allocator import allocate_address, NetworkFull
+from core.ptr import find_reverse_zone, reverse_pointer, add_ptr
+from core.triggers import is_cname_conflict
+from core import zonecache, profiler
+from core.sync import parse_records, plan_sync, check_sync_permissions, apply_sync
 from core.permissions import (PermCheck, NamespacePermCheck, RrPermCheck,
-        get_allowed_rrs, set_perm, get_allowed_namespaces, get_allowed_zones)
+        get_allowed_rrs, set_perm, get_allowed_namespaces, get_allowed_zones,
+        filter_rrs, grant_rr_perm, revoke_rr_perm, inherited_rr_perms, with_perms)
 from rest_framework.response import Response
 
 # 
@@ -26,12 +41,70 @@ def get_zone_or_404(pk):
     except Zone.DoesNotExist:
         raise Http404
 
-def get_rr_or_404(pk):
+def get_with_perms_or_404(model, pk, user, permobj, flags):
+    '''
+        Object and flags of user on it (perm_r, perm_w...) in one query
+        (see core.permissions.with_perms)
+    '''
     try:
-        return Rr.objects.get(pk=pk)
-    except Rr.DoesNotExist:
+        return with_perms(model.objects.all(), user, permobj, flags).get(pk=pk)
+    except model.DoesNotExist:
         raise Http404
 
+def get_rr_fields(request):
+    '''
+        Parse the optional "fields" query parameter of rr list views
+        (example: /rr/?fields=name,type,a)
+        Returns None when all fields are requested
+    '''
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    fields = fields.split(',')
+    unknown = set(fields) - set(RrSerializer.Meta.fields)
+    if unknown:
+        raise ValidationError(detail=f"Unknown rr fields '{','.join(sorted(unknown))}'")
+    return ['id'] + [f for f in fields if f != 'id']
+
+def get_rr_columns(fields):
+    '''
+        Map serializer fields to Rr columns (rdata fields are decoded
+        from the rdata and type columns)
+    '''
+    columns = set()
+    for f in fields:
+        if f in RDATA_FIELDS:
+            columns.update(('rdata', 'type'))
+        else:
+            columns.add(f)
+    return columns
+
+def list_rrs(request, rrs):
+    '''
+        Serialize a rr list; unrequested columns (rdata can hold 64KB of
+        txt) are not loaded from the database
+    '''
+    fields = get_rr_fields(request)
+    if fields is not None:
+        rrs = rrs.only(*get_rr_columns(fields))
+    return RrSerializer(rrs, many=True, fields=fields).data
+
+def save_rr(serializer):
+    '''
+        Save a rr serializer; database constraints on Rr (CNAME exclusivity,
+        see core/triggers.py) are checked by the write itself, a violation
+        is reported as a validation error (400); other integrity errors
+        are raised as is
+    '''
+    name = serializer.validated_data['name']
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError as e:
+        if not is_cname_conflict(e):
+            raise
+        raise ValidationError(detail=f"Can't save '{name}': CNAME and other data with same name can not coexist in zone")
+
 
 #
 # Permission for Namespace
@@ -47,9 +120,9 @@ def get_rr_or_404(pk):
 
 class NamespaceDetail(APIView):
     def get(self, request, pk, format=None):
-        namespace = get_namespace_or_404(pk)
+        namespace = get_with_perms_or_404(Namespace, pk, request.user, PermNamespace, "r")
         # Check permission
-        if not PermCheck.can_get(request.user, namespace, PermNamespace):
+        if not namespace.perm_r:
            raise PermissionDenied('namespace get unauthorized')
         serializer = NamespaceSerializer(namespace)
         return Response(serializer.data)
@@ -115,36 +188,36 @@ class NamespaceListOrCreate(APIView):
 class ZoneDetail(APIView):
 
     def get(self, request, pk, format=None):
-        zone = get_zone_or_404(pk)
+        zone = get_with_perms_or_404(Zone, pk, request.user, PermZone, "r")
 
         #import ipdb; ipdb.set_trace()
 
         # Check permission
-        if not PermCheck.can_get(request.user, zone, PermZone):
+        if not zone.perm_r:
            raise PermissionDenied('zone get unauthorized')
 
         serializer = ZoneSerializer(zone)
         return Response(serializer.data)
 
     def delete(self, request, pk, format=None):
-        zone = get_zone_or_404(pk)
+        zone = get_with_perms_or_404(Zone, pk, request.user, PermZone, "w")
 
         # Check permission
-        if not PermCheck.can_delete(request.user, zone, PermZone):
+        if not zone.perm_w:
            raise PermissionDenied('zone delete unauthorized')
 
         zone.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def put(self, request, pk, format=None):
-        zone = get_zone_or_404(pk)
+        zone = get_with_perms_or_404(Zone, pk, request.user, PermZone, "w")
 
         serializer = ZoneSerializer(zone, data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # Check permission
-        if not PermCheck.can_update(request.user, zone, PermZone):
+        if not zone.perm_w:
            raise PermissionDenied('zone update unauthorized')
 
         serializer.save()
@@ -172,9 +245,40 @@ class ZoneListOrCreate(APIView):
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+#
+# Resolution of a name to its zone
+#
+# GET /resolve/?fqdn=www.lab.example.com&namespace=1
+#   most specific zone of namespace 1 containing www.lab.example.com
+#   -> check "read" for this zone or admin
+
+class ZoneResolve(APIView):
+    def get(self, request, format=None):
+        fqdn = request.query_params.get('fqdn')
+        namespace = request.query_params.get('namespace')
+        if not fqdn or not namespace:
+            raise ValidationError(detail="Missing parameter 'fqdn' or 'namespace'")
+        try:
+            namespace = int(namespace)
+        except ValueError:
+            raise ValidationError(detail="Parameter 'namespace' must be a namespace id")
+
+        zone_id = resolve_zone(fqdn, namespace)
+        if zone_id is None:
+            raise Http404
+        zone = get_with_perms_or_404(Zone, zone_id, request.user, PermZone, "r")
+
+        # Check permission
+        if not zone.perm_r:
+           raise PermissionDenied('zone get unauthorized')
+
+        serializer = ZoneSerializer(zone)
+        return Response(serializer.data)
+
 #
 # View / Permission that must be checked :
 # list               (GET /)      list all rr     -> filter rr only with perm "GetRr" or all if admin
+#                                                    ?fields=name,type returns (and loads) only these fields
 # retrieve           (GET /1)     retrieve 1 rr   -> check GetRr for this Rr or admin
 # destroy            (DELETE /1)  destroy 1 rr    -> check UpdateDeleteRr for this Rr or admin
 # update             (PUT /1)     update  1 rr    -> check UpdateDeleteRr for this Rr or admin
@@ -183,61 +287,224 @@ class ZoneListOrCreate(APIView):
 
 class RrDetail(APIView):
     def get(self, request, pk, format=None):
-        rr = get_rr_or_404(pk)
+        rr = get_with_perms_or_404(Rr, pk, request.user, PermRr, "r")
 
         # Check permission
         # import ipdb; ipdb.set_trace()
-        if not PermCheck.can_get(request.user, rr, PermRr):
+        if not rr.perm_r:
            raise PermissionDenied('rr get unauthorized')
 
         serializer = RrSerializer(rr)
         return Response(serializer.data)
 
     def delete(self, request, pk, format=None):
-        rr = get_rr_or_404(pk)
+        rr = get_with_perms_or_404(Rr, pk, request.user, PermRr, "w")
 
         # Check permission
-        if not PermCheck.can_delete(request.user, rr, PermRr):
+        if not rr.perm_w:
            raise PermissionDenied('rr delete unauthorized')
 
         rr.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def put(self, request, pk, format=None):
-        rr = get_rr_or_404(pk)
+        rr = get_with_perms_or_404(Rr, pk, request.user, PermRr, "w")
 
         serializer = RrSerializer(rr, data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # Check permission
-        if not PermCheck.can_update(request.user, rr, PermRr):
+        if not rr.perm_w:
            raise PermissionDenied('rr update unauthorized')
 
-        serializer.save()
+        save_rr(serializer)
         return Response(serializer.data)
 
 
+# list of rr of a zone (GET /zone/1/rr/)
+#   -> all rr with "generate" permission for the zone or admin, otherwise
+#      rr with "read" permission; JSON responses are cached, see core/zonecache.py
 class ZoneRrList(APIView):
     def get(self, request, pk, format=None):
 
-        zone = get_zone_or_404(pk)
+        zone = get_with_perms_or_404(Zone, pk, request.user, PermZone, "g")
 
-        if PermCheck.can_generate(request.user, zone, PermZone):
-            rrs = Rr.objects.all()
+        if zone.perm_g:
+            rrs = zone.rr_set.all()
+            scope = "all"
         else:
             rrs = get_allowed_rrs(request.user, "r")
             rrs = rrs.filter(zone=zone)
+            scope = zonecache.user_scope(request.user, zone)
 
-        serializer = RrSerializer(rrs, many=True)
-        return Response(serializer.data)
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return Response(list_rrs(request, rrs))
+
+        fields = get_rr_fields(request)
+        key = zonecache.cache_key(zone, scope, f"json;fields={fields}")
+        body = zonecache.get_or_render(key, lambda: renderer.render(list_rrs(request, rrs)))
+        return zonecache.compressed_response(request, body, renderer.media_type)
+
+
+#
+# Synchronization of the rr of a zone with a desired set of records
+#
+# PUT /zone/1/records/            body: list of rr (name, type, ttl and rdata
+#                                 fields, no zone) or {"zonefile": "<text>"}
+# PUT /zone/1/records/?dry_run=1  only report the changes
+#   rr of the zone not in body are deleted, records of body not in the zone
+#   are created, others are left untouched; the serial is incremented once
+#   -> check "read" for this zone, then per changed RRset (see core/sync.py)
+class ZoneRecords(APIView):
+    def put(self, request, pk, format=None):
+        zone = get_zone_or_404(pk)
+        if not PermCheck.can_get(request.user, zone, PermZone):
+           raise PermissionDenied('zone read unauthorized')
+        desired = parse_records(zone, request.data)
+
+        # concurrent synchronizations of the zone are serialized
+        with transaction.atomic():
+            zone = Zone.objects.select_for_update().get(pk=zone.pk)
+            plan = plan_sync(zone, desired)
+            check_sync_permissions(request.user, zone, plan)
+            if request.query_params.get('dry_run') not in ('1', 'true'):
+                apply_sync(request.user, zone, plan)
+
+        return Response({'inserted': len(plan.inserts), 'deleted': len(plan.deletes),
+                         'unchanged': plan.unchanged, 'serial': zone.serial})
+
+
+#
+# RRset: all rr of a zone with the same name and type
+#
+# GET    /zone/1/rrset/www/A/   rr of the RRset readable by user
+# PUT    /zone/1/rrset/www/A/   replace the RRset, body: list of rr (ttl and
+#                               rdata fields, name and type from the url)
+# DELETE /zone/1/rrset/www/A/   delete the RRset
+#   name is relative to the zone ("www", "@") or absolute ("www.example.com.")
+#   PUT and DELETE are done in one transaction (serialized with other
+#   changes of RRsets of the zone); permissions as for a zone
+#   synchronization (see core/sync.py): "w" on every rr of the RRset, and
+#   zone "c" and rules to add rr
+class ZoneRrset(APIView):
+    def get_rrset(self, zone, name, type):
+        return zone.rr_set.filter(fqdn=make_fqdn(name, zone.name), type=type.upper())
+
+    def get(self, request, pk, name, type, format=None):
+        zone = get_zone_or_404(pk)
+        rrs = self.get_rrset(zone, name, type)
+        if not PermCheck.can_generate(request.user, zone, PermZone):
+            rrs = rrs.filter(id__in=get_allowed_rrs(request.user, "r").values('id'))
+        return Response(list_rrs(request, rrs))
+
+    def put(self, request, pk, name, type, format=None):
+        zone = get_zone_or_404(pk)
+        if not isinstance(request.data, list) or not all(isinstance(record, dict) for record in request.data):
+            raise ValidationError(detail="Expected a list of records")
+        records = [{**record, 'name': name, 'type': type.upper()} for record in request.data]
+        desired = parse_records(zone, records)
+        with transaction.atomic():
+            zone = Zone.objects.select_for_update().get(pk=zone.pk)
+            plan = plan_sync(zone, desired, self.get_rrset(zone, name, type))
+            check_sync_permissions(request.user, zone, plan)
+            apply_sync(request.user, zone, plan)
+        return Response(list_rrs(request, self.get_rrset(zone, name, type)))
+
+    def delete(self, request, pk, name, type, format=None):
+        zone = get_zone_or_404(pk)
+        with transaction.atomic():
+            zone = Zone.objects.select_for_update().get(pk=zone.pk)
+            plan = plan_sync(zone, [], self.get_rrset(zone, name, type))
+            if not plan.deletes:
+                raise Http404
+            check_sync_permissions(request.user, zone, plan)
+            apply_sync(request.user, zone, plan)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+#
+# Bulk permission change on rr (admin only)
+#
+# POST /permrr/grant/   {"group": 2, "action": "rw", "zone": 1, "name": "^www", "type": "A"}
+#   set permission "rw" for group 2 on all rr of zone 1 of type A with a
+#   name matching the regexp "^www" (zone, name and type are optional)
+# POST /permrr/revoke/  {"group": 2, "zone": 1, "name": "^www", "type": "A"}
+#   remove the permissions of group 2 on the same rr; the zone permissions
+#   (PermZoneRr) of group 2 still granting an action on these rr are not
+#   removed, they are returned in "inherited": [{"zone": 1, "action": "rw"}]
+class PermRrBulk(APIView):
+    def post(self, request, operation, format=None):
+        if not request.user.is_superuser:
+           raise PermissionDenied('bulk permission change unauthorized')
+        try:
+            group = Group.objects.get(pk=request.data.get('group'))
+        except (Group.DoesNotExist, ValueError, TypeError):
+            raise ValidationError(detail="Unknown group")
+        zone = None
+        if request.data.get('zone') is not None:
+            zone = get_zone_or_404(request.data['zone'])
+        name = request.data.get('name')
+        try:
+            re.compile(name or '')
+        except re.error:
+            raise ValidationError(detail=f"Invalid name regexp '{name}'")
+        rrs = filter_rrs(zone, name, request.data.get('type'))
+
+        if operation == 'grant':
+            action = request.data.get('action')
+            if action not in dict(PERMACTION):
+                raise ValidationError(detail=f"Invalid action '{action}'")
+            count = grant_rr_perm(group, action, rrs)
+        else:
+            count = revoke_rr_perm(group, rrs)
+            inherited = [{'zone': perm.obj_id, 'action': perm.action}
+                         for perm in inherited_rr_perms(group, rrs)]
+            return Response({'changed': count, 'inherited': inherited})
+        return Response({'changed': count})
+
+
+#
+# Profiles of views (admin only, see core/profiler.py)
+#
+# GET    /profile/                       views having a profile
+# GET    /profile/core.views.RrDetail/   pstats file of the view (?output=text: report)
+# DELETE /profile/core.views.RrDetail/   remove the profile of the view
+class ProfileList(APIView):
+    def get(self, request, format=None):
+        if not request.user.is_superuser:
+           raise PermissionDenied('profile list unauthorized')
+        return Response(profiler.profiled_views())
+
+class ProfileDetail(APIView):
+    def get(self, request, view, format=None):
+        if not request.user.is_superuser:
+           raise PermissionDenied('profile get unauthorized')
+        try:
+            stats = profiler.load(view)
+        except KeyError:
+            raise Http404
+        if request.query_params.get('output') == 'text':
+            return HttpResponse(profiler.report(stats), content_type='text/plain')
+        response = HttpResponse(profiler.dumps(stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{view}.prof"'
+        return response
+
+    def delete(self, request, view, format=None):
+        if not request.user.is_superuser:
+           raise PermissionDenied('profile delete unauthorized')
+        try:
+            profiler.clear(view)
+        except KeyError:
+            raise Http404
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class RrListOrCreate(APIView):
     def get(self, request, format=None):
         rrs = get_allowed_rrs(request.user, "r")
-        serializer = RrSerializer(rrs, many=True)
-        return Response(serializer.data)
+        return Response(list_rrs(request, rrs))
 
     def post(self, request, format=None):
         serializer = RrSerializer(data=request.data)
@@ -263,19 +530,157 @@ class RrListOrCreate(APIView):
         if not RrPermCheck.can_create_by_rule(request.user, name, zone, type):
            raise PermissionDenied("rr create unauthorized: name or type invalid by rule")
 
-        # Check if CNAME and name already exists in zone
-        if type == "CNAME":
-            if Rr.objects.filter(name=name, zone=zone).exists():
-                raise ValidationException(detail=f"Can't create CNAME '{name}' because name already exist")
-        # Check if name already exists in zone as CNAME
-        if Rr.objects.filter(name=name, zone=zone, type="CNAME").exists():
-            raise ValidationException(detail=f"Can't create '{name}' because CNAME with same name already exist")
+        # Record Rr in database and set permission on created rr for user
+        # CNAME exclusivity is checked by the database on insert
+        with transaction.atomic():
+            rr = save_rr(serializer)
+            set_perm(request.user, rr, PermRr, "rw")
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # Record Rr in database
-        rr = serializer.save()
 
-        # Set permission on created rr for user
-        set_perm(request.user, rr, PermRr, "rw")
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+#
+# Allocation of the next free address of a network
+#
+# POST /zone/<pk>/allocate/  {"cidr": "10.20.0.0/22", "name": "host1", "ttl": 3600, "ptr": true}
+#   creates rr "host1 A <lowest free address of 10.20.0.0/22>" in zone <pk>
+#   and, if "ptr" is true, the PTR rr in the reverse zone of the namespace
+#   -> same permissions as rr create, in zone <pk> and in the reverse zone
+
+class ZoneAllocate(APIView):
+    def post(self, request, pk, format=None):
+        zone = get_zone_or_404(pk)
+        cidr = request.data.get('cidr')
+        name = request.data.get('name')
+        if not cidr or not name:
+            raise ValidationError(detail="Missing parameter 'cidr' or 'name'")
+        try:
+            version = ipaddress.ip_network(cidr, strict=False).version
+        except ValueError as e:
+            raise ValidationError(detail=str(e))
+        type = "A" if version == 4 else "AAAA"
+
+        if not PermCheck.can_create_record(request.user, zone, PermZone):
+           raise PermissionDenied('rr create unauthorized for this zone')
+
+        # name and permissions are checked before allocating: the rr is
+        # validated with the network address, replaced by the allocated one
+        data = {'name': name, 'type': type, 'zone': zone.id,
+                type.lower(): str(ipaddress.ip_network(cidr, strict=False).network_address)}
+        if 'ttl' in request.data:
+            data['ttl'] = request.data['ttl']
+        serializer = RrSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data['name']
+
+        if not RrPermCheck.can_create_when_name_exist(request.user, name, type):
+           raise PermissionDenied("rr create unauthorized: rr with same name and type already exists and is not updatable by user")
+        if not RrPermCheck.can_create_by_rule(request.user, name, zone, type):
+           raise PermissionDenied("rr create unauthorized: name or type invalid by rule")
+
+        with_ptr = request.data.get('ptr') in (True, 'true', '1')
+        if with_ptr:
+            # reverse zone of the network, checked before allocating
+            network_address = data[type.lower()]
+            reverse_zone_id = find_reverse_zone(network_address, zone.namespace_id)
+            if reverse_zone_id is not None:
+                self.check_reverse_zone(request.user, reverse_zone_id)
+
+        with transaction.atomic():
+            try:
+                addr = allocate_address(zone.namespace, cidr)
+            except NetworkFull as e:
+                return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+
+            if with_ptr:
+                # the PTR name depends on the allocated address: checked
+                # before anything is written, a denial rolls back the
+                # allocation
+                ptr_zone_id = find_reverse_zone(addr, zone.namespace_id)
+                if ptr_zone_id is None:
+                    raise ValidationError(detail=f"No reverse zone for '{addr}' in namespace")
+                ptr_zone = (self.check_reverse_zone(request.user, ptr_zone_id) if ptr_zone_id != reverse_zone_id
+                            else get_zone_or_404(ptr_zone_id))
+                ptr_name = reverse_pointer(addr)
+                if not RrPermCheck.can_create_when_name_exist(request.user, ptr_name, "PTR"):
+                   raise PermissionDenied("PTR create unauthorized: PTR with same name already exists and is not updatable by user")
+                if not RrPermCheck.can_create_by_rule(request.user, ptr_name, ptr_zone, "PTR"):
+                   raise PermissionDenied("PTR create unauthorized: name or type invalid by rule of reverse zone")
+
+            serializer.validated_data[type.lower()] = addr
+            rr = save_rr(serializer)
+            set_perm(request.user, rr, PermRr, "rw")
+            result = dict(serializer.data)
+
+            if with_ptr:
+                # the PTR may already exist (created before, or along with
+                # the rr with settings.DNSAPP_AUTO_PTR): permissions are
+                # only set on a PTR created by this request
+                ptr, created = add_ptr(rr, zone.namespace_id)
+                if created or ptr == getattr(rr, 'created_ptr', None):
+                    set_perm(request.user, ptr, PermRr, "rw")
+                result['ptr'] = RrSerializer(ptr).data
+
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    def check_reverse_zone(self, user, zone_id):
+        '''
+        Reverse zone where user creates the PTR, same check as rr create
+        '''
+        reverse_zone = get_zone_or_404(zone_id)
+        if not PermCheck.can_create_record(user, reverse_zone, PermZone):
+           raise PermissionDenied('rr create unauthorized for reverse zone')
+        return reverse_zone
+
+#
+# Lookup of A and AAAA rr by address
+#
+# GET /rr/by-ip/?addr=10.1.2.3          rr with this address
+# GET /rr/by-ip/?cidr=10.1.0.0/16       rr with an address in this network
+# Only rr readable by user are returned ("r" permission or admin)
+
+class RrByIp(APIView):
+    def get(self, request, format=None):
+        addr = request.query_params.get('addr')
+        cidr = request.query_params.get('cidr')
+        rrs = get_allowed_rrs(request.user, "r")
+        try:
+            if addr:
+                rrs = rrs.filter(addr=addr_key(addr))
+            elif cidr:
+                first, last = network_range(cidr)
+                rrs = rrs.filter(addr__gte=first, addr__lte=last).order_by('addr')
+            else:
+                raise ValidationError(detail="Missing parameter 'addr' or 'cidr'")
+        except ValueError as e:
+            raise ValidationError(detail=str(e))
+        return Response(list_rrs(request, rrs))
+
+#
+# Lookup of rr by name, across zones
+#
+# GET /lookup/?fqdn=www.example.com            rr named www.example.com.
+# GET /lookup/?fqdn=www.example.com&type=A     same, only type A
+# GET /lookup/?fqdn=lab.example.com&subtree=1  rr named lab.example.com. and all names below
+# Only rr readable by user are returned ("r" permission or admin)
+
+class RrLookup(APIView):
+    def get(self, request, format=None):
+        fqdn = request.query_params.get('fqdn')
+        if not fqdn:
+            raise ValidationError(detail="Missing parameter 'fqdn'")
+        fqdn = normalize_fqdn(fqdn)
+
+        rrs = get_allowed_rrs(request.user, "r")
+        if request.query_params.get('subtree'):
+            low, high = subtree_range(fqdn)
+            rrs = rrs.filter(Q(fqdn=fqdn) | Q(rname__gte=low, rname__lt=high))
+        else:
+            rrs = rrs.filter(fqdn=fqdn)
+
+        type = request.query_params.get('type')
+        if type:
+            rrs = rrs.filter(type=type.upper())
 
+        return Response(list_rrs(request, rrs))
@@ -0,0 +1,132 @@
+'''
+Cache of rendered zone responses
+
+Listing a big zone loads and serializes every rr; the rendered body is
+kept, gzip compressed, in the django cache (settings.DNSAPP_ZONE_CACHE,
+"default" if unset) under a key made of:
+  * zone id and serial: the serial is incremented on each change of the
+    zone or of its rr (see core.signals), so a change makes previous
+    entries unreachable; they expire after DNSAPP_ZONE_CACHE_TIMEOUT
+  * scope: "all" when the user may see every rr of the zone, otherwise
+    the groups of the user and the version of the rr permissions of the
+    zone (incremented on each PermRr or PermZoneRr change in the zone)
+  * format: renderer and requested fields
+A hit costs no rr query and no serialization. Compressed bodies are
+sent as is to clients accepting gzip.
+NB: memcached refuses values over 1MB by default; big zones need a
+backend without this limit (redis, database, file based).
+'''
+import gzip
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from core.models import Rr, PermRr, PermZoneRr, rr_bulk_deleted, in_bulk_delete
+from core.metrics import cache_lookup
+
+PREFIX = "core.zonecache"
+
+
+def zone_cache():
+    return caches[getattr(settings, "DNSAPP_ZONE_CACHE", "default")]
+
+
+def perm_version(zone_id):
+    return zone_cache().get(f"{PREFIX}.perm.{zone_id}", 0)
+
+
+def increment_perm_version(zone_id):
+    cache = zone_cache()
+    key = f"{PREFIX}.perm.{zone_id}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key does not exist (yet, or evicted): any other value than 0 is new
+        cache.set(key, 1, timeout=None)
+
+
+def user_scope(user, zone):
+    '''
+    Scope of a user with rr level read permissions in zone
+    '''
+    groups = sorted(user.groups.values_list('id', flat=True))
+    return f"groups={','.join(str(g) for g in groups)};perm={perm_version(zone.id)}"
+
+
+def cache_key(zone, scope, format):
+    digest = hashlib.sha1(f"{scope}|{format}".encode()).hexdigest()
+    return f"{PREFIX}.{zone.id}.{zone.serial}.{digest}"
+
+
+def get_or_render(key, render):
+    '''
+    Compressed body for key; render() is called on a miss and must
+    return the body (bytes)
+    '''
+    cache = zone_cache()
+    body = cache.get(key)
+    cache_lookup("zone", body is not None)
+    if body is None:
+        body = gzip.compress(render(), compresslevel=6)
+        cache.set(key, body, getattr(settings, "DNSAPP_ZONE_CACHE_TIMEOUT", 3600))
+    return body
+
+
+class CachedResponse(HttpResponse):
+    '''
+    Response for a cached JSON body; data (decoded body, like
+    rest_framework Response.data) is computed on access only
+    '''
+    def __init__(self, content, compressed, **kwargs):
+        super().__init__(content, **kwargs)
+        self.compressed = compressed
+
+    @property
+    def data(self):
+        return json.loads(gzip.decompress(self.compressed))
+
+
+def compressed_response(request, body, content_type):
+    '''
+    Response for a compressed body, decompressed if client does not
+    accept gzip
+    '''
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        response = CachedResponse(body, body, content_type=content_type)
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = CachedResponse(gzip.decompress(body), body, content_type=content_type)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+@receiver([post_save, post_delete], sender=PermRr, dispatch_uid="core.zonecache.perm")
+def increment_perm_version_rr(sender, instance, raw=False, **kwargs):
+    ''' Receiver for rr permission creation, modification or delete
+    '''
+    if raw or in_bulk_delete():
+        return
+    zone_id = Rr.objects.filter(pk=instance.obj_id).values_list('zone_id', flat=True).first()
+    if zone_id is not None:
+        increment_perm_version(zone_id)
+
+
+@receiver([post_save, post_delete], sender=PermZoneRr, dispatch_uid="core.zonecache.permzone")
+def increment_perm_version_zone(sender, instance, raw=False, **kwargs):
+    ''' Receiver for zone level rr permission creation, modification or delete
+    '''
+    if not raw:
+        increment_perm_version(instance.obj_id)
+
+
+@receiver(rr_bulk_deleted, sender=Rr, dispatch_uid="core.zonecache.perm_bulk")
+def increment_perm_version_bulk(sender, objs, **kwargs):
+    ''' Receiver for rr bulk delete (and the delete of their PermRr): one
+    increment per zone
+    '''
+    for zone_id in {rr.zone_id for rr in objs}:
+        increment_perm_version(zone_id)
@@ -0,0 +1,282 @@
+'''
+Reading of zone files (master file format, RFC 1035 section 5)
+
+Records are produced as tuples (name, ttl, type, rdata):
+  * name: relative to the zone origin ("www", "@")
+  * rdata: master file syntax, names absolute ("10 mail.example.com.")
+in file order, one at a time: memory does not depend on the size of the
+zone. Supported: $ORIGIN, $TTL, $INCLUDE (relative paths are relative
+to the including file), parentheses, comments, quoted strings, TTL
+units ("1h30m"), owner inherited from the previous line. TTL of a record
+without one: $TTL, else the last TTL given, else the SOA minimum (like
+dnspython). Records with an owner outside of the zone are ignored.
+$GENERATE is not supported.
+
+This module does not use django, so that zone files can be parsed in
+worker processes (see core.importer.import_zone_files).
+'''
+import io
+import os
+import re
+import ipaddress
+
+# Messages sent by parse workers: (zone, kind, payload)
+RECORDS = "records"     # payload: list of records
+END = "end"             # payload: None
+ERROR = "error"         # payload: error message
+
+CLASSES = {"IN"}
+OTHER_CLASSES = {"CH", "CS", "HS", "NONE", "ANY"}
+
+# Position of domain names in rdata, made absolute when read
+NAME_FIELDS = {
+    "NS": (0,),
+    "CNAME": (0,),
+    "PTR": (0,),
+    "DNAME": (0,),
+    "MX": (1,),
+    "SRV": (3,),
+    "SOA": (0, 1),
+}
+
+# Tokens of lines with comments, quotes, parentheses or escapes
+TOKEN_RE = re.compile(r'\s+|;.*|\(|\)|"(?:[^"\\]|\\.)*"|(?:[^\s;()"\\]|\\.)+')
+SPECIAL = re.compile(r'[;"()\\]')
+TTL_RE = re.compile(r'(\d+)([wdhms]?)', re.IGNORECASE)
+TTL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+class ZoneFileError(Exception):
+    pass
+
+
+def parse_ttl(text):
+    '''
+    TTL in seconds: "3600", "1h30m" -> 5400
+    Raises ValueError
+    '''
+    if text.isdigit():
+        return int(text)
+    total = 0
+    position = 0
+    for m in TTL_RE.finditer(text):
+        if m.start() != position or not m.group(2):
+            raise ValueError(f"Invalid TTL '{text}'")
+        total += int(m.group(1)) * TTL_UNITS[m.group(2).lower()]
+        position = m.end()
+    if position != len(text) or not text:
+        raise ValueError(f"Invalid TTL '{text}'")
+    return total
+
+
+def absolute(name, origin):
+    '''
+    Absolute name (with trailing dot) of name read with origin
+    '''
+    if name == "@":
+        return origin
+    if name.endswith(".") and not name.endswith("\\."):
+        return name
+    return f"{name}.{origin}" if origin != "." else f"{name}."
+
+
+def relative(fqdn, zone):
+    '''
+    Name relative to zone ("@" for the zone itself), None if fqdn is not
+    in zone
+    '''
+    lower = fqdn.lower()
+    if lower == zone:
+        return "@"
+    if lower.endswith(f".{zone}"):
+        return fqdn[:-len(zone) - 1]
+    return None
+
+
+def logical_lines(f, path):
+    '''
+    (line number, owner field present, tokens) for each entry of an open
+    file; an entry spans several lines inside parentheses
+    '''
+    tokens = []
+    depth = 0
+    indented = False
+    start = 0
+    for number, line in enumerate(f, 1):
+        if depth == 0:
+            tokens = []
+            indented = line[:1] in (" ", "\t")
+            start = number
+        if depth == 0 and not SPECIAL.search(line):
+            # most lines: no comment, quote, parenthesis or escape
+            tokens = line.split()
+        else:
+            position = 0
+            for m in TOKEN_RE.finditer(line):
+                if m.start() != position:
+                    break
+                position = m.end()
+                token = m.group()
+                if token == "(":
+                    depth += 1
+                elif token == ")":
+                    depth -= 1
+                    if depth < 0:
+                        raise ZoneFileError(f"{path}:{number}: unbalanced parenthesis")
+                elif token[0] not in " \t\r\n;":
+                    tokens.append(token)
+            if position != len(line):
+                raise ZoneFileError(f"{path}:{number}: syntax error")
+        if depth == 0 and tokens:
+            yield start, not indented, tokens
+    if depth:
+        raise ZoneFileError(f"{path}:{start}: unbalanced parenthesis")
+
+
+class ZoneFileReader():
+    '''
+    Streaming reader of a zone file; iterate to get the records
+    '''
+    def __init__(self, path, origin, allow_include=True):
+        self.path = path
+        self.allow_include = allow_include
+        self.zone = absolute(origin.lower(), ".")
+        self.origin = self.zone
+        self.default_ttl = None
+        self.default_ttl_from_soa = False
+        self.last_ttl = None
+        self.last_name = None
+
+    def __iter__(self):
+        return self.read(self.path)
+
+    def implicit_ttl(self):
+        if self.last_ttl is not None and (self.default_ttl is None or self.default_ttl_from_soa):
+            return self.last_ttl
+        return self.default_ttl
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            yield from self.read_file(f, path)
+
+    def read_file(self, f, path):
+        for number, owner, tokens in logical_lines(f, path):
+            try:
+                if owner and tokens[0].startswith("$"):
+                    yield from self.directive(path, tokens)
+                    continue
+                record = self.record(owner, tokens)
+            except (ValueError, IndexError) as e:
+                raise ZoneFileError(f"{path}:{number}: {str(e) or 'syntax error'}")
+            if record is not None:
+                yield record
+
+    def directive(self, path, tokens):
+        name = tokens[0].upper()
+        if name == "$ORIGIN":
+            self.origin = absolute(tokens[1].lower(), self.origin)
+        elif name == "$TTL":
+            self.default_ttl = parse_ttl(tokens[1])
+            self.default_ttl_from_soa = False
+        elif name == "$INCLUDE" and self.allow_include:
+            include = os.path.join(os.path.dirname(path), tokens[1])
+            saved = (self.origin, self.last_name, self.last_ttl,
+                     self.default_ttl, self.default_ttl_from_soa)
+            if len(tokens) > 2:
+                self.origin = absolute(tokens[2].lower(), self.origin)
+            yield from self.read(include)
+            (self.origin, self.last_name, self.last_ttl,
+             self.default_ttl, self.default_ttl_from_soa) = saved
+        else:
+            raise ValueError(f"unsupported directive '{tokens[0]}'")
+
+    def record(self, owner, tokens):
+        '''
+        Record of an entry, None if its owner is outside of the zone
+        '''
+        position = 0
+        if owner:
+            self.last_name = absolute(tokens[0], self.origin)
+            position = 1
+        elif self.last_name is None:
+            raise ValueError("no owner name")
+        ttl = None
+        for _ in range(2):
+            token = tokens[position]
+            upper = token.upper()
+            if upper in CLASSES:
+                position += 1
+            elif upper in OTHER_CLASSES:
+                raise ValueError(f"class '{token}' is not IN")
+            elif ttl is None and token[0].isdigit():
+                ttl = self.last_ttl = parse_ttl(token)
+                position += 1
+        type = tokens[position].upper()
+        rdata = tokens[position + 1:]
+        if not rdata:
+            raise ValueError(f"missing rdata for {type}")
+
+        for i in NAME_FIELDS.get(type, ()):
+            rdata[i] = absolute(rdata[i], self.origin)
+        if type in ("A", "AAAA"):
+            rdata = [str(ipaddress.IPv4Address(rdata[0]) if type == "A"
+                         else ipaddress.IPv6Address(rdata[0]))] + rdata[1:]
+        if type == "SOA":
+            rdata = rdata[:3] + [str(parse_ttl(t)) for t in rdata[3:]]
+            if self.default_ttl is None:
+                self.default_ttl = int(rdata[6])
+                self.default_ttl_from_soa = True
+
+        if ttl is None:
+            ttl = self.implicit_ttl()
+            if ttl is None:
+                raise ValueError("missing TTL")
+
+        name = relative(self.last_name, self.zone)
+        if name is None:
+            return None
+        return name, ttl, type, " ".join(rdata)
+
+
+def read_zone_file(path, origin):
+    '''
+    Records of a zone file, in file order (SOA first in a valid zone file)
+    '''
+    return iter(ZoneFileReader(path, origin))
+
+
+def read_zone_text(text, origin):
+    '''
+    Records of zone file text received from a client ($INCLUDE is refused)
+    '''
+    reader = ZoneFileReader("<text>", origin, allow_include=False)
+    return reader.read_file(io.StringIO(text), "<text>")
+
+
+_results = None
+
+
+def init_worker(results):
+    '''
+    Initializer of parse worker processes: results is the (bounded)
+    queue of messages
+    '''
+    global _results
+    _results = results
+
+
+def parse_worker(zone, path, batch_size):
+    '''
+    Parse a zone file, send its records by batches, then END or ERROR
+    '''
+    try:
+        batch = []
+        for record in read_zone_file(path, zone):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _results.put((zone, RECORDS, batch))
+                batch = []
+        _results.put((zone, RECORDS, batch))
+        _results.put((zone, END, None))
+    except Exception as e:
+        _results.put((zone, ERROR, f"{path}: {e}"))
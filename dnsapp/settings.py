@@ -43,11 +43,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.querybudget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiler.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +93,22 @@ DATABASES = {
 #    }
 }
 
+# Cache shared by the worker processes: it holds the version numbers of
+# the zone trie (core/resolver.py) and of the permission preferences
+# (core/prefs.py) kept in memory by each process, and the rendered zone
+# listings (core/zonecache.py). The local memory cache is not shared: it
+# is only correct with a single process. With several workers, use a
+# shared backend (memcached, redis or database)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+#    'default': {
+#        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+#        'LOCATION': '127.0.0.1:11211',
+#    }
+}
+
 # Use custom user model
 AUTH_USER_MODEL = "core.User"
 
@@ -134,6 +153,44 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# Create, update and remove PTR records in reverse zones automatically
+# when A and AAAA records change (see core/ptr.py)
+DNSAPP_AUTO_PTR = False
+
+# Cache (alias in CACHES) and lifetime in seconds of rendered zone
+# listings (see core/zonecache.py)
+DNSAPP_ZONE_CACHE = 'default'
+DNSAPP_ZONE_CACHE_TIMEOUT = 3600
+
+# Users whose permission preferences are kept in memory by each process,
+# and seconds after which they are read again (see core/prefs.py)
+DNSAPP_PREFS_CACHE_SIZE = 1000
+DNSAPP_PREFS_CACHE_TIMEOUT = 60
+
+# Count SQL queries of each request (Server-Timing header), log requests
+# over the query budget of their view, and optionally append the counters
+# of every request to a file for "manage.py querystats" (see core/querybudget.py)
+DNSAPP_QUERY_STATS = True
+DNSAPP_QUERY_BUDGET = 20
+DNSAPP_QUERY_BUDGETS = {}
+DNSAPP_QUERY_LOG = None
+
+# Collect Prometheus metrics, exported on /metrics (see core/metrics.py;
+# set PROMETHEUS_MULTIPROC_DIR with several worker processes). /metrics is
+# served to superusers and to the addresses or networks of
+# DNSAPP_METRICS_ALLOWED_IPS (the Prometheus servers; behind a reverse
+# proxy, REMOTE_ADDR is the address of the proxy)
+DNSAPP_METRICS = True
+DNSAPP_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Profile requests with cProfile: a random fraction DNSAPP_PROFILER_RATE
+# of them, and those of superusers sending "X-Profile: 1". Profiles are
+# saved by view in DNSAPP_PROFILER_DIR (default: temporary directory) and
+# downloaded from /profile/ (see core/profiler.py)
+DNSAPP_PROFILER = False
+DNSAPP_PROFILER_RATE = 0.0
+DNSAPP_PROFILER_DIR = None
+
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
 }